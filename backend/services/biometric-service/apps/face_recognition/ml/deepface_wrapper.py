@@ -0,0 +1,39 @@
+import numpy as np
+from django.conf import settings
+
+
+class FaceModelUnavailable(RuntimeError):
+    """Raised when DeepFace (an optional dependency) is not installed."""
+
+
+class NoFaceDetected(ValueError):
+    """Raised when no face is found in the image."""
+
+
+def extract_embedding(image_path, model_name=None):
+    """Face embedding (float32 vector) of the most prominent face in `image_path`."""
+    return extract_embeddings([image_path], model_name)[0]
+
+
+def extract_embeddings(image_paths, model_name=None):
+    """
+    Embeddings for several images as one (n, dim) float32 matrix. The
+    model is loaded once, but DeepFace.represent() takes one image at a
+    time, so this is not a batched forward pass.
+    """
+    try:
+        from deepface import DeepFace
+    except ImportError:
+        raise FaceModelUnavailable("deepface is not installed")
+
+    model_name = model_name or settings.FACE_MODEL
+    embeddings = []
+    for path in image_paths:
+        try:
+            faces = DeepFace.represent(img_path=path, model_name=model_name, enforce_detection=True)
+        except ValueError as e:
+            raise NoFaceDetected(f"{path}: {e}")
+        # represent() returns one entry per detected face; keep the largest
+        face = max(faces, key=lambda f: f['facial_area']['w'] * f['facial_area']['h'])
+        embeddings.append(face['embedding'])
+    return np.asarray(embeddings, dtype=np.float32).reshape(len(image_paths), -1)
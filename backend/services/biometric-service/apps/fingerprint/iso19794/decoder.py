@@ -0,0 +1,178 @@
+"""
+ISO/IEC 19794-2:2005 finger minutiae record decoder.
+
+Record layout (big-endian):
+  record header, 24 bytes: 'FMR\\0', ' 20\\0', record length (u32),
+      capture equipment (4 bits) + device type (12 bits), image width,
+      image height, x/y resolution (pixels per cm), finger view count, reserved
+  per finger view:
+      view header, 4 bytes: finger position, view number (4 bits) +
+          impression type (4 bits), finger quality, minutia count
+      minutiae, 6 bytes each: type (2 bits) + x (14 bits), reserved (2 bits)
+          + y (14 bits), angle (units of 360/256 degrees), quality
+      extended data block length (u16), then that many bytes
+
+Minutiae are decoded in one np.frombuffer() per view into MINUTIA_DTYPE
+structured arrays, never one Python object per minutia.
+"""
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+
+class ISO19794Error(ValueError):
+    """Raised for truncated or malformed 19794-2 records."""
+
+
+FORMAT_ID = b'FMR\x00'
+VERSION = b' 20\x00'
+
+RECORD_HEADER = struct.Struct('>4s4sIHHHHHBB')
+VIEW_HEADER = struct.Struct('>BBBB')
+EXTENDED_LENGTH = struct.Struct('>H')
+
+# Minutia as stored on the wire
+RAW_MINUTIA_DTYPE = np.dtype([('type_x', '>u2'), ('y', '>u2'), ('angle', 'u1'), ('quality', 'u1')])
+# Minutia as handed to the matcher; angle keeps the record's 360/256-degree units
+MINUTIA_DTYPE = np.dtype([('x', '<u2'), ('y', '<u2'), ('angle', 'u1'), ('type', 'u1'), ('quality', 'u1')])
+
+ANGLE_UNIT = 2 * np.pi / 256  # radians per angle unit
+
+# Largest record the format can describe: 255 views of 255 minutiae, each
+# with a full 64 KiB extended data block
+MAX_RECORD_LENGTH = RECORD_HEADER.size + 255 * (VIEW_HEADER.size + 255 * 6 + EXTENDED_LENGTH.size + 0xFFFF)
+# Default cap for streamed records; ten fingers of 255 minutiae take about 16 KiB
+STREAM_RECORD_LIMIT = 1 << 20
+
+TYPE_OTHER = 0
+TYPE_RIDGE_ENDING = 1
+TYPE_BIFURCATION = 2
+
+RecordHeader = namedtuple('RecordHeader', [
+    'length', 'capture_equipment', 'device_type', 'width', 'height', 'x_resolution', 'y_resolution', 'view_count',
+])
+FingerView = namedtuple('FingerView', [
+    'position', 'view_number', 'impression_type', 'quality', 'minutiae', 'extended_data',
+])
+FingerprintRecord = namedtuple('FingerprintRecord', ['header', 'views'])
+
+
+def unpack_minutiae(raw):
+    """MINUTIA_DTYPE array from the 6-byte wire minutiae in `raw` (bytes-like)."""
+    wire = np.frombuffer(raw, dtype=RAW_MINUTIA_DTYPE)
+    minutiae = np.empty(len(wire), dtype=MINUTIA_DTYPE)
+    type_x = wire['type_x']
+    minutiae['x'] = type_x & 0x3FFF
+    minutiae['y'] = wire['y'] & 0x3FFF
+    minutiae['type'] = type_x >> 14
+    minutiae['angle'] = wire['angle']
+    minutiae['quality'] = wire['quality']
+    return minutiae
+
+
+def parse_header(data, offset=0):
+    try:
+        (format_id, version, length, equipment, width, height,
+         x_resolution, y_resolution, view_count, _) = RECORD_HEADER.unpack_from(data, offset)
+    except struct.error:
+        raise ISO19794Error(f"Truncated record header at offset {offset}")
+    if format_id != FORMAT_ID or version != VERSION:
+        raise ISO19794Error(f"Not an ISO/IEC 19794-2:2005 record at offset {offset}")
+    if length < RECORD_HEADER.size:
+        raise ISO19794Error(f"Record length {length} is shorter than its header")
+    if length > MAX_RECORD_LENGTH:
+        raise ISO19794Error(f"Record length {length} exceeds the format's maximum of {MAX_RECORD_LENGTH}")
+    return RecordHeader(length, equipment >> 12, equipment & 0x0FFF, width, height,
+                        x_resolution, y_resolution, view_count)
+
+
+def _walk(data):
+    """
+    (header, memoryview, [(position, numbers, quality, minutiae slice,
+    extended slice), ...]) with every length checked, minutiae not yet decoded.
+    """
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    header = parse_header(view)
+    if header.length > len(view):
+        raise ISO19794Error(f"Record declares {header.length} bytes, got {len(view)}")
+    return header, view, _walk_views(view, header)
+
+
+def _walk_views(view, header):
+    offset, end = RECORD_HEADER.size, header.length
+    for index in range(header.view_count):
+        if offset + VIEW_HEADER.size > end:
+            raise ISO19794Error(f"Truncated header of finger view {index}")
+        position, numbers, quality, count = VIEW_HEADER.unpack_from(view, offset)
+        offset += VIEW_HEADER.size
+        minutiae_end = offset + 6 * count
+        if minutiae_end + EXTENDED_LENGTH.size > end:
+            raise ISO19794Error(f"Truncated minutiae of finger view {index}")
+        extended_length, = EXTENDED_LENGTH.unpack_from(view, minutiae_end)
+        extended_start = minutiae_end + EXTENDED_LENGTH.size
+        if extended_start + extended_length > end:
+            raise ISO19794Error(f"Truncated extended data of finger view {index}")
+        yield position, numbers, quality, view[offset:minutiae_end], view[extended_start:extended_start + extended_length]
+        offset = extended_start + extended_length
+
+
+def iter_views(data):
+    """
+    Yields the FingerViews of one record lazily, so a 10-finger record can
+    be matched finger by finger. extended_data is a memoryview into `data`;
+    call bytes() on it to keep it past the buffer's lifetime.
+    """
+    _, _, views = _walk(data)
+    for position, numbers, quality, raw, extended in views:
+        yield FingerView(position, numbers >> 4, numbers & 0x0F, quality, unpack_minutiae(raw), extended)
+
+
+def decode(data):
+    """
+    Whole record: FingerprintRecord(header, [FingerView, ...]). The minutiae
+    of all views are unpacked in one pass and split, rather than per view.
+    """
+    header, _, walked = _walk(data)
+    walked = list(walked)
+    if len(walked) < 2:
+        per_view = [unpack_minutiae(raw) for _, _, _, raw, _ in walked]
+    else:
+        minutiae = unpack_minutiae(b''.join(raw for _, _, _, raw, _ in walked))
+        per_view, start = [], 0
+        for _, _, _, raw, _ in walked:
+            per_view.append(minutiae[start:start + len(raw) // 6])
+            start += len(raw) // 6
+    return FingerprintRecord(header, [
+        FingerView(position, numbers >> 4, numbers & 0x0F, quality, view_minutiae, extended)
+        for (position, numbers, quality, _, extended), view_minutiae in zip(walked, per_view)
+    ])
+
+
+def iter_records(stream, chunk_size=65536, max_length=STREAM_RECORD_LIMIT):
+    """
+    Decodes back-to-back records from a binary file object (e.g. an export
+    of many citizens' templates), reading it in chunks. Yields
+    FingerprintRecords whose buffers are independent of the stream.
+    A record declaring more than `max_length` bytes is rejected from its
+    header, before any of it is buffered.
+    """
+    buffer = bytearray()
+    offset = 0
+    while True:
+        if len(buffer) - offset >= RECORD_HEADER.size:
+            length = parse_header(buffer, offset).length
+            if length > max_length:
+                raise ISO19794Error(f"Record declares {length} bytes; the limit is {max_length}")
+            if len(buffer) - offset >= length:
+                yield decode(bytes(buffer[offset:offset + length]))
+                offset += length
+                continue
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            if offset < len(buffer):
+                raise ISO19794Error(f"Stream ends inside a record ({len(buffer) - offset} trailing bytes)")
+            return
+        del buffer[:offset]
+        offset = 0
+        buffer += chunk
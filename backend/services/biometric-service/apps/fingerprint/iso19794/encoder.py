@@ -0,0 +1,64 @@
+import numpy as np
+
+from .decoder import (  # noqa: F401  (kept importable from here)
+    EXTENDED_LENGTH, FORMAT_ID, MINUTIA_DTYPE, RAW_MINUTIA_DTYPE, RECORD_HEADER, VERSION, VIEW_HEADER,
+    FingerView, ISO19794Error,
+)
+
+MAX_COORDINATE = 0x3FFF
+
+
+def pack_minutiae(minutiae):
+    """6-byte wire encoding of a MINUTIA_DTYPE array (or any array with its fields)."""
+    minutiae = np.asarray(minutiae)
+    if len(minutiae) and (minutiae['x'].max() > MAX_COORDINATE or minutiae['y'].max() > MAX_COORDINATE):
+        raise ISO19794Error(f"Minutia coordinates must be below {MAX_COORDINATE + 1}")
+    if len(minutiae) and minutiae['type'].max() > 3:
+        raise ISO19794Error("Minutia type must fit in 2 bits")
+    wire = np.empty(len(minutiae), dtype=RAW_MINUTIA_DTYPE)
+    wire['type_x'] = (minutiae['type'].astype(np.uint16) << 14) | minutiae['x']
+    wire['y'] = minutiae['y']
+    wire['angle'] = minutiae['angle']
+    wire['quality'] = minutiae['quality']
+    return wire.tobytes()
+
+
+def finger_view(position, minutiae, quality=100, view_number=0, impression_type=0, extended_data=b''):
+    """FingerView with its minutiae converted to MINUTIA_DTYPE."""
+    converted = np.zeros(len(minutiae), dtype=MINUTIA_DTYPE)
+    for field in MINUTIA_DTYPE.names:
+        converted[field] = np.asarray(minutiae)[field]
+    return FingerView(position, view_number, impression_type, quality, converted, extended_data)
+
+
+def encode(views, width, height, x_resolution=197, y_resolution=197, capture_equipment=0, device_type=0):
+    """
+    ISO/IEC 19794-2:2005 record for a list of FingerViews (see finger_view()).
+    Resolutions are in pixels per cm; 197 is 500 dpi.
+    """
+    if len(views) > 255:
+        raise ISO19794Error("A record holds at most 255 finger views")
+    # Minutiae of all views are packed in one pass, then sliced per view
+    # (joining raw buffers: np.concatenate is slow on structured arrays)
+    packed = pack_minutiae(np.frombuffer(
+        b''.join(np.ascontiguousarray(view.minutiae, dtype=MINUTIA_DTYPE).tobytes() for view in views),
+        dtype=MINUTIA_DTYPE,
+    ))
+    parts, start = [], 0
+    for view in views:
+        count = len(view.minutiae)
+        if count > 255:
+            raise ISO19794Error(f"Finger {view.position} has {count} minutiae; at most 255 fit")
+        if len(view.extended_data) > 0xFFFF:
+            raise ISO19794Error(f"Extended data of finger {view.position} exceeds 65535 bytes")
+        parts.append(VIEW_HEADER.pack(view.position, (view.view_number << 4) | view.impression_type,
+                                      view.quality, count))
+        parts.append(packed[start:start + 6 * count])
+        parts.append(EXTENDED_LENGTH.pack(len(view.extended_data)))
+        parts.append(bytes(view.extended_data))
+        start += 6 * count
+    body = b''.join(parts)
+    header = RECORD_HEADER.pack(FORMAT_ID, VERSION, RECORD_HEADER.size + len(body),
+                                (capture_equipment << 12) | device_type, width, height,
+                                x_resolution, y_resolution, len(views), 0)
+    return header + body
@@ -1,7 +1,13 @@
 from django.db import models
 
+from .iso19794.decoder import decode
+
 class Fingerprint(models.Model):
     citizen_id = models.CharField(max_length=50)
     finger_index = models.IntegerField(help_text="1-10 for standard ISO fingers")
     minutiae_template = models.BinaryField()
     created_at = models.DateTimeField(auto_now_add=True)
+
+    def record(self):
+        """minutiae_template decoded as an ISO/IEC 19794-2 FingerprintRecord."""
+        return decode(bytes(self.minutiae_template))
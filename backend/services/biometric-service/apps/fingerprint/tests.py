@@ -0,0 +1,156 @@
+import io
+import struct
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .iso19794.decoder import (
+    MINUTIA_DTYPE, RECORD_HEADER, ISO19794Error, decode, iter_records, iter_views, parse_header,
+)
+from .iso19794.encoder import encode, finger_view
+
+
+def _minutiae(count, seed):
+    rng = np.random.default_rng(seed)
+    minutiae = np.zeros(count, dtype=MINUTIA_DTYPE)
+    minutiae['x'] = rng.integers(0, 0x3FFF, count)
+    minutiae['y'] = rng.integers(0, 0x3FFF, count)
+    minutiae['angle'] = rng.integers(0, 256, count)
+    minutiae['type'] = rng.integers(0, 3, count)
+    minutiae['quality'] = rng.integers(0, 101, count)
+    return minutiae
+
+
+def _record(seed=0, width=500, height=550):
+    views = [
+        finger_view(1, _minutiae(40, seed), quality=80, view_number=1, impression_type=2),
+        finger_view(6, _minutiae(0, seed)),
+        finger_view(7, _minutiae(255, seed + 1), extended_data=b'\x00\x01ext'),
+    ]
+    return views, encode(views, width, height, x_resolution=197, y_resolution=200, capture_equipment=3, device_type=9)
+
+
+class _Reads(io.BytesIO):
+    """BytesIO that counts the bytes handed out by read()."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class ISO19794RoundTripTests(SimpleTestCase):
+    def assertViewsEqual(self, decoded, views):
+        self.assertEqual(len(decoded), len(views))
+        for got, expected in zip(decoded, views):
+            self.assertEqual(got.position, expected.position)
+            self.assertEqual(got.view_number, expected.view_number)
+            self.assertEqual(got.impression_type, expected.impression_type)
+            self.assertEqual(got.quality, expected.quality)
+            self.assertEqual(got.minutiae.dtype, MINUTIA_DTYPE)
+            np.testing.assert_array_equal(got.minutiae, expected.minutiae)
+            self.assertEqual(bytes(got.extended_data), bytes(expected.extended_data))
+
+    def test_decode_returns_what_was_encoded(self):
+        views, data = _record()
+        record = decode(data)
+        self.assertEqual(record.header.length, len(data))
+        self.assertEqual((record.header.width, record.header.height), (500, 550))
+        self.assertEqual((record.header.x_resolution, record.header.y_resolution), (197, 200))
+        self.assertEqual((record.header.capture_equipment, record.header.device_type), (3, 9))
+        self.assertEqual(record.header.view_count, 3)
+        self.assertViewsEqual(record.views, views)
+
+    def test_iter_views_matches_decode(self):
+        views, data = _record()
+        self.assertViewsEqual(list(iter_views(data)), views)
+
+    def test_decode_accepts_memoryview(self):
+        views, data = _record()
+        self.assertViewsEqual(decode(memoryview(data)).views, views)
+
+    def test_encode_rejects_coordinates_beyond_14_bits(self):
+        minutiae = _minutiae(2, 0)
+        minutiae['x'][0] = 0x4000
+        with self.assertRaises(ISO19794Error):
+            encode([finger_view(1, minutiae)], 500, 500)
+
+
+class ISO19794MalformedTests(SimpleTestCase):
+    def test_every_truncation_is_rejected(self):
+        _, data = _record()
+        for end in range(len(data)):
+            with self.subTest(end=end), self.assertRaises(ISO19794Error):
+                decode(data[:end])
+
+    def test_truncated_views_are_rejected_even_when_length_agrees(self):
+        _, data = _record()
+        for end in (RECORD_HEADER.size + 2, RECORD_HEADER.size + 30, len(data) - 1):
+            # Rewrite the length field so only the view walk can notice
+            cut = bytearray(data[:end])
+            struct.pack_into('>I', cut, 8, end)
+            with self.subTest(end=end), self.assertRaises(ISO19794Error):
+                decode(bytes(cut))
+
+    def test_foreign_records_are_rejected(self):
+        _, data = _record()
+        for foreign in (b'FIR\x00' + data[4:], data[:4] + b' 30\x00' + data[8:], b'\x00' * len(data)):
+            with self.subTest(prefix=foreign[:8]), self.assertRaises(ISO19794Error):
+                decode(foreign)
+
+    def test_length_shorter_than_header_is_rejected(self):
+        _, data = _record()
+        short = bytearray(data)
+        struct.pack_into('>I', short, 8, RECORD_HEADER.size - 1)
+        with self.assertRaises(ISO19794Error):
+            parse_header(bytes(short))
+
+    def test_length_beyond_the_format_maximum_is_rejected(self):
+        _, data = _record()
+        huge = bytearray(data)
+        struct.pack_into('>I', huge, 8, 0xFFFFFFFF)
+        with self.assertRaises(ISO19794Error):
+            parse_header(bytes(huge))
+
+
+class IterRecordsTests(SimpleTestCase):
+    def test_records_split_across_chunks(self):
+        records = [_record(seed) for seed in range(4)]
+        stream = io.BytesIO(b''.join(data for _, data in records))
+        for chunk_size in (1, 7, RECORD_HEADER.size, 4096, 1 << 20):
+            stream.seek(0)
+            with self.subTest(chunk_size=chunk_size):
+                decoded = list(iter_records(stream, chunk_size=chunk_size))
+                self.assertEqual(len(decoded), len(records))
+                for record, (views, data) in zip(decoded, records):
+                    self.assertEqual(record.header.length, len(data))
+                    for got, expected in zip(record.views, views):
+                        np.testing.assert_array_equal(got.minutiae, expected.minutiae)
+
+    def test_empty_stream_yields_nothing(self):
+        self.assertEqual(list(iter_records(io.BytesIO(b''))), [])
+
+    def test_stream_ending_inside_a_record_is_rejected(self):
+        _, data = _record()
+        records = iter_records(io.BytesIO(data + data[:-3]), chunk_size=64)
+        next(records)
+        with self.assertRaises(ISO19794Error):
+            next(records)
+
+    def test_foreign_record_in_stream_is_rejected(self):
+        _, data = _record()
+        with self.assertRaises(ISO19794Error):
+            list(iter_records(io.BytesIO(data + b'FIR\x00' + data[4:])))
+
+    def test_oversized_record_is_rejected_from_its_header(self):
+        _, data = _record()
+        oversized = bytearray(data)
+        struct.pack_into('>I', oversized, 8, 16 << 20)
+        stream = _Reads(bytes(oversized) + b'\x00' * (1 << 20))
+        with self.assertRaises(ISO19794Error):
+            list(iter_records(stream, chunk_size=4096, max_length=1 << 16))
+        self.assertEqual(stream.bytes_read, 4096)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import VerifyFingerprintView
+
+urlpatterns = [
+    path('verify/', VerifyFingerprintView.as_view(), name='verify_fingerprint'),
+]
@@ -0,0 +1,66 @@
+import base64
+import binascii
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .iso19794.decoder import ISO19794Error, decode
+from .matcher import minutiae_matcher
+from .models import Fingerprint
+
+
+class VerifyFingerprintView(APIView):
+    """
+    1:1 verification of a captured finger against the citizen's enrolled
+    templates. Answered inline rather than through Celery: a comparison
+    takes about a millisecond.
+
+    Body: citizen_id, finger_index and template (base64 ISO/IEC 19794-2
+    record; its view for finger_index is used, else its first view).
+    """
+    def post(self, request):
+        citizen_id = request.data.get('citizen_id')
+        finger_index = request.data.get('finger_index')
+        template = request.data.get('template')
+
+        if not citizen_id or finger_index is None or not template:
+            return Response({'error': 'citizen_id, finger_index and template required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            finger_index = int(finger_index)
+            probe = decode(base64.b64decode(template, validate=True))
+        except (TypeError, ValueError, binascii.Error, ISO19794Error) as e:
+            return Response({'error': f'Invalid template: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if not probe.views:
+            return Response({'error': 'Template has no finger views'}, status=status.HTTP_400_BAD_REQUEST)
+        probe_view = next((v for v in probe.views if v.position == finger_index), probe.views[0])
+
+        best = None
+        for enrolled in Fingerprint.objects.filter(citizen_id=citizen_id, finger_index=finger_index):
+            try:
+                record = enrolled.record()
+            except ISO19794Error as e:
+                print(f"Skipping unreadable template {enrolled.pk}: {e}")
+                continue
+            for view in record.views:
+                result = minutiae_matcher.match(probe_view.minutiae, view.minutiae,
+                                                record.header.width, record.header.height)
+                if best is None or result.score > best.score:
+                    best = result
+
+        if best is None:
+            return Response({
+                'citizen_id': citizen_id,
+                'finger_index': finger_index,
+                'status': 'NOT_ENROLLED'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'citizen_id': citizen_id,
+            'finger_index': finger_index,
+            'match_score': best.score,
+            'paired_minutiae': best.paired,
+            'is_match': best.score >= settings.FINGERPRINT_MATCH_THRESHOLD,
+            'status': 'COMPLETED'
+        })
@@ -0,0 +1,78 @@
+"""
+Micro-batching of face probes.
+
+Views push each probe onto a Redis list and answer with a fresh task ID
+straight away. A single process_probe_batch task then drains up to
+FACE_BATCH_SIZE probes: it extracts the embeddings of any images in
+one pass (the model still runs once per image, see extract_embeddings),
+scores them against the gallery together, and stores every probe's
+result in the Celery result backend under that probe's task ID.
+TaskStatusView and AsyncResult see no difference from a per-probe task.
+
+A drain runs FACE_BATCH_WAIT_MS after the first probe of a batch arrives,
+or immediately once FACE_BATCH_SIZE probes are waiting. Extra latency is
+therefore bounded by the wait plus one batch's processing time.
+"""
+import json
+import threading
+import uuid
+
+import redis
+from django.conf import settings
+
+QUEUE_KEY = 'biometric:probes'
+TIMER_KEY = 'biometric:probes:timer'
+
+MATCH = 'match'
+SEARCH = 'search'
+ENROLL = 'enroll'
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(settings.FACE_BATCH_REDIS_URL)
+    return _client
+
+
+def batching_enabled():
+    return settings.FACE_BATCH_SIZE > 1
+
+
+def submit(kind, **probe):
+    """
+    Queues one probe (kind plus the matching task's arguments) and returns
+    the task ID its result will be stored under.
+    """
+    from .tasks import process_probe_batch
+
+    task_id = str(uuid.uuid4())
+    client = get_redis()
+    pipe = client.pipeline()
+    pipe.rpush(QUEUE_KEY, json.dumps({'task_id': task_id, 'kind': kind, **probe}))
+    pipe.set(TIMER_KEY, 1, nx=True, px=settings.FACE_BATCH_WAIT_MS)
+    waiting, first = pipe.execute()
+
+    if waiting >= settings.FACE_BATCH_SIZE and waiting % settings.FACE_BATCH_SIZE == 0:
+        process_probe_batch.delay()
+    elif first:
+        process_probe_batch.apply_async(countdown=settings.FACE_BATCH_WAIT_MS / 1000)
+    return task_id
+
+
+def take(limit=None):
+    """Atomically pops up to `limit` (default FACE_BATCH_SIZE) queued probes."""
+    limit = limit or settings.FACE_BATCH_SIZE
+    client = get_redis()
+    pipe = client.pipeline()
+    pipe.delete(TIMER_KEY)  # probes arriving from now on start a new wait
+    pipe.lrange(QUEUE_KEY, 0, limit - 1)
+    pipe.ltrim(QUEUE_KEY, limit, -1)
+    pipe.llen(QUEUE_KEY)
+    _, items, _, remaining = pipe.execute()
+    return [json.loads(item) for item in items], remaining
@@ -0,0 +1,176 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+Match = namedtuple('Match', ['citizen_id', 'score'])
+
+
+def normalize(embeddings):
+    """float32 copy with every row scaled to unit length (a 1-D vector stays 1-D)."""
+    embeddings = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    embeddings /= norms
+    return embeddings
+
+
+def check_k(k):
+    """Raises ValueError unless k (the number of candidates wanted) is a positive integer."""
+    if isinstance(k, bool) or not isinstance(k, (int, np.integer)) or k < 1:
+        raise ValueError(f"k must be a positive integer, got {k!r}")
+
+
+class FaceMatchingEngine:
+    """
+    Exact 1:N face matcher.
+
+    The enrolled embeddings live L2-normalized in one contiguous float32
+    matrix, so cosine similarity against the whole gallery is a single
+    matrix-vector product (BLAS), and a batch of probes is a single
+    matrix-matrix product. One embedding per citizen: enrolling again
+    replaces it.
+
+    Rows are appended into spare capacity (doubling when full), and removed
+    rows are zeroed and skipped until compact() runs. Searches work on a
+    snapshot taken under the lock, so they never block enrollments.
+    """
+
+    def __init__(self, dim, capacity=1024, chunk_rows=65536):
+        self.dim = dim
+        self.chunk_rows = chunk_rows
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._ids = []  # row -> citizen_id, None for removed rows
+        self._rows = {}  # citizen_id -> row
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, citizen_id):
+        return citizen_id in self._rows
+
+    def citizen_ids(self):
+        with self._lock:
+            return list(self._rows)
+
+    def _reserve(self, extra):
+        needed = len(self._ids) + extra
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors))
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:len(self._ids)] = self._vectors[:len(self._ids)]
+            self._vectors = grown
+
+    def add(self, citizen_id, embedding):
+        self.add_many([citizen_id], [embedding])
+
+    def add_many(self, citizen_ids, embeddings):
+        embeddings = normalize(embeddings).reshape(-1, self.dim)
+        if len(embeddings) != len(citizen_ids):
+            raise ValueError("citizen_ids and embeddings differ in length")
+        with self._lock:
+            new = []
+            for citizen_id, embedding in zip(citizen_ids, embeddings):
+                row = self._rows.get(citizen_id)
+                if row is not None:
+                    self._vectors[row] = embedding
+                else:
+                    new.append((citizen_id, embedding))
+            if new:
+                self._reserve(len(new))
+                start = len(self._ids)
+                self._vectors[start:start + len(new)] = np.stack([embedding for _, embedding in new])
+                for offset, (citizen_id, _) in enumerate(new):
+                    self._rows[citizen_id] = start + offset
+                    self._ids.append(citizen_id)
+
+    def remove(self, citizen_id):
+        with self._lock:
+            row = self._rows.pop(citizen_id, None)
+            if row is None:
+                return False
+            self._vectors[row] = 0.0
+            self._ids[row] = None
+            return True
+
+    def compact(self):
+        """Drops removed rows. Worth calling once they pile up."""
+        with self._lock:
+            keep = [row for row, citizen_id in enumerate(self._ids) if citizen_id is not None]
+            if len(keep) == len(self._ids):
+                return
+            vectors = np.zeros((max(len(keep), 1024), self.dim), dtype=np.float32)
+            vectors[:len(keep)] = self._vectors[keep]
+            self._ids = [self._ids[row] for row in keep]
+            self._rows = {citizen_id: row for row, citizen_id in enumerate(self._ids)}
+            self._vectors = vectors
+
+    def _snapshot(self):
+        with self._lock:
+            size = len(self._ids)
+            return self._vectors[:size], list(self._ids)
+
+    def get(self, citizen_id):
+        """The stored (normalized) embedding, or None."""
+        with self._lock:
+            row = self._rows.get(citizen_id)
+            return None if row is None else self._vectors[row].copy()
+
+    def verify(self, citizen_id, probe):
+        """1:1 cosine similarity against one citizen's template, or None if not enrolled."""
+        template = self.get(citizen_id)
+        if template is None:
+            return None
+        return float(template @ normalize(probe))
+
+    def search(self, probe, k=10, threshold=None, exclude=None):
+        """
+        The k most similar enrolled citizens (list of Match, best first),
+        keeping only scores >= threshold. `exclude` skips one citizen,
+        e.g. the one being re-enrolled.
+        """
+        return self.search_many([probe], k, threshold, exclude)[0]
+
+    def search_many(self, probes, k=10, threshold=None, exclude=None):
+        """search() for a batch of probes, scored as one matrix-matrix product per gallery chunk."""
+        check_k(k)
+        probes = normalize(probes).reshape(-1, self.dim)
+        vectors, ids = self._snapshot()
+        if not len(vectors):
+            return [[] for _ in probes]
+
+        # Running top-(k+1) per probe across chunks, bounding the score matrix
+        # to len(probes) x chunk_rows; +1 leaves room for a removed/excluded hit
+        keep = k + 1
+        best_scores = np.full((len(probes), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(probes), 0), dtype=np.intp)
+        for start in range(0, len(vectors), self.chunk_rows):
+            scores = probes @ vectors[start:start + self.chunk_rows].T
+            if scores.shape[1] > keep:
+                part = np.argpartition(scores, -keep, axis=1)[:, -keep:]
+                scores = np.take_along_axis(scores, part, axis=1)
+                rows = part + start
+            else:
+                rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > keep:
+                part = np.argpartition(best_scores, -keep, axis=1)[:, -keep:]
+                best_scores = np.take_along_axis(best_scores, part, axis=1)
+                best_rows = np.take_along_axis(best_rows, part, axis=1)
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            matches = []
+            for i in np.argsort(scores)[::-1]:
+                citizen_id = ids[rows[i]]
+                if citizen_id is None or citizen_id == exclude:
+                    continue
+                if threshold is not None and scores[i] < threshold:
+                    break
+                matches.append(Match(citizen_id, float(scores[i])))
+                if len(matches) == k:
+                    break
+            results.append(matches)
+        return results
@@ -0,0 +1,404 @@
+"""
+On-disk face gallery shared between worker processes through mmap.
+
+A gallery is two files, plus a lock file:
+
+  <path>         base file, written once by write_gallery() / compact():
+                   header (HEADER, 96 bytes)
+                   scales    float32[dim]        int8 only: per-dimension scale
+                   vectors   float32|int8[count, dim], 64-byte aligned
+                   offsets   uint64[count + 1]   citizen_id byte ranges in `blob`
+                   order     uint32[count]       rows sorted by citizen_id
+                   blob      utf-8 citizen_ids, concatenated
+  <path>.log     append segment for enrollments made since the base was
+                 written: LOG_HEADER, then records
+                   op u8 (1 add, 0 remove), id length u16, id, float32[dim] (add only)
+  <path>.lock    empty; flocked while a missing gallery is being written
+
+Workers map the base file read-only, so every worker on a host shares
+one copy in the page cache and opening takes milliseconds whatever the
+gallery size. The log is small and is read into memory; refresh() picks
+up records other processes appended. compact() folds the log into a new
+base file (next generation) and starts an empty log.
+"""
+import contextlib
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from .engine import FaceMatchingEngine, Match, check_k, normalize
+from .quantized import quantize_int8
+
+MAGIC = b'CZGALRY1'
+LOG_MAGIC = b'CZGALOG1'
+VERSION = 1
+
+FLOAT32 = 0
+INT8 = 1
+DTYPES = {FLOAT32: np.float32, INT8: np.int8}
+
+# magic, version, dtype, dim, count, generation, scales/vectors/offsets/order/blob offsets
+HEADER = struct.Struct('<8sHHIQQQQQQQ')
+HEADER_SIZE = 96
+LOG_HEADER = struct.Struct('<8sQ')  # magic, base generation
+RECORD = struct.Struct('<BH')       # op, id length
+
+OP_REMOVE = 0
+OP_ADD = 1
+
+
+class GalleryFormatError(ValueError):
+    """Raised when a gallery file is truncated, corrupt or of another version."""
+
+
+def _align(offset, alignment=64):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def write_gallery(path, citizen_ids, embeddings, dtype=FLOAT32, generation=0):
+    """
+    Writes a base gallery file atomically and starts an empty log for it.
+    `embeddings` are normalized here; with dtype=INT8 they are quantized.
+    """
+    dim = np.asarray(embeddings).shape[-1]
+    vectors = normalize(embeddings).reshape(-1, dim)
+    if len(vectors) != len(citizen_ids):
+        raise ValueError("citizen_ids and embeddings differ in length")
+    if dtype == INT8:
+        vectors, scales = quantize_int8(vectors)
+    else:
+        scales = np.zeros(0, dtype=np.float32)
+
+    encoded = [citizen_id.encode('utf-8') for citizen_id in citizen_ids]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.uint32)
+
+    scales_offset = HEADER_SIZE
+    vectors_offset = _align(scales_offset + scales.nbytes)
+    offsets_offset = _align(vectors_offset + vectors.nbytes)
+    order_offset = offsets_offset + offsets.nbytes
+    blob_offset = order_offset + order.nbytes
+    header = HEADER.pack(MAGIC, VERSION, dtype, dim, len(vectors), generation,
+                         scales_offset, vectors_offset, offsets_offset, order_offset, blob_offset)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(scales.tobytes())
+        f.seek(vectors_offset)
+        f.write(np.ascontiguousarray(vectors).tobytes())
+        f.seek(offsets_offset)
+        f.write(offsets.tobytes())
+        f.write(order.tobytes())
+        f.write(b''.join(encoded))
+        f.flush()
+        os.fsync(f.fileno())
+    _write_log(path + '.log', generation)
+    os.replace(tmp, path)
+
+
+@contextlib.contextmanager
+def creation_lock(path):
+    """
+    Exclusive flock on <path>.lock, held by processes that check for and
+    write a missing gallery, so a second writer can't replace the file (and
+    empty its log) after the first has started serving enrollments.
+    """
+    with open(path + '.lock', 'ab') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _write_log(path, generation):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(LOG_HEADER.pack(LOG_MAGIC, generation))
+    os.replace(tmp, path)
+
+
+class _Base:
+    """Read-only view of a base gallery file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            fields = HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            raise GalleryFormatError(f"{path}: truncated header")
+        (magic, version, dtype, self.dim, self.count, self.generation,
+         scales_offset, vectors_offset, offsets_offset, order_offset, self._blob_offset) = fields
+        if magic != MAGIC or version != VERSION or dtype not in DTYPES:
+            raise GalleryFormatError(f"{path}: not a version {VERSION} gallery file")
+        self.dtype = dtype
+        if len(self._mm) < self._blob_offset:
+            raise GalleryFormatError(f"{path}: truncated")
+
+        self.scales = np.frombuffer(self._mm, np.float32, self.dim if dtype == INT8 else 0, scales_offset)
+        self.vectors = np.frombuffer(self._mm, DTYPES[dtype], self.count * self.dim, vectors_offset) \
+            .reshape(self.count, self.dim)
+        self._offsets = np.frombuffer(self._mm, np.uint64, self.count + 1, offsets_offset)
+        self._order = np.frombuffer(self._mm, np.uint32, self.count, order_offset)
+
+    def _id_bytes(self, row):
+        start = self._blob_offset + int(self._offsets[row])
+        return self._mm[start:self._blob_offset + int(self._offsets[row + 1])]
+
+    def citizen_id(self, row):
+        return self._id_bytes(row).decode('utf-8')
+
+    def row(self, citizen_id):
+        """Binary search of the sorted order table; None if absent."""
+        key = citizen_id.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id_bytes(int(self._order[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._id_bytes(int(self._order[lo])) == key:
+            return int(self._order[lo])
+        return None
+
+    def take(self, rows):
+        """float32 copies of the given rows, dequantized for int8 galleries."""
+        block = self.vectors[rows]
+        return block * self.scales if self.dtype == INT8 else block
+
+
+
+class MappedGallery:
+    """
+    Face gallery backed by a base file mapped read-only plus an append log,
+    with the same interface as FaceMatchingEngine.
+
+    add()/remove() append to the log under an exclusive flock, so several
+    processes can enroll concurrently. Base rows that were removed or
+    re-enrolled since the base was written are masked out of searches;
+    log enrollments live in a small in-memory FaceMatchingEngine.
+    """
+
+    def __init__(self, path, chunk_rows=16384):
+        self.path = path
+        self.log_path = path + '.log'
+        self.chunk_rows = chunk_rows
+        self._lock = threading.RLock()
+        self._base = None
+        self._open()
+
+    def _open(self):
+        # The old base is not closed: a search in another thread may still
+        # be scanning it, and its map is released with the last reference
+        self._base = _Base(self.path)
+        self.dim = self._base.dim
+        self._recent = FaceMatchingEngine(self.dim)
+        self._dead = set()  # base rows superseded by the log
+        self._log_inode = None
+        self._log_pos = 0
+        self._read_log()
+
+    def _read_log(self):
+        """Applies log records appended since the last read."""
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._log_inode:
+                header = f.read(LOG_HEADER.size)
+                if len(header) < LOG_HEADER.size:
+                    return
+                magic, generation = LOG_HEADER.unpack(header)
+                if magic != LOG_MAGIC or generation != self._base.generation:
+                    return  # compaction in progress; the matching log appears shortly
+                self._log_inode = inode
+                self._log_pos = LOG_HEADER.size
+            f.seek(self._log_pos)
+            data = f.read()
+
+        position, vector_size = 0, self.dim * 4
+        while position + RECORD.size <= len(data):
+            op, length = RECORD.unpack_from(data, position)
+            end = position + RECORD.size + length + (vector_size if op == OP_ADD else 0)
+            if end > len(data):
+                break  # partially written record
+            citizen_id = data[position + RECORD.size:position + RECORD.size + length].decode('utf-8')
+            row = self._base.row(citizen_id)
+            if row is not None:
+                self._dead.add(row)
+            if op == OP_ADD:
+                self._recent.add(citizen_id, np.frombuffer(data, np.float32, self.dim, end - vector_size))
+            else:
+                self._recent.remove(citizen_id)
+            position = end
+        self._log_pos += position
+
+    def refresh(self):
+        """Picks up compactions and log records written by other processes."""
+        with self._lock:
+            try:
+                inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                return
+            if inode != self._base.inode:
+                self._open()
+            else:
+                self._read_log()
+
+    @contextlib.contextmanager
+    def _locked_log(self):
+        """The log opened for appending under an exclusive flock, retrying if compaction replaced it."""
+        while True:
+            f = open(self.log_path, 'ab')
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(self.log_path).st_ino:
+                    yield f
+                    return
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+                f.close()
+
+    def _append(self, records):
+        with self._locked_log() as f:
+            f.write(b''.join(records))
+            f.flush()
+
+    def add(self, citizen_id, embedding):
+        self.add_many([citizen_id], [embedding])
+
+    def add_many(self, citizen_ids, embeddings):
+        embeddings = normalize(embeddings).reshape(-1, self.dim)
+        if len(embeddings) != len(citizen_ids):
+            raise ValueError("citizen_ids and embeddings differ in length")
+        records = []
+        for citizen_id, embedding in zip(citizen_ids, embeddings):
+            encoded = citizen_id.encode('utf-8')
+            records.append(RECORD.pack(OP_ADD, len(encoded)) + encoded + embedding.tobytes())
+        with self._lock:
+            self._append(records)
+            self.refresh()
+
+    def remove(self, citizen_id):
+        with self._lock:
+            if citizen_id not in self:
+                return False
+            encoded = citizen_id.encode('utf-8')
+            self._append([RECORD.pack(OP_REMOVE, len(encoded)) + encoded])
+            self.refresh()
+            return True
+
+    def _base_row(self, citizen_id):
+        row = self._base.row(citizen_id)
+        return None if row is None or row in self._dead else row
+
+    def __len__(self):
+        return self._base.count - len(self._dead) + len(self._recent)
+
+    def __contains__(self, citizen_id):
+        return citizen_id in self._recent or self._base_row(citizen_id) is not None
+
+    def citizen_ids(self):
+        with self._lock:
+            ids = [self._base.citizen_id(row) for row in range(self._base.count) if row not in self._dead]
+            return ids + [c for c in self._recent._ids if c is not None]
+
+    def get(self, citizen_id):
+        with self._lock:
+            embedding = self._recent.get(citizen_id)
+            if embedding is not None:
+                return embedding
+            row = self._base_row(citizen_id)
+            return None if row is None else normalize(self._base.take(row))
+
+    def verify(self, citizen_id, probe):
+        template = self.get(citizen_id)
+        if template is None:
+            return None
+        return float(template @ normalize(probe))
+
+    def search(self, probe, k=10, threshold=None, exclude=None):
+        return self.search_many([probe], k, threshold, exclude)[0]
+
+    def search_many(self, probes, k=10, threshold=None, exclude=None):
+        """Scans the mapped base in chunks, then merges in the log's enrollments."""
+        check_k(k)
+        probes = normalize(probes).reshape(-1, self.dim)
+        self.refresh()
+        with self._lock:
+            base, dead, recent = self._base, np.fromiter(self._dead, np.intp), self._recent
+
+        # int8 rows are scored as (probe * scales) . codes, skipping dequantization
+        scaled = probes * base.scales if base.dtype == INT8 else probes
+        keep = k + 1
+        best_scores = np.full((len(probes), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(probes), 0), dtype=np.intp)
+        for start in range(0, base.count, self.chunk_rows):
+            stop = min(start + self.chunk_rows, base.count)
+            scores = scaled @ base.vectors[start:stop].T.astype(np.float32, copy=False)
+            masked = dead[(dead >= start) & (dead < stop)] - start
+            if len(masked):
+                scores[:, masked] = -np.inf
+            if scores.shape[1] > keep:
+                part = np.argpartition(scores, -keep, axis=1)[:, -keep:]
+                scores = np.take_along_axis(scores, part, axis=1)
+                rows = part + start
+            else:
+                rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > keep:
+                part = np.argpartition(best_scores, -keep, axis=1)[:, -keep:]
+                best_scores = np.take_along_axis(best_scores, part, axis=1)
+                best_rows = np.take_along_axis(best_rows, part, axis=1)
+
+        results = []
+        for scores, rows, extra in zip(best_scores, best_rows, recent.search_many(probes, k, threshold, exclude)):
+            matches = list(extra)
+            for score, row in zip(scores, rows):
+                if score == -np.inf or (threshold is not None and score < threshold):
+                    continue
+                citizen_id = base.citizen_id(int(row))
+                if citizen_id != exclude:
+                    matches.append(Match(citizen_id, float(score)))
+            matches.sort(key=lambda m: m.score, reverse=True)
+            results.append(matches[:k])
+        return results
+
+    def compact(self, dtype=None):
+        """
+        Folds the log into a new base file. Other processes keep reading
+        their mapping of the old file until their next refresh().
+        """
+        with self._lock, self._locked_log():
+            self.refresh()
+            base = self._base
+            live = np.setdiff1d(np.arange(base.count), np.fromiter(self._dead, np.intp))
+            citizen_ids = [base.citizen_id(int(row)) for row in live]
+            vectors = [base.take(live[start:start + self.chunk_rows]) for start in range(0, len(live), self.chunk_rows)]
+            recent_vectors, recent_ids = self._recent._snapshot()
+            recent_live = [row for row, citizen_id in enumerate(recent_ids) if citizen_id is not None]
+            citizen_ids += [recent_ids[row] for row in recent_live]
+            vectors.append(recent_vectors[recent_live])
+            write_gallery(self.path, citizen_ids, np.concatenate(vectors),
+                          dtype=base.dtype if dtype is None else dtype, generation=base.generation + 1)
+            self._open()
+
+    @property
+    def log_size(self):
+        """Entries in the append segment; compact() when it grows large."""
+        return len(self._recent) + len(self._dead)
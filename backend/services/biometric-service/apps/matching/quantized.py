@@ -0,0 +1,290 @@
+import threading
+
+import numpy as np
+
+from .engine import Match, check_k, normalize
+
+INT8 = 'int8'
+PQ = 'pq'
+
+
+def quantize_int8(vectors, scales=None):
+    """
+    Per-dimension symmetric int8 quantization: (codes, scales) with
+    vectors ~= codes * scales. Scales are fitted to `vectors` unless given.
+    """
+    if scales is None:
+        scales = np.abs(vectors).max(axis=0) / 127.0 if len(vectors) else np.ones(vectors.shape[1], np.float32)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def kmeans(vectors, k, iterations=15, seed=0):
+    """Plain (Euclidean) k-means; returns the (k, dim) centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        # |v - c|^2 minus the per-row constant |v|^2
+        distances = vectors @ (-2 * centroids.T)
+        distances += (centroids ** 2).sum(axis=1)
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.stack([np.bincount(assignment, vectors[:, d], minlength=k) for d in range(vectors.shape[1])], axis=1)
+        empty = counts == 0
+        centroids[~empty] = (sums[~empty] / counts[~empty, None]).astype(np.float32)
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+    return centroids
+
+
+class ProductQuantizer:
+    """
+    Splits a vector into `m` sub-vectors and stores each as the index of its
+    nearest centroid in a 256-entry codebook: one byte per sub-vector.
+    """
+
+    def __init__(self, dim, m=64, ksub=256):
+        if dim % m:
+            raise ValueError(f"dim {dim} is not divisible by m={m}")
+        self.dim = dim
+        self.m = m
+        self.ksub = ksub
+        self.dsub = dim // m
+        self.codebooks = None  # (m, ksub, dsub)
+
+    def train(self, vectors, iterations=15, max_training_points=64, seed=0):
+        """Fits the codebooks on at most ksub * max_training_points vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        limit = self.ksub * max_training_points
+        if len(vectors) > limit:
+            vectors = vectors[np.random.default_rng(seed).choice(len(vectors), limit, replace=False)]
+        if len(vectors) < self.ksub:
+            raise ValueError(f"Need at least {self.ksub} training vectors, got {len(vectors)}")
+        self.codebooks = np.stack([
+            kmeans(np.ascontiguousarray(vectors[:, j * self.dsub:(j + 1) * self.dsub]), self.ksub, iterations, seed + j)
+            for j in range(self.m)
+        ])
+
+    def encode(self, vectors):
+        """(n, m) uint8 codes."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for j, codebook in enumerate(self.codebooks):
+            squared, scaled = (codebook ** 2).sum(axis=1), -2 * codebook.T
+            for start in range(0, len(vectors), 4096):
+                distances = vectors[start:start + 4096, j * self.dsub:(j + 1) * self.dsub] @ scaled
+                distances += squared
+                codes[start:start + 4096, j] = distances.argmin(axis=1)
+        return codes
+
+    def decode(self, codes):
+        """(n, dim) reconstruction from column-major (m, n) codes."""
+        return np.concatenate([self.codebooks[j][codes[j]] for j in range(self.m)], axis=1)
+
+    def tables(self, probes):
+        """ADC lookup tables: (n_probes, m, ksub) inner products of each probe sub-vector with each centroid."""
+        sub = probes.reshape(len(probes), self.m, 1, self.dsub)
+        return (sub * self.codebooks[None]).sum(axis=-1)
+
+
+class QuantizedFaceEngine:
+    """
+    1:N face matcher over compressed embeddings, with the same interface as
+    FaceMatchingEngine.
+
+    INT8 keeps one byte per dimension with a per-dimension scale (4x smaller
+    than float32); a probe is scored as (probe * scales) . codes. PQ keeps
+    `m` bytes per embedding (16x smaller for 512 dims at m=128, 64x at m=32)
+    and scores by asymmetric distance: the probe stays float, each stored
+    vector is a sum of m lookups into per-probe tables.
+
+    Quantized scores only shortlist: the best `rerank` candidates are
+    re-scored exactly with float embeddings from `fetch(citizen_ids) ->
+    {citizen_id: embedding}` (e.g. the template table or a float32 gallery
+    file, which need not be resident), so the returned scores are exact.
+    Without `fetch` the quantized scores are returned as is.
+
+    Codes are stored column-major (one row per dimension or sub-quantizer),
+    so each ADC lookup pass and each int8 chunk conversion reads contiguous
+    memory. train() fits the scales or codebooks on a sample and must run
+    before the first add.
+    """
+
+    def __init__(self, dim, mode=INT8, m=64, rerank=50, fetch=None, capacity=1024, chunk_rows=4096):
+        if mode not in (INT8, PQ):
+            raise ValueError(f"Unknown quantization mode {mode!r}")
+        self.dim = dim
+        self.mode = mode
+        self.rerank = rerank
+        self.fetch = fetch
+        self.chunk_rows = chunk_rows
+        self.scales = None
+        self.pq = ProductQuantizer(dim, m) if mode == PQ else None
+        width = dim if mode == INT8 else m
+        self._codes = np.zeros((width, capacity), dtype=np.int8 if mode == INT8 else np.uint8)
+        self._ids = []  # row -> citizen_id, None for removed rows
+        self._rows = {}  # citizen_id -> row
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, citizen_id):
+        return citizen_id in self._rows
+
+    def citizen_ids(self):
+        with self._lock:
+            return list(self._rows)
+
+    @property
+    def is_trained(self):
+        return self.scales is not None if self.mode == INT8 else self.pq.codebooks is not None
+
+    @property
+    def nbytes(self):
+        """Memory held by the codes of live rows."""
+        return len(self._ids) * self._codes.shape[0]
+
+    def train(self, vectors):
+        vectors = normalize(vectors).reshape(-1, self.dim)
+        if self.mode == INT8:
+            _, self.scales = quantize_int8(vectors)
+        else:
+            self.pq.train(vectors)
+
+    def _encode(self, vectors):
+        if self.mode == INT8:
+            return quantize_int8(vectors, self.scales)[0]
+        return self.pq.encode(vectors)
+
+    def _decode(self, codes):
+        """(n, dim) float32 from column-major codes."""
+        if self.mode == INT8:
+            return codes.T * self.scales
+        return self.pq.decode(codes)
+
+    def add(self, citizen_id, embedding):
+        self.add_many([citizen_id], [embedding])
+
+    def add_many(self, citizen_ids, embeddings):
+        if not self.is_trained:
+            raise ValueError("QuantizedFaceEngine must be trained before adding vectors")
+        embeddings = normalize(embeddings).reshape(-1, self.dim)
+        if len(embeddings) != len(citizen_ids):
+            raise ValueError("citizen_ids and embeddings differ in length")
+        codes = self._encode(embeddings)
+        with self._lock:
+            new = []
+            for citizen_id, code in zip(citizen_ids, codes):
+                row = self._rows.get(citizen_id)
+                if row is not None:
+                    self._codes[:, row] = code
+                else:
+                    new.append((citizen_id, code))
+            if new:
+                needed = len(self._ids) + len(new)
+                if needed > self._codes.shape[1]:
+                    grown = np.zeros((self._codes.shape[0], max(needed, 2 * self._codes.shape[1])), dtype=self._codes.dtype)
+                    grown[:, :len(self._ids)] = self._codes[:, :len(self._ids)]
+                    self._codes = grown
+                start = len(self._ids)
+                self._codes[:, start:needed] = np.stack([code for _, code in new], axis=1)
+                for offset, (citizen_id, _) in enumerate(new):
+                    self._rows[citizen_id] = start + offset
+                    self._ids.append(citizen_id)
+
+    def remove(self, citizen_id):
+        with self._lock:
+            row = self._rows.pop(citizen_id, None)
+            if row is None:
+                return False
+            self._ids[row] = None
+            return True
+
+    def get(self, citizen_id):
+        """The exact embedding from `fetch` if available, else the dequantized one."""
+        if self.fetch is not None:
+            embedding = self.fetch([citizen_id]).get(citizen_id)
+            if embedding is not None:
+                return normalize(embedding)
+        with self._lock:
+            row = self._rows.get(citizen_id)
+            return None if row is None else normalize(self._decode(self._codes[:, row:row + 1])[0])
+
+    def verify(self, citizen_id, probe):
+        template = self.get(citizen_id)
+        if template is None:
+            return None
+        return float(template @ normalize(probe))
+
+    def search(self, probe, k=10, threshold=None, exclude=None):
+        return self.search_many([probe], k, threshold, exclude)[0]
+
+    def _scores(self, probes, codes, tables, buffer):
+        """Quantized scores of `probes` against a (width, rows) chunk of codes."""
+        if self.mode == INT8:
+            chunk = buffer[:, :codes.shape[1]]
+            np.copyto(chunk, codes)
+            return (probes * self.scales) @ chunk
+        if tables is not None:
+            # ADC: each stored vector scores as the sum of m table lookups
+            scores = np.zeros((1, codes.shape[1]), dtype=np.float32)
+            for table, column in zip(tables[0], codes):
+                scores[0] += table.take(column)
+            return scores
+        # For a batch, decoding the chunk once and multiplying gives the same
+        # scores as ADC with one BLAS call instead of per-probe lookups
+        return probes @ self.pq.decode(codes).T
+
+    def search_many(self, probes, k=10, threshold=None, exclude=None):
+        """Shortlists max(rerank, k) candidates per probe by quantized score, then re-ranks them exactly."""
+        check_k(k)
+        probes = normalize(probes).reshape(-1, self.dim)
+        with self._lock:
+            size = len(self._ids)
+            codes, ids = self._codes[:, :size], list(self._ids)
+        if not size:
+            return [[] for _ in probes]
+        tables = self.pq.tables(probes) if self.mode == PQ and len(probes) == 1 else None
+        buffer = np.empty((self.dim, self.chunk_rows), dtype=np.float32) if self.mode == INT8 else None
+
+        keep = max(self.rerank, k) + 1
+        best_scores = np.full((len(probes), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(probes), 0), dtype=np.intp)
+        for start in range(0, size, self.chunk_rows):
+            scores = self._scores(probes, codes[:, start:start + self.chunk_rows], tables, buffer)
+            if scores.shape[1] > keep:
+                part = np.argpartition(scores, -keep, axis=1)[:, -keep:]
+                scores = np.take_along_axis(scores, part, axis=1)
+                rows = part + start
+            else:
+                rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > keep:
+                part = np.argpartition(best_scores, -keep, axis=1)[:, -keep:]
+                best_scores = np.take_along_axis(best_scores, part, axis=1)
+                best_rows = np.take_along_axis(best_rows, part, axis=1)
+
+        shortlists = [
+            [(ids[row], float(score)) for score, row in zip(scores, rows)
+             if ids[row] is not None and ids[row] != exclude]
+            for scores, rows in zip(best_scores, best_rows)
+        ]
+        if self.fetch is not None:
+            exact = self.fetch(list({citizen_id for shortlist in shortlists for citizen_id, _ in shortlist}))
+            shortlists = [
+                [(citizen_id, float(normalize(exact[citizen_id]) @ probe) if citizen_id in exact else score)
+                 for citizen_id, score in shortlist]
+                for shortlist, probe in zip(shortlists, probes)
+            ]
+
+        results = []
+        for shortlist in shortlists:
+            shortlist.sort(key=lambda candidate: candidate[1], reverse=True)
+            results.append([
+                Match(citizen_id, score) for citizen_id, score in shortlist[:k]
+                if threshold is None or score >= threshold
+            ])
+        return results
@@ -1,33 +1,194 @@
-from celery import shared_task
+from celery import shared_task, states
+from django.conf import settings
 import time
 import random
 
-@shared_task
-def match_face(citizen_id, image_path):
-    """
-    Simulates matching a captured face against the stored biometric template.
-    In a real system, this would:
-    1. Load the stored template for citizen_id.
-    2. Generate an embedding for image_path.
-    3. Calculate cosine similarity.
-    """
-    # Simulate processing delay (GPU inference)
-    time.sleep(2)
-    
-    # Simulate match score (0.0 to 1.0)
-    # For demo purposes, 90% chance of success if ID is valid-ish
-    match_score = random.uniform(0.7, 0.99) 
-    
-    # Threshold usually 0.75
-    is_match = match_score > 0.75
-    
+import numpy as np
+
+from apps.face_recognition.ml.deepface_wrapper import (
+    FaceModelUnavailable, NoFaceDetected, extract_embedding, extract_embeddings,
+)
+from apps.templates.services import TemplateService, get_face_gallery
+from . import batching
+from .engine import check_k, normalize
+
+
+def _probe(image_path=None, embedding=None):
+    return embedding if embedding is not None else extract_embedding(image_path)
+
+
+def _match_result(citizen_id, match_score, threshold):
+    if match_score is None:
+        return {'citizen_id': citizen_id, 'status': 'NOT_ENROLLED'}
     return {
         'citizen_id': citizen_id,
         'match_score': match_score,
-        'is_match': is_match,
+        'is_match': match_score >= threshold,
         'status': 'COMPLETED'
     }
 
+
+def _search_result(matches):
+    return {
+        'candidates': [m._asdict() for m in matches],
+        'status': 'COMPLETED'
+    }
+
+
+def _enroll_result(citizen_id, result):
+    return {
+        'citizen_id': citizen_id,
+        'enrolled': result['status'] == 'enrolled',
+        'duplicates': result['matches'],
+        'status': 'COMPLETED'
+    }
+
+
+@shared_task
+def match_face(citizen_id, image_path=None, embedding=None, threshold=None):
+    """
+    1:1 verification: cosine similarity between the captured face (an image
+    path, or an embedding computed upstream) and the citizen's enrolled template.
+    """
+    threshold = settings.FACE_MATCH_THRESHOLD if threshold is None else threshold
+    return _match_result(citizen_id, get_face_gallery().verify(citizen_id, _probe(image_path, embedding)), threshold)
+
+@shared_task
+def search_face(image_path=None, embedding=None, k=None, threshold=None):
+    """1:N search of the whole gallery; returns the best candidates above the threshold."""
+    threshold = settings.FACE_MATCH_THRESHOLD if threshold is None else threshold
+    matches = get_face_gallery().search(_probe(image_path, embedding), k=k or settings.FACE_SEARCH_TOP_K, threshold=threshold)
+    return _search_result(matches)
+
+@shared_task
+def enroll_face(citizen_id, image_path=None, embedding=None, check_duplicates=True):
+    """Enrollment with deduplication against every citizen already enrolled."""
+    result = TemplateService.enroll(citizen_id, _probe(image_path, embedding), check_duplicates=check_duplicates)
+    return _enroll_result(citizen_id, result)
+
+def _batch_embeddings(probes):
+    """
+    Embeddings for a batch of queued probes, extracting every image path
+    in one extract_embeddings() call (one model invocation per image).
+    Returns (embeddings, errors) keyed by task_id; an image without a face
+    fails only its own probe.
+    """
+    embeddings, errors = {}, {}
+    images = [p for p in probes if p.get('embedding') is None]
+    for p in probes:
+        if p.get('embedding') is not None:
+            embeddings[p['task_id']] = p['embedding']
+    try:
+        extracted = extract_embeddings([p['image_path'] for p in images]) if images else []
+        embeddings.update((p['task_id'], e) for p, e in zip(images, extracted))
+    except NoFaceDetected:
+        for p in images:
+            try:
+                embeddings[p['task_id']] = extract_embedding(p['image_path'])
+            except NoFaceDetected as e:
+                errors[p['task_id']] = e
+    except FaceModelUnavailable as e:
+        errors.update((p['task_id'], e) for p in images)
+    return embeddings, errors
+
+@shared_task
+def process_probe_batch():
+    """
+    Drains up to FACE_BATCH_SIZE probes queued by the views (see
+    apps.matching.batching) and stores each result under its own task ID.
+    """
+    probes, remaining = batching.take()
+    if remaining:
+        process_probe_batch.delay()
+    if not probes:
+        return {'processed': 0}
+
+    backend = process_probe_batch.backend
+    done = set()
+
+    def store(probe, result, state=states.SUCCESS):
+        backend.store_result(probe['task_id'], result, state)
+        done.add(probe['task_id'])
+
+    try:
+        _score_batch(probes, store)
+    except Exception as e:
+        # Don't leave the rest of the batch pending forever
+        for probe in probes:
+            if probe['task_id'] not in done:
+                store(probe, e, states.FAILURE)
+        raise
+    return {'processed': len(probes)}
+
+def _threshold(probe):
+    return settings.FACE_MATCH_THRESHOLD if probe.get('threshold') is None else probe['threshold']
+
+def _vector(embedding):
+    """The probe embedding as a unit float32 vector; ValueError/TypeError if it isn't one."""
+    vector = normalize(embedding)
+    if vector.shape != (settings.FACE_EMBEDDING_DIM,) or not np.isfinite(vector).all():
+        raise ValueError(f"Expected {settings.FACE_EMBEDDING_DIM} finite numbers")
+    return vector
+
+def _score_batch(probes, store):
+    """Scores the batch; anything wrong with one probe fails only that probe."""
+    embeddings, errors = _batch_embeddings(probes)
+    for probe in probes:
+        task_id = probe['task_id']
+        if task_id in embeddings:
+            try:
+                embeddings[task_id] = _vector(embeddings[task_id])
+            except (TypeError, ValueError) as e:
+                errors[task_id] = e
+        if task_id in errors:
+            store(probe, errors[task_id], states.FAILURE)
+    probes = [p for p in probes if p['task_id'] not in errors]
+    gallery = get_face_gallery()
+
+    searches, ks = [], []
+    for probe in probes:
+        if probe['kind'] == batching.SEARCH:
+            try:
+                k = int(probe.get('k') or settings.FACE_SEARCH_TOP_K)
+                check_k(k)
+            except (TypeError, ValueError) as e:
+                store(probe, e, states.FAILURE)
+                continue
+            searches.append(probe)
+            ks.append(k)
+    if searches:
+        # One gallery scan for every search in the batch, at the largest k asked for
+        try:
+            found = gallery.search_many([embeddings[p['task_id']] for p in searches], k=max(ks))
+        except Exception:
+            found = [None] * len(searches)  # retried one by one below
+        for probe, k, matches in zip(searches, ks, found):
+            try:
+                if matches is None:
+                    matches = gallery.search(embeddings[probe['task_id']], k=k)
+                threshold = _threshold(probe)
+                result = _search_result([m for m in matches[:k] if m.score >= threshold])
+            except Exception as e:
+                store(probe, e, states.FAILURE)
+                continue
+            store(probe, result)
+
+    for probe in probes:
+        try:
+            if probe['kind'] == batching.MATCH:
+                score = gallery.verify(probe['citizen_id'], embeddings[probe['task_id']])
+                result = _match_result(probe['citizen_id'], score, _threshold(probe))
+            elif probe['kind'] == batching.ENROLL:
+                # In order, so two enrollments of one face in a batch still collide
+                result = _enroll_result(probe['citizen_id'], TemplateService.enroll(
+                    probe['citizen_id'], embeddings[probe['task_id']], check_duplicates=probe.get('check_duplicates', True)))
+            else:
+                continue
+        except Exception as e:
+            store(probe, e, states.FAILURE)
+            continue
+        store(probe, result)
+
 @shared_task
 def verify_liveness(session_id, video_path):
     """
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import MatchFaceView, LivenessView, TaskStatusView
+from .views import MatchFaceView, SearchFaceView, EnrollFaceView, LivenessView, TaskStatusView
 
 urlpatterns = [
     path('match-face/', MatchFaceView.as_view(), name='match_face'),
+    path('search-face/', SearchFaceView.as_view(), name='search_face'),
+    path('enroll-face/', EnrollFaceView.as_view(), name='enroll_face'),
     path('liveness/', LivenessView.as_view(), name='liveness'),
     path('tasks/<str:task_id>/', TaskStatusView.as_view(), name='task_status'),
 ]
@@ -1,28 +1,107 @@
+import math
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from celery.result import AsyncResult
-from .tasks import match_face, verify_liveness
+from django.conf import settings
+from . import batching
+from .tasks import match_face, search_face, enroll_face, verify_liveness
+
+
+def _face_input(data):
+    """
+    (image_path, embedding, error) from a request body holding either an
+    'embedding' (list of floats) or an 'image_path'.
+    """
+    embedding = data.get('embedding')
+    if embedding is not None:
+        if not isinstance(embedding, list) or len(embedding) != settings.FACE_EMBEDDING_DIM or not all(
+                type(x) in (int, float) and math.isfinite(x) for x in embedding):
+            return None, None, f"embedding must be a list of {settings.FACE_EMBEDDING_DIM} finite numbers"
+        return None, embedding, None
+    image_path = data.get('image_path')
+    if not image_path or not isinstance(image_path, str):
+        return None, None, 'image_path or embedding required'
+    return image_path, None, None
+
+
+def _top_k(data):
+    """(k, error) for the optional 'k' of a search; form-encoded digits are accepted."""
+    k = data.get('k')
+    if k is None or k == '':
+        return settings.FACE_SEARCH_TOP_K, None
+    if isinstance(k, str) and k.isascii() and k.isdigit():
+        k = int(k)
+    if type(k) is not int or not 1 <= k <= settings.FACE_SEARCH_TOP_K_MAX:
+        return None, f"k must be an integer from 1 to {settings.FACE_SEARCH_TOP_K_MAX}"
+    return k, None
 
 class MatchFaceView(APIView):
     def post(self, request):
         citizen_id = request.data.get('citizen_id')
-        # In a real app, we'd handle file upload here.
-        # For mock, we accept a path or base64 (simulated)
-        image_path = request.data.get('image_path', 'temp/face.jpg')
+        image_path, embedding, error = _face_input(request.data)
         
         if not citizen_id:
             return Response({'error': 'citizen_id required'}, status=status.HTTP_400_BAD_REQUEST)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
             
-        # Trigger Async Task
-        task = match_face.delay(citizen_id, image_path)
+        # Trigger Async Task (or queue the probe for the next micro-batch)
+        if batching.batching_enabled():
+            task_id = batching.submit(batching.MATCH, citizen_id=citizen_id, image_path=image_path, embedding=embedding)
+        else:
+            task_id = match_face.delay(citizen_id, image_path, embedding).id
         
         return Response({
-            'task_id': task.id,
+            'task_id': task_id,
             'status': 'processing',
             'message': 'Face matching started'
         }, status=status.HTTP_202_ACCEPTED)
 
+class SearchFaceView(APIView):
+    """1:N search: who in the gallery does this face belong to?"""
+    def post(self, request):
+        image_path, embedding, error = _face_input(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        k, error = _top_k(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if batching.batching_enabled():
+            task_id = batching.submit(batching.SEARCH, image_path=image_path, embedding=embedding, k=k)
+        else:
+            task_id = search_face.delay(image_path, embedding, k).id
+
+        return Response({
+            'task_id': task_id,
+            'status': 'processing',
+            'message': 'Face search started'
+        }, status=status.HTTP_202_ACCEPTED)
+
+class EnrollFaceView(APIView):
+    """Enrollment; refused if the face already belongs to another citizen."""
+    def post(self, request):
+        citizen_id = request.data.get('citizen_id')
+        image_path, embedding, error = _face_input(request.data)
+
+        if not citizen_id:
+            return Response({'error': 'citizen_id required'}, status=status.HTTP_400_BAD_REQUEST)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if batching.batching_enabled():
+            task_id = batching.submit(batching.ENROLL, citizen_id=citizen_id, image_path=image_path, embedding=embedding)
+        else:
+            task_id = enroll_face.delay(citizen_id, image_path, embedding).id
+
+        return Response({
+            'task_id': task_id,
+            'status': 'processing',
+            'message': 'Face enrollment started'
+        }, status=status.HTTP_202_ACCEPTED)
+
 class LivenessView(APIView):
     def post(self, request):
         session_id = request.data.get('session_id')
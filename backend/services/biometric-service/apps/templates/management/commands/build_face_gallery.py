@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.matching.gallery_file import FLOAT32, INT8, MappedGallery, creation_lock
+from apps.templates.services import TemplateService
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the shared mmap face gallery (FACE_GALLERY_PATH) from the stored templates, "
+        "or with --compact folds its append log into a new base file. Workers pick up the "
+        "new file on their next search."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compact', action='store_true', help="Compact the existing gallery instead of rebuilding it")
+        parser.add_argument('--dtype', choices=['float32', 'int8'], default=None,
+                            help="Embedding storage type (default FACE_GALLERY_DTYPE)")
+
+    def handle(self, *args, **options):
+        path = settings.FACE_GALLERY_PATH
+        if options['compact']:
+            gallery = MappedGallery(path)
+            pending = gallery.log_size
+            dtype = options['dtype'] and (INT8 if options['dtype'] == 'int8' else FLOAT32)
+            gallery.compact(dtype=dtype)
+            self.stdout.write(self.style.SUCCESS(f"Compacted {pending} log entries; {len(gallery)} templates in {path}"))
+            return
+        with creation_lock(path):
+            TemplateService.build_gallery_file(path, options['dtype'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(MappedGallery(path))} templates to {path}"))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.templates.services import TemplateService
+
+
+class Command(BaseCommand):
+    help = (
+        "Trains the IVF face index on every stored template and writes it to FACE_INDEX_PATH. "
+        "Run before switching FACE_INDEX to 'ivf', and again when the gallery has grown a lot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nlist', type=int, default=settings.FACE_IVF_NLIST, help="Number of k-means cells")
+
+    def handle(self, *args, **options):
+        index = TemplateService.build_index(nlist=options['nlist'])
+        if index is None:
+            self.stdout.write(self.style.WARNING(f"Fewer than {options['nlist']} templates; index not built"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(index)} templates into {settings.FACE_INDEX_PATH}"))
@@ -0,0 +1,13 @@
+from django.db import models
+
+class FaceTemplate(models.Model):
+    """Enrolled face embedding: float32 bytes, L2-normalized, one per citizen."""
+    citizen_id = models.CharField(max_length=50, unique=True)
+    embedding = models.BinaryField()
+    dim = models.IntegerField()
+    model_name = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # galleries catch up from it
+
+    def __str__(self):
+        return f"FACE-{self.citizen_id}"
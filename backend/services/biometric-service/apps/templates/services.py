@@ -0,0 +1,298 @@
+import datetime
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from apps.matching.engine import FaceMatchingEngine, normalize
+from apps.matching.gallery_file import (
+    FLOAT32, INT8, GalleryFormatError, MappedGallery, creation_lock, write_gallery,
+)
+from apps.matching.ivf import IVFIndex
+from apps.matching.quantized import QuantizedFaceEngine
+from .models import FaceTemplate
+
+_gallery = None
+_gallery_lock = threading.Lock()
+_index_version = None  # mtime of the IVF file the current gallery was loaded against
+_sync_lock = threading.Lock()
+_synced_from = None  # FaceTemplate.updated_at from which the gallery has yet to catch up
+_synced_at = _reconciled_at = 0.0  # time.monotonic() of the last catch-up / deletion check
+
+# Rows committed a little after their updated_at was stamped are re-read on the next catch-up
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+
+def _index_mtime():
+    try:
+        return os.path.getmtime(settings.FACE_INDEX_PATH)
+    except OSError:
+        return None
+
+
+def _awaiting_index():
+    """True while FACE_INDEX = 'ivf' is served by a fallback engine and a new index file has appeared."""
+    if settings.FACE_INDEX != 'ivf' or isinstance(_gallery, IVFIndex):
+        return False
+    mtime = _index_mtime()
+    return mtime is not None and mtime != _index_version
+
+
+def get_face_gallery(fresh=False):
+    """
+    Process-wide gallery holding every enrolled face, loaded on first use:
+    the exact engine, with FACE_INDEX = 'ivf' the approximate index, or
+    with FACE_INDEX = 'mmap' the gallery file shared by every worker.
+    Until build_face_index has written the IVF file, 'ivf' is served by
+    the exact (or quantized) engine, then switched over on the next call.
+
+    In-memory galleries are caught up with FaceTemplate rows written by
+    other workers (see _sync_gallery); `fresh` forces it, as enrollment's
+    duplicate check needs every citizen enrolled anywhere.
+    """
+    global _gallery, _index_version, _synced_from, _synced_at, _reconciled_at
+    if _gallery is None or _awaiting_index():
+        with _gallery_lock:
+            if _gallery is None or _awaiting_index():
+                _index_version = _index_mtime()
+                with _sync_lock:
+                    _synced_from = timezone.now()
+                    _synced_at = _reconciled_at = time.monotonic()
+                _gallery = TemplateService.load_gallery()
+    gallery = _gallery
+    if not isinstance(gallery, MappedGallery):
+        _sync_gallery(gallery, fresh)
+    return gallery
+
+
+def _sync_gallery(gallery, force=False):
+    """
+    Adds the FaceTemplate rows created or updated since the last catch-up
+    (one query on the updated_at index), at most every
+    FACE_GALLERY_SYNC_SECONDS unless `force`d. Every
+    FACE_GALLERY_RECONCILE_SECONDS, citizens whose template was deleted are
+    removed too. The mmap gallery needs none of this: enrollments reach
+    every worker through its log.
+    """
+    global _synced_from, _synced_at, _reconciled_at
+    if not force and time.monotonic() - _synced_at < settings.FACE_GALLERY_SYNC_SECONDS:
+        return
+    with _sync_lock:
+        now = time.monotonic()
+        if not force and now - _synced_at < settings.FACE_GALLERY_SYNC_SECONDS:
+            return
+        started = timezone.now()
+        for citizen_ids, embeddings in TemplateService._templates(updated_at__gte=_synced_from - SYNC_OVERLAP):
+            gallery.add_many(citizen_ids, embeddings)
+        if now - _reconciled_at >= settings.FACE_GALLERY_RECONCILE_SECONDS:
+            stored = set(FaceTemplate.objects.values_list('citizen_id', flat=True))
+            for citizen_id in [c for c in gallery.citizen_ids() if c not in stored]:
+                gallery.remove(citizen_id)
+            _reconciled_at = now
+        _synced_from, _synced_at = started, now
+
+
+class TemplateService:
+    @staticmethod
+    def _templates(batch_size=10000, **filters):
+        """(citizen_ids, embeddings) batches of the stored templates."""
+        rows = FaceTemplate.objects.filter(dim=settings.FACE_EMBEDDING_DIM, **filters) \
+            .values_list('citizen_id', 'embedding').iterator(chunk_size=batch_size)
+        citizen_ids, embeddings = [], []
+        for citizen_id, embedding in rows:
+            citizen_ids.append(citizen_id)
+            embeddings.append(np.frombuffer(embedding, dtype=np.float32))
+            if len(citizen_ids) == batch_size:
+                yield citizen_ids, np.stack(embeddings)
+                citizen_ids, embeddings = [], []
+        if citizen_ids:
+            yield citizen_ids, np.stack(embeddings)
+
+    @staticmethod
+    def load_gallery():
+        if settings.FACE_INDEX == 'mmap':
+            return TemplateService.load_mapped_gallery()
+        if settings.FACE_INDEX == 'ivf':
+            index = TemplateService.load_index()
+            if index is not None:
+                return index
+        if settings.FACE_QUANTIZATION in ('int8', 'pq'):
+            engine = TemplateService.load_quantized()
+            if engine is not None:
+                return engine
+        engine = FaceMatchingEngine(settings.FACE_EMBEDDING_DIM, capacity=max(FaceTemplate.objects.count(), 1024))
+        for citizen_ids, embeddings in TemplateService._templates():
+            engine.add_many(citizen_ids, embeddings)
+        return engine
+
+    @staticmethod
+    def fetch_embeddings(citizen_ids):
+        """{citizen_id: float32 embedding} straight from FaceTemplate, for exact re-ranking."""
+        rows = FaceTemplate.objects.filter(citizen_id__in=citizen_ids).values_list('citizen_id', 'embedding')
+        return {citizen_id: np.frombuffer(embedding, dtype=np.float32) for citizen_id, embedding in rows}
+
+    @staticmethod
+    def load_quantized(training_points=16384):
+        """
+        The gallery as int8 or PQ codes, trained on the first stored
+        templates and re-ranked against FaceTemplate. None if there are too
+        few templates to train a product quantizer.
+        """
+        count = FaceTemplate.objects.count()
+        mode = settings.FACE_QUANTIZATION
+        if mode == 'pq' and count < 256:
+            return None
+        engine = QuantizedFaceEngine(settings.FACE_EMBEDDING_DIM, mode=mode, m=settings.FACE_PQ_M,
+                                     rerank=settings.FACE_RERANK, fetch=TemplateService.fetch_embeddings,
+                                     capacity=max(count, 1024))
+        pending_ids, pending = [], []
+        for citizen_ids, embeddings in TemplateService._templates():
+            if not engine.is_trained:
+                pending_ids.extend(citizen_ids)
+                pending.append(embeddings)
+                if len(pending_ids) < min(training_points, count):
+                    continue
+                citizen_ids, embeddings = pending_ids, np.concatenate(pending)
+                engine.train(embeddings)
+            engine.add_many(citizen_ids, embeddings)
+        if not engine.is_trained:
+            if pending_ids and (mode == 'int8' or len(pending_ids) >= 256):
+                engine.train(np.concatenate(pending))
+                engine.add_many(pending_ids, np.concatenate(pending))
+            elif mode == 'pq':
+                return None
+            else:
+                # No templates yet: int8 scales for unit vectors still work
+                engine.scales = np.full(settings.FACE_EMBEDDING_DIM, 1 / 127, dtype=np.float32)
+        return engine
+
+    @staticmethod
+    def build_gallery_file(path=None, dtype=None):
+        """Writes every stored template to the shared gallery file (FACE_GALLERY_PATH)."""
+        path = path or settings.FACE_GALLERY_PATH
+        dtype = INT8 if (dtype or settings.FACE_GALLERY_DTYPE) == 'int8' else FLOAT32
+        citizen_ids, embeddings = [], []
+        for batch_ids, batch in TemplateService._templates():
+            citizen_ids.extend(batch_ids)
+            embeddings.append(batch)
+        dim = settings.FACE_EMBEDDING_DIM
+        write_gallery(path, citizen_ids, np.concatenate(embeddings) if embeddings else np.zeros((0, dim), np.float32), dtype)
+
+    @staticmethod
+    def load_mapped_gallery():
+        """
+        Maps the shared gallery file, writing it from FaceTemplate first if
+        it doesn't exist (or is unreadable or of another dimension).
+        Enrollments go to its append log, so every worker sees them. The
+        check and the write happen under creation_lock(), so workers starting
+        together write the file once rather than each replacing it.
+        """
+        path = settings.FACE_GALLERY_PATH
+        with creation_lock(path):
+            if os.path.exists(path):
+                try:
+                    gallery = MappedGallery(path)
+                    if gallery.dim == settings.FACE_EMBEDDING_DIM:
+                        return gallery
+                except GalleryFormatError as e:
+                    print(f"Failed to open face gallery {path}: {e}")
+            TemplateService.build_gallery_file(path)
+            return MappedGallery(path)
+
+    @staticmethod
+    def build_index(nlist=None, path=None):
+        """
+        Trains an IVF index on every stored template, fills it and saves it
+        to FACE_INDEX_PATH. Returns None if there are too few templates to
+        train nlist centroids.
+        """
+        nlist = nlist or settings.FACE_IVF_NLIST
+        path = path or settings.FACE_INDEX_PATH
+        started = time.time()
+        citizen_ids, embeddings = [], []
+        for batch_ids, batch in TemplateService._templates():
+            citizen_ids.extend(batch_ids)
+            embeddings.append(batch)
+        if len(citizen_ids) < nlist:
+            return None
+        embeddings = np.concatenate(embeddings)
+        index = IVFIndex(settings.FACE_EMBEDDING_DIM, nlist=nlist, nprobe=settings.FACE_IVF_NPROBE)
+        index.train(embeddings)
+        index.add_many(citizen_ids, embeddings)
+        index.save(path)
+        # Date the file to when reading began, so load_index() re-applies
+        # templates written while the index was being trained
+        os.utime(path, (started, started))
+        return index
+
+    @staticmethod
+    def load_index():
+        """
+        The saved IVF index brought up to date with FaceTemplate: templates
+        written since the file was saved are inserted, deleted ones removed.
+        None when there is no usable file: training is left to the
+        build_face_index command, not to whichever workers start first.
+        """
+        path = settings.FACE_INDEX_PATH
+        if not os.path.exists(path):
+            print(f"No face index at {path}; run build_face_index")
+            return None
+        try:
+            index = IVFIndex.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Failed to load face index {path}: {e}")
+            return None
+        if index.dim != settings.FACE_EMBEDDING_DIM:
+            print(f"Face index {path} is {index.dim}-dimensional, expected {settings.FACE_EMBEDDING_DIM}; "
+                  f"run build_face_index")
+            return None
+        index.nprobe = settings.FACE_IVF_NPROBE
+
+        saved_at = datetime.datetime.fromtimestamp(os.path.getmtime(path), tz=datetime.timezone.utc)
+        if not settings.USE_TZ:
+            saved_at = timezone.make_naive(saved_at)
+        for citizen_ids, embeddings in TemplateService._templates(updated_at__gte=saved_at):
+            index.add_many(citizen_ids, embeddings)
+        stored = set(FaceTemplate.objects.values_list('citizen_id', flat=True))
+        for citizen_id in [c for c in index.citizen_ids() if c not in stored]:
+            index.remove(citizen_id)
+        return index
+
+    @staticmethod
+    def enroll(citizen_id, embedding, check_duplicates=True, threshold=None):
+        """
+        Stores a citizen's face template. With check_duplicates, the gallery
+        is searched first and enrollment is refused if anyone else scores
+        at or above `threshold`:
+          {'status': 'enrolled' | 'duplicate', 'citizen_id', 'matches': [...]}
+        """
+        embedding = normalize(embedding)
+        if embedding.shape != (settings.FACE_EMBEDDING_DIM,):
+            raise ValueError(f"Expected a {settings.FACE_EMBEDDING_DIM}-dimensional embedding")
+        gallery = get_face_gallery(fresh=check_duplicates)
+
+        if check_duplicates:
+            threshold = settings.FACE_MATCH_THRESHOLD if threshold is None else threshold
+            matches = gallery.search(embedding, k=settings.FACE_SEARCH_TOP_K, threshold=threshold, exclude=citizen_id)
+            if matches:
+                return {
+                    'status': 'duplicate',
+                    'citizen_id': citizen_id,
+                    'matches': [m._asdict() for m in matches],
+                }
+
+        FaceTemplate.objects.update_or_create(
+            citizen_id=citizen_id,
+            defaults={'embedding': embedding.tobytes(), 'dim': len(embedding), 'model_name': settings.FACE_MODEL},
+        )
+        gallery.add(citizen_id, embedding)
+        return {'status': 'enrolled', 'citizen_id': citizen_id, 'matches': []}
+
+    @staticmethod
+    def remove(citizen_id):
+        deleted, _ = FaceTemplate.objects.filter(citizen_id=citizen_id).delete()
+        get_face_gallery().remove(citizen_id)
+        return bool(deleted)
@@ -23,6 +23,8 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'apps.matching',
+    'apps.templates',
+    'apps.fingerprint',
 ]
 
 MIDDLEWARE = [
@@ -77,3 +79,36 @@ CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localho
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+
+# Face Matching
+FACE_MODEL = os.environ.get('FACE_MODEL', 'ArcFace')  # DeepFace model that produced the embeddings
+FACE_EMBEDDING_DIM = int(os.environ.get('FACE_EMBEDDING_DIM', '512'))
+FACE_MATCH_THRESHOLD = float(os.environ.get('FACE_MATCH_THRESHOLD', '0.5'))  # cosine similarity
+FACE_SEARCH_TOP_K = int(os.environ.get('FACE_SEARCH_TOP_K', '10'))
+FACE_SEARCH_TOP_K_MAX = int(os.environ.get('FACE_SEARCH_TOP_K_MAX', '100'))  # largest k a search request may ask for
+
+# Face Index
+FACE_INDEX = os.environ.get('FACE_INDEX', 'exact')  # 'exact', 'ivf' (approximate, for large galleries) or 'mmap' (shared file)
+FACE_INDEX_PATH = os.environ.get('FACE_INDEX_PATH', str(BASE_DIR / 'face_index.npz'))
+FACE_IVF_NLIST = int(os.environ.get('FACE_IVF_NLIST', '1024'))
+FACE_IVF_NPROBE = int(os.environ.get('FACE_IVF_NPROBE', '32'))  # cells scanned per search; higher = better recall, slower
+FACE_GALLERY_PATH = os.environ.get('FACE_GALLERY_PATH', str(BASE_DIR / 'face_gallery.bin'))
+FACE_GALLERY_DTYPE = os.environ.get('FACE_GALLERY_DTYPE', 'float32')  # 'float32' or 'int8' (4x smaller)
+# In-memory galleries ('exact', 'ivf', quantized) pick up FaceTemplate rows other workers wrote
+# before a search once this many seconds have passed (0: every search; enrollment always does),
+# and drop templates other workers deleted every FACE_GALLERY_RECONCILE_SECONDS
+FACE_GALLERY_SYNC_SECONDS = float(os.environ.get('FACE_GALLERY_SYNC_SECONDS', '0'))
+FACE_GALLERY_RECONCILE_SECONDS = float(os.environ.get('FACE_GALLERY_RECONCILE_SECONDS', '60'))
+
+# Face Quantization (exact engine only)
+FACE_QUANTIZATION = os.environ.get('FACE_QUANTIZATION', 'none')  # 'none', 'int8' (4x smaller) or 'pq' (dim/FACE_PQ_M x smaller)
+FACE_PQ_M = int(os.environ.get('FACE_PQ_M', '128'))  # bytes per embedding with 'pq'; must divide FACE_EMBEDDING_DIM
+FACE_RERANK = int(os.environ.get('FACE_RERANK', '50'))  # shortlisted candidates re-scored with exact embeddings
+
+# Probe Micro-batching
+FACE_BATCH_SIZE = int(os.environ.get('FACE_BATCH_SIZE', '32'))  # probes per batch; 1 = one task per probe
+FACE_BATCH_WAIT_MS = int(os.environ.get('FACE_BATCH_WAIT_MS', '20'))  # longest a probe waits for its batch to fill
+FACE_BATCH_REDIS_URL = os.environ.get('FACE_BATCH_REDIS_URL', CELERY_BROKER_URL)
+
+# Fingerprint Matching
+FINGERPRINT_MATCH_THRESHOLD = float(os.environ.get('FINGERPRINT_MATCH_THRESHOLD', '6'))  # -log10 false-match probability
@@ -3,5 +3,6 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/v1/biometrics/fingerprint/', include('apps.fingerprint.urls')),
     path('api/v1/biometrics/', include('apps.matching.urls')),
 ]
@@ -0,0 +1,82 @@
+"""
+Benchmark for the IVF face index: recall@k against the exact engine and
+per-probe latency, swept over nprobe, on a synthetic clustered gallery
+(identities drawn around a few thousand "demographic" centres, probes are
+noisy re-captures of enrolled faces).
+
+Usage (from the biometric-service directory):
+    python scripts/bench_ann.py [gallery_size] [nlist]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from apps.matching.engine import FaceMatchingEngine, normalize
+from apps.matching.ivf import IVFIndex
+
+DIM = 512
+K = 10
+PROBES = 256
+
+
+def gallery(n, rng):
+    centres = normalize(rng.standard_normal((max(n // 100, 16), DIM), dtype=np.float32))
+    members = centres[rng.integers(len(centres), size=n)]
+    return normalize(members + 2.0 * normalize(rng.standard_normal((n, DIM), dtype=np.float32)))
+
+
+def recall(approximate, exact):
+    hits = sum(len({m.citizen_id for m in a} & {m.citizen_id for m in e}) for a, e in zip(approximate, exact))
+    return hits / sum(len(e) for e in exact)
+
+
+def bench(n=200000, nlist=1024):
+    rng = np.random.default_rng(0)
+    vectors = gallery(n, rng)
+    citizen_ids = [f"C{i}" for i in range(n)]
+    picks = rng.choice(n, PROBES, replace=False)
+    probes = normalize(vectors[picks] + 0.8 * normalize(rng.standard_normal((PROBES, DIM), dtype=np.float32)))
+
+    exact = FaceMatchingEngine(DIM, capacity=n)
+    exact.add_many(citizen_ids, vectors)
+    start = time.perf_counter()
+    truth = [exact.search(p, k=K) for p in probes]
+    exact_ms = (time.perf_counter() - start) * 1000 / PROBES
+    print(f"gallery {n} x {DIM}, {PROBES} probes, k={K}")
+    print(f"exact:          {exact_ms:7.2f} ms/probe")
+
+    index = IVFIndex(DIM, nlist=nlist)
+    start = time.perf_counter()
+    index.train(vectors)
+    trained = time.perf_counter()
+    index.add_many(citizen_ids, vectors)
+    print(f"ivf nlist={nlist}: train {trained - start:.1f}s, add {time.perf_counter() - trained:.1f}s")
+
+    for nprobe in (1, 4, 8, 16, 32, 64, 128):
+        if nprobe > nlist:
+            break
+        start = time.perf_counter()
+        found = [index.search(p, k=K, nprobe=nprobe) for p in probes]
+        single_ms = (time.perf_counter() - start) * 1000 / PROBES
+        start = time.perf_counter()
+        index.search_many(probes, k=K, nprobe=nprobe)
+        batch_ms = (time.perf_counter() - start) * 1000 / PROBES
+        rank1 = np.mean([bool(f) and f[0].citizen_id == citizen_ids[i] for f, i in zip(found, picks)])
+        print(f"  nprobe={nprobe:4d}: recall@{K} {recall(found, truth):.3f}, rank-1 {rank1:.3f}, "
+              f"{single_ms:6.2f} ms/probe ({single_ms and exact_ms / single_ms:5.1f}x), batched {batch_ms:5.2f} ms/probe")
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_ann.npz')
+    start = time.perf_counter()
+    index.save(path)
+    saved = time.perf_counter()
+    IVFIndex.load(path)
+    print(f"save {saved - start:.2f}s, load {time.perf_counter() - saved:.2f}s")
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    bench(*(int(a) for a in sys.argv[1:3]))
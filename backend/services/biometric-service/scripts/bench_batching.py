@@ -0,0 +1,49 @@
+"""
+Benchmark for probe micro-batching: gallery scoring throughput when
+probes are scored one per task versus FACE_BATCH_SIZE at a time, and
+the worst-case latency a probe pays (batch wait + batch processing).
+Model inference and broker round trips are not included.
+
+Usage (from the biometric-service directory):
+    python scripts/bench_batching.py [gallery_size] [probes] [wait_ms]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from apps.matching.engine import FaceMatchingEngine, normalize
+
+DIM = 512
+
+
+def bench(n=200000, probes=256, wait_ms=20):
+    rng = np.random.default_rng(0)
+    engine = FaceMatchingEngine(DIM, capacity=n)
+    for start in range(0, n, 50000):
+        size = min(50000, n - start)
+        engine.add_many([f"C{start + i}" for i in range(size)], rng.standard_normal((size, DIM), dtype=np.float32))
+    queries = normalize(rng.standard_normal((probes, DIM), dtype=np.float32))
+
+    start = time.perf_counter()
+    for probe in queries:
+        engine.search(probe, k=10)
+    single = time.perf_counter() - start
+    print(f"gallery {n} x {DIM}, {probes} probes")
+    print(f"one per task:  {probes / single:7.1f} probes/s  ({single * 1000 / probes:.2f} ms each)")
+
+    for batch in (4, 8, 16, 32, 64):
+        start = time.perf_counter()
+        for i in range(0, probes, batch):
+            engine.search_many(queries[i:i + batch], k=10)
+        elapsed = time.perf_counter() - start
+        batch_ms = elapsed * 1000 / (probes / batch)
+        print(f"batch of {batch:3d}: {probes / elapsed:7.1f} probes/s  ({single / elapsed:4.1f}x), "
+              f"worst-case latency {wait_ms + batch_ms:6.1f} ms")
+
+
+if __name__ == '__main__':
+    bench(*(int(a) for a in sys.argv[1:4]))
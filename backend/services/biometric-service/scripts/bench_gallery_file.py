@@ -0,0 +1,70 @@
+"""
+Benchmark for the mmap gallery file: worker startup (rebuilding the
+in-memory engine from stored template bytes, as load_gallery() does,
+versus mapping the file), file size, and search latency, for float32
+and int8 storage.
+
+Usage (from the biometric-service directory):
+    python scripts/bench_gallery_file.py [gallery_size]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from apps.matching.engine import FaceMatchingEngine, normalize
+from apps.matching.gallery_file import FLOAT32, INT8, MappedGallery, write_gallery
+
+DIM = 512
+PROBES = 64
+
+
+def bench(n=200000):
+    rng = np.random.default_rng(0)
+    vectors = normalize(rng.standard_normal((n, DIM), dtype=np.float32))
+    citizen_ids = [f"C{i:08d}" for i in range(n)]
+    probes = normalize(vectors[:PROBES] + 0.8 * normalize(rng.standard_normal((PROBES, DIM), dtype=np.float32)))
+    stored = [v.tobytes() for v in vectors]  # FaceTemplate.embedding column
+
+    start = time.perf_counter()
+    engine = FaceMatchingEngine(DIM, capacity=n)
+    for i in range(0, n, 10000):
+        engine.add_many(citizen_ids[i:i + 10000], [np.frombuffer(b, dtype=np.float32) for b in stored[i:i + 10000]])
+    print(f"gallery {n} x {DIM}")
+    print(f"in-memory engine from template bytes: {time.perf_counter() - start:8.3f} s (excluding the DB query)")
+    start = time.perf_counter()
+    truth = engine.search_many(probes, k=10)
+    print(f"  search {(time.perf_counter() - start) * 1000 / PROBES:.2f} ms/probe")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, dtype in (('float32', FLOAT32), ('int8', INT8)):
+            path = os.path.join(directory, f'gallery-{name}.bin')
+            start = time.perf_counter()
+            write_gallery(path, citizen_ids, vectors, dtype=dtype)
+            written = time.perf_counter() - start
+
+            start = time.perf_counter()
+            gallery = MappedGallery(path)
+            opened = time.perf_counter() - start
+            gallery.search(probes[0])  # fault the pages in
+            start = time.perf_counter()
+            found = gallery.search_many(probes, k=10)
+            searched = (time.perf_counter() - start) * 1000 / PROBES
+            rank1 = np.mean([f[0].citizen_id == t[0].citizen_id for f, t in zip(found, truth)])
+            print(f"mmap {name:7s}: {os.path.getsize(path) / 2**20:6.0f} MiB, write {written:.2f} s, "
+                  f"open {opened * 1000:.2f} ms, search {searched:.2f} ms/probe, rank-1 agreement {rank1:.3f}")
+
+            start = time.perf_counter()
+            gallery.add_many([f"N{i}" for i in range(1000)], vectors[:1000])
+            appended = time.perf_counter() - start
+            start = time.perf_counter()
+            gallery.compact()
+            print(f"  append 1000: {appended * 1000:.1f} ms, compact {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == '__main__':
+    bench(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,66 @@
+"""
+Benchmark for the ISO/IEC 19794-2 codec: records encoded and decoded per
+second on one core, for single-finger and ten-finger records, plus
+streaming decode of a concatenated export.
+
+Usage (from the biometric-service directory):
+    python scripts/bench_iso19794.py [records]
+"""
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from apps.fingerprint.iso19794.decoder import MINUTIA_DTYPE, decode, iter_records, iter_views
+from apps.fingerprint.iso19794.encoder import encode, finger_view
+
+
+def minutiae(rng, count):
+    m = np.zeros(count, dtype=MINUTIA_DTYPE)
+    m['x'] = rng.integers(0, 500, count)
+    m['y'] = rng.integers(0, 550, count)
+    m['angle'] = rng.integers(0, 256, count)
+    m['type'] = rng.integers(1, 3, count)
+    m['quality'] = rng.integers(40, 101, count)
+    return m
+
+
+def rate(label, count, elapsed, size):
+    print(f"{label:34s} {count / elapsed:9.0f} records/s  {size * count / elapsed / 2**20:6.1f} MiB/s")
+
+
+def bench(n=20000):
+    rng = np.random.default_rng(0)
+    for fingers in (1, 10):
+        views = [[finger_view(f + 1, minutiae(rng, int(rng.integers(25, 60)))) for f in range(fingers)] for _ in range(100)]
+        records = [encode(v, 500, 550) for v in views]
+        size = np.mean([len(r) for r in records])
+        print(f"{fingers}-finger records, {size:.0f} bytes on average")
+
+        start = time.perf_counter()
+        for i in range(n):
+            encode(views[i % 100], 500, 550)
+        rate("  encode", n, time.perf_counter() - start, size)
+
+        start = time.perf_counter()
+        for i in range(n):
+            decode(records[i % 100])
+        rate("  decode", n, time.perf_counter() - start, size)
+
+        start = time.perf_counter()
+        for i in range(n):
+            next(iter_views(records[i % 100]))
+        rate("  first finger only (iter_views)", n, time.perf_counter() - start, size)
+
+        export = b''.join(records) * (n // 100)
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_records(io.BytesIO(export)))
+        rate("  streamed from a file (iter_records)", count, time.perf_counter() - start, size)
+
+
+if __name__ == '__main__':
+    bench(*(int(a) for a in sys.argv[1:2]))
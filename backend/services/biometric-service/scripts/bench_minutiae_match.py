@@ -0,0 +1,79 @@
+"""
+Benchmark for the minutiae matcher: time per 1:1 comparison on one core,
+genuine/impostor separation and calibration (how often impostors reach
+each score) on synthetic fingerprints. Genuine probes are the gallery
+rotated, shifted and jittered, with minutiae dropped and spurious ones
+added, and clipped to the sensor area.
+
+Usage (from the biometric-service directory):
+    python scripts/bench_minutiae_match.py [pairs]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from apps.fingerprint.iso19794.decoder import ANGLE_UNIT, MINUTIA_DTYPE
+from apps.fingerprint.matcher import minutiae_matcher
+
+WIDTH, HEIGHT = 400, 500
+
+
+def finger(rng):
+    count = int(rng.integers(30, 60))
+    m = np.zeros(count, dtype=MINUTIA_DTYPE)
+    m['x'] = rng.integers(20, WIDTH - 20, count)
+    m['y'] = rng.integers(20, HEIGHT - 20, count)
+    m['angle'] = rng.integers(0, 256, count)
+    m['type'] = rng.integers(1, 3, count)
+    m['quality'] = rng.integers(40, 101, count)
+    return m
+
+
+def impression(rng, m):
+    """Another capture of the same finger."""
+    keep = m[rng.random(len(m)) > 0.2]
+    rotation = rng.uniform(-0.5, 0.5)
+    cx, cy = WIDTH / 2, HEIGHT / 2
+    x, y = keep['x'] - cx, keep['y'] - cy
+    nx = np.cos(rotation) * x - np.sin(rotation) * y + cx + rng.uniform(-40, 40) + rng.normal(0, 3, len(keep))
+    ny = np.sin(rotation) * x + np.cos(rotation) * y + cy + rng.uniform(-40, 40) + rng.normal(0, 3, len(keep))
+    angle = (keep['angle'] + rotation / ANGLE_UNIT + rng.normal(0, 4, len(keep))) % 256
+    spurious = finger(rng)[:int(len(keep) * 0.15)]
+    out = np.concatenate([np.array(list(zip(nx, ny, angle, keep['type'], keep['quality'])), dtype=[
+        ('x', 'f8'), ('y', 'f8'), ('angle', 'f8'), ('type', 'u1'), ('quality', 'u1')]).astype(MINUTIA_DTYPE, casting='unsafe')
+        if len(keep) else np.zeros(0, MINUTIA_DTYPE), spurious])
+    inside = (nx >= 0) & (nx < WIDTH) & (ny >= 0) & (ny < HEIGHT)
+    return np.concatenate([out[:len(keep)][inside], out[len(keep):]])
+
+
+def bench(pairs=2000):
+    rng = np.random.default_rng(0)
+    fingers = [finger(rng) for _ in range(pairs)]
+    genuine_pairs = [(impression(rng, f), f) for f in fingers]
+    impostor_pairs = [(impression(rng, fingers[i]), fingers[(i + 1) % pairs]) for i in range(pairs)]
+
+    minutiae_matcher.match(*genuine_pairs[0], WIDTH, HEIGHT)
+    start = time.perf_counter()
+    genuine = [minutiae_matcher.match(p, g, WIDTH, HEIGHT) for p, g in genuine_pairs]
+    impostor = [minutiae_matcher.match(p, g, WIDTH, HEIGHT) for p, g in impostor_pairs]
+    elapsed = time.perf_counter() - start
+    print(f"{2 * pairs} comparisons, {np.mean([len(f) for f in fingers]):.0f} minutiae per finger on average")
+    print(f"time per comparison: {elapsed * 1000 / (2 * pairs):.2f} ms")
+
+    genuine_scores = np.array([m.score for m in genuine])
+    impostor_scores = np.array([m.score for m in impostor])
+    print(f"paired minutiae: genuine median {np.median([m.paired for m in genuine]):.0f}, "
+          f"impostor median {np.median([m.paired for m in impostor]):.0f}, max {max(m.paired for m in impostor)}")
+    print("threshold  impostors at/above (expected <=)  genuine below (FNMR)")
+    for threshold in (1, 2, 3, 4, 6, 8):
+        fmr = np.mean(impostor_scores >= threshold)
+        fnmr = np.mean(genuine_scores < threshold)
+        print(f"  {threshold:5d}    {fmr:9.4f} ({10.0 ** -threshold:9.6f})            {fnmr:.4f}")
+
+
+if __name__ == '__main__':
+    bench(*(int(a) for a in sys.argv[1:2]))
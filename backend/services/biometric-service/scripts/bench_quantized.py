@@ -0,0 +1,80 @@
+"""
+Benchmark for quantized face storage: gallery memory, per-probe latency
+and accuracy against the float32 engine (rank-1 agreement, recall@10 and
+score error), for int8 and product quantization with and without exact
+re-ranking, on a synthetic clustered gallery with noisy mated probes.
+
+Usage (from the biometric-service directory):
+    python scripts/bench_quantized.py [gallery_size]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from apps.matching.engine import FaceMatchingEngine, normalize
+from apps.matching.quantized import INT8, PQ, QuantizedFaceEngine
+
+DIM = 512
+K = 10
+PROBES = 128
+
+
+def bench(n=200000):
+    rng = np.random.default_rng(0)
+    centres = normalize(rng.standard_normal((max(n // 100, 16), DIM), dtype=np.float32))
+    vectors = normalize(centres[rng.integers(len(centres), size=n)] + 2.0 * normalize(rng.standard_normal((n, DIM), dtype=np.float32)))
+    citizen_ids = [f"C{i}" for i in range(n)]
+    rows = {citizen_id: row for row, citizen_id in enumerate(citizen_ids)}
+    picks = rng.choice(n, PROBES, replace=False)
+    probes = normalize(vectors[picks] + 0.8 * normalize(rng.standard_normal((PROBES, DIM), dtype=np.float32)))
+
+    def fetch(ids):  # stands in for the template table / float32 gallery file
+        return {citizen_id: vectors[rows[citizen_id]] for citizen_id in ids if citizen_id in rows}
+
+    exact = FaceMatchingEngine(DIM, capacity=n)
+    exact.add_many(citizen_ids, vectors)
+    start = time.perf_counter()
+    truth = [exact.search(p, k=K) for p in probes]
+    exact_ms = (time.perf_counter() - start) * 1000 / PROBES
+    print(f"gallery {n} x {DIM}, {PROBES} probes")
+    print(f"{'float32':22s} {n * DIM * 4 / 2**20:7.1f} MiB  {exact_ms:6.2f} ms/probe")
+
+    configs = [
+        ('int8', dict(mode=INT8), False), ('int8 + rerank', dict(mode=INT8), True),
+        ('pq m=128', dict(mode=PQ, m=128), False), ('pq m=128 + rerank', dict(mode=PQ, m=128), True),
+        ('pq m=64', dict(mode=PQ, m=64), False), ('pq m=64 + rerank', dict(mode=PQ, m=64), True),
+        ('pq m=32 + rerank', dict(mode=PQ, m=32), True),
+    ]
+    trained = {}
+    for name, options, rerank in configs:
+        key = tuple(sorted(options.items()))
+        if key not in trained:
+            engine = QuantizedFaceEngine(DIM, capacity=n, **options)
+            start = time.perf_counter()
+            engine.train(vectors)
+            engine.add_many(citizen_ids, vectors)
+            print(f"  ({options['mode']} {options.get('m', '')}: train + encode {time.perf_counter() - start:.1f} s)")
+            trained[key] = engine
+        engine = trained[key]
+        engine.fetch = fetch if rerank else None
+
+        start = time.perf_counter()
+        found = [engine.search(p, k=K) for p in probes]
+        single_ms = (time.perf_counter() - start) * 1000 / PROBES
+        start = time.perf_counter()
+        engine.search_many(probes, k=K)
+        batch_ms = (time.perf_counter() - start) * 1000 / PROBES
+
+        rank1 = np.mean([f[0].citizen_id == t[0].citizen_id for f, t in zip(found, truth)])
+        recall = np.mean([len({m.citizen_id for m in f} & {m.citizen_id for m in t}) / K for f, t in zip(found, truth)])
+        error = np.mean([abs(f[0].score - t[0].score) for f, t in zip(found, truth)])
+        print(f"{name:22s} {engine.nbytes / 2**20:7.1f} MiB  {single_ms:6.2f} ms/probe (batched {batch_ms:5.2f})  "
+              f"rank-1 {rank1:.3f}  recall@{K} {recall:.3f}  top score error {error:.4f}")
+
+
+if __name__ == '__main__':
+    bench(*(int(a) for a in sys.argv[1:2]))
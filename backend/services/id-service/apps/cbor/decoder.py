@@ -0,0 +1,298 @@
+import datetime
+import struct
+
+from cbor2 import CBORSimpleValue, CBORTag, undefined
+
+
+class CBORDecodeError(ValueError):
+    """Raised for malformed CBOR, or non-deterministic CBOR in strict mode."""
+
+
+_UNPACK_H = struct.Struct('>H').unpack_from
+_UNPACK_I = struct.Struct('>I').unpack_from
+_UNPACK_Q = struct.Struct('>Q').unpack_from
+_UNPACK_E = struct.Struct('>e').unpack_from
+_UNPACK_F = struct.Struct('>f').unpack_from
+_UNPACK_D = struct.Struct('>d').unpack_from
+
+# Arrays, maps and tags nested deeper than this are rejected. mDocs and
+# COSE messages nest a handful of levels; the limit keeps hostile input
+# far from Python's recursion limit.
+MAX_DEPTH = 64
+
+
+class _Reader:
+    """
+    Decodes from a memoryview without copying it. Byte strings come back
+    as memoryview slices of the input; call bytes() on one to keep it
+    independently of the source buffer.
+    """
+
+    def __init__(self, data, strict, max_depth=MAX_DEPTH):
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        if view.format != 'B' or view.ndim != 1:
+            view = view.cast('B')
+        self.view = view
+        self.pos = 0
+        self.strict = strict
+        self.depth = max_depth  # nesting levels still allowed
+
+    def fail(self, message):
+        raise CBORDecodeError(f"{message} at offset {self.pos}")
+
+    def argument(self, info):
+        """Reads the argument for additional info `info`; None means indefinite."""
+        pos = self.pos
+        if info < 24:
+            return info
+        try:
+            if info == 24:
+                value = self.view[pos]
+                self.pos = pos + 1
+                minimum = 24
+            elif info == 25:
+                value = _UNPACK_H(self.view, pos)[0]
+                self.pos = pos + 2
+                minimum = 0x100
+            elif info == 26:
+                value = _UNPACK_I(self.view, pos)[0]
+                self.pos = pos + 4
+                minimum = 0x10000
+            elif info == 27:
+                value = _UNPACK_Q(self.view, pos)[0]
+                self.pos = pos + 8
+                minimum = 0x100000000
+            elif info == 31:
+                if self.strict:
+                    self.fail("Indefinite length not allowed")
+                return None
+            else:
+                self.fail(f"Reserved additional info {info}")
+        except (IndexError, struct.error):
+            self.fail("Truncated argument")
+        if self.strict and value < minimum:
+            self.fail("Argument not in shortest form")
+        return value
+
+    def take(self, n):
+        start = self.pos
+        end = start + n
+        if end > len(self.view):
+            self.fail("Truncated string")
+        self.pos = end
+        return self.view[start:end]
+
+    def decode(self):
+        try:
+            ib = self.view[self.pos]
+        except IndexError:
+            self.fail("Unexpected end of data")
+        self.pos += 1
+        major = ib >> 5
+        info = ib & 31
+
+        if major == 7:
+            return self.decode_simple(info)
+
+        n = info if info < 24 else self.argument(info)
+        if major < 2:
+            if n is None:
+                self.fail("Indefinite length not allowed for integers")
+            return n if major == 0 else -1 - n
+        if major == 2:
+            if n is None:
+                return b''.join(bytes(chunk) for chunk in self.chunks(2))
+            return self.take(n)
+        if major == 3:
+            if n is None:
+                try:
+                    return ''.join(str(chunk, 'utf-8') for chunk in self.chunks(3))
+                except UnicodeDecodeError:
+                    self.fail("Invalid UTF-8")
+            start = self.pos
+            end = start + n
+            if end > len(self.view):
+                self.fail("Truncated string")
+            self.pos = end
+            try:
+                return str(self.view[start:end], 'utf-8')
+            except UnicodeDecodeError:
+                self.fail("Invalid UTF-8")
+        if not self.depth:
+            self.fail("Nesting too deep")
+        # Not restored if decoding fails: the reader is abandoned then
+        self.depth -= 1
+        if major == 4:
+            decode = self.decode
+            if n is None:
+                value = []
+                while not self.at_break():
+                    value.append(decode())
+            else:
+                value = [decode() for _ in range(n)]
+        elif major == 5:
+            value = self.decode_map(n)
+        else:
+            if n is None:
+                self.fail("Indefinite length not allowed for tags")
+            value = self.decode_tag(n)
+        self.depth += 1
+        return value
+
+    def at_break(self):
+        """True (and consumes it) if the next byte ends an indefinite-length item."""
+        try:
+            ib = self.view[self.pos]
+        except IndexError:
+            self.fail("Unterminated indefinite-length item")
+        if ib == 0xff:
+            self.pos += 1
+            return True
+        return False
+
+    def chunks(self, major):
+        while not self.at_break():
+            ib = self.view[self.pos]
+            if ib >> 5 != major or ib & 31 == 31:
+                self.fail("Invalid chunk in indefinite-length string")
+            self.pos += 1
+            yield self.take(self.argument(ib & 31))
+
+    def decode_map(self, n):
+        result = {}
+        decode = self.decode
+        view = self.view
+        end = len(view)
+        strict = self.strict
+        previous_key = None
+        count = 0
+        while (count < n) if n is not None else not self.at_break():
+            start = self.pos
+            ib = view[start] if start < end else 0
+            if 0x60 <= ib < 0x78 and start + (ib & 31) < end:
+                # Short text key, the common case: decode inline
+                self.pos = start + 1 + (ib & 31)
+                try:
+                    key = str(view[start + 1:self.pos], 'utf-8')
+                except UnicodeDecodeError:
+                    self.fail("Invalid UTF-8")
+            else:
+                key = decode()
+                if isinstance(key, memoryview):
+                    key = bytes(key)
+                elif isinstance(key, list):
+                    key = tuple(key)
+                elif isinstance(key, dict):
+                    self.fail("Unhashable map key")
+            if strict:
+                encoded_key = bytes(view[start:self.pos])
+                if previous_key is not None and encoded_key <= previous_key:
+                    self.fail("Map keys not in deterministic order")
+                previous_key = encoded_key
+            try:
+                duplicate = key in result
+            except (TypeError, RuntimeError):  # cbor2's CBORTag raises RuntimeError
+                self.fail("Unhashable map key")
+            if duplicate:
+                self.fail("Duplicate map key")
+            result[key] = decode()
+            count += 1
+        return result
+
+    def decode_tag(self, tag):
+        value = self.decode()
+        try:
+            if tag == 0:
+                return datetime.datetime.fromisoformat(value)
+            if tag == 1004:
+                return datetime.date.fromisoformat(value)
+            if tag in (2, 3):
+                if self.strict and (len(value) <= 8 or value[0] == 0):
+                    self.fail("Bignum not in shortest form")
+                n = int.from_bytes(value, 'big')
+                return n if tag == 2 else -1 - n
+        except CBORDecodeError:
+            raise
+        except (TypeError, ValueError):
+            self.fail(f"Invalid content for tag {tag}")
+        return CBORTag(tag, value)
+
+    def decode_simple(self, info):
+        pos = self.pos
+        view = self.view
+        try:
+            if info < 20:
+                return CBORSimpleValue(info)
+            if info == 20:
+                return False
+            if info == 21:
+                return True
+            if info == 22:
+                return None
+            if info == 23:
+                return undefined
+            if info == 24:
+                value = view[pos]
+                self.pos = pos + 1
+                if value < 32:
+                    self.fail("Invalid simple value encoding")
+                return CBORSimpleValue(value)
+            if info == 25:
+                self.pos = pos + 2
+                return _UNPACK_E(view, pos)[0]
+            if info == 26:
+                self.pos = pos + 4
+                value = _UNPACK_F(view, pos)[0]
+                if self.strict and value == value:
+                    self.check_float_width(value, '>e')
+                return value
+            if info == 27:
+                self.pos = pos + 8
+                value = _UNPACK_D(view, pos)[0]
+                if self.strict and value == value:
+                    self.check_float_width(value, '>f')
+                return value
+        except (IndexError, struct.error):
+            self.fail("Truncated float")
+        if info == 31:
+            self.fail("Unexpected break")
+        self.fail(f"Reserved simple value {info}")
+
+    def check_float_width(self, value, narrower):
+        try:
+            if struct.unpack(narrower, struct.pack(narrower, value))[0] == value:
+                self.fail("Float not in shortest form")
+        except OverflowError:
+            pass
+
+
+class CBORDecoder:
+    """
+    CBOR decoder that works in place on bytes, bytearray, memoryview or
+    mmap buffers. Byte strings (portraits, digests, embedded CBOR) are
+    returned as zero-copy memoryview slices of the input; map keys that are
+    byte strings are copied to bytes so they stay hashable.
+
+    With strict=True the input must be deterministically encoded (as
+    CBOREncoder produces): shortest-form arguments and floats, definite
+    lengths, and map keys in ascending encoded order. Use it when bytes
+    are about to be verified against a signature.
+
+    Input nested more than `max_depth` arrays, maps and tags deep raises
+    CBORDecodeError, as does any other malformed input.
+    """
+
+    @staticmethod
+    def decode(data, strict=False, max_depth=MAX_DEPTH):
+        reader = _Reader(data, strict, max_depth)
+        value = reader.decode()
+        if reader.pos != len(reader.view):
+            reader.fail("Trailing data")
+        return value
+
+    @staticmethod
+    def decode_sequence(data, strict=False, max_depth=MAX_DEPTH):
+        """Yields each item of a CBOR sequence (RFC 8742)."""
+        reader = _Reader(data, strict, max_depth)
+        while reader.pos < len(reader.view):
+            yield reader.decode()
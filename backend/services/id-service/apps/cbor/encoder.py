@@ -1,11 +1,242 @@
-import cbor2
+import datetime
+import math
+import struct
+from operator import itemgetter
+
+from cbor2 import CBORSimpleValue, CBORTag, undefined
+
+from .decoder import CBORDecoder, CBORDecodeError  # noqa: F401  (kept importable from here)
+
+
+class CBOREncodeError(ValueError):
+    """Raised for values that have no deterministic CBOR encoding."""
+
+
+# Single-byte heads for arguments 0..23, per major type
+_SMALL_HEADS = [[bytes(((major << 5) | n,)) for n in range(24)] for major in range(8)]
+_PACK_H = struct.Struct('>BH').pack
+_PACK_I = struct.Struct('>BI').pack
+_PACK_Q = struct.Struct('>BQ').pack
+
+
+def _head(major, n):
+    """Initial byte plus argument in its shortest form (RFC 8949 §4.2.1)."""
+    if n < 24:
+        return _SMALL_HEADS[major][n]
+    mt = major << 5
+    if n < 0x100:
+        return bytes((mt | 24, n))
+    if n < 0x10000:
+        return _PACK_H(mt | 25, n)
+    if n < 0x100000000:
+        return _PACK_I(mt | 26, n)
+    return _PACK_Q(mt | 27, n)
+
+
+def _float_bytes(value):
+    """Shortest of half/single/double precision that preserves the value."""
+    if value != value:
+        return b'\xf9\x7e\x00'
+    if math.isinf(value):
+        return b'\xf9\x7c\x00' if value > 0 else b'\xf9\xfc\x00'
+    try:
+        half = struct.pack('>e', value)
+        if struct.unpack('>e', half)[0] == value:
+            return b'\xf9' + half
+    except OverflowError:
+        pass
+    try:
+        single = struct.pack('>f', value)
+        if struct.unpack('>f', single)[0] == value:
+            return b'\xfa' + single
+    except OverflowError:
+        pass
+    return b'\xfb' + struct.pack('>d', value)
+
+
+class _CanonicalWriter:
+    """
+    Encodes into a bytearray and, when given a writer, flushes it every
+    `chunk_size` bytes. Byte strings of `direct_size` or more go straight
+    to the writer instead of being copied into the buffer.
+    """
+
+    def __init__(self, fp=None, chunk_size=64 * 1024, direct_size=16 * 1024):
+        self.fp = fp
+        self.buf = bytearray()
+        self.chunk_size = chunk_size
+        self.direct_size = direct_size
+
+    def encode(self, value):
+        encoder = self.ENCODERS.get(type(value))
+        if encoder is None:
+            encoder = self._encoder_for(value)
+        encoder(self, value)
+
+    def _encoder_for(self, value):
+        if value is undefined:
+            return _CanonicalWriter.encode_undefined
+        if isinstance(value, CBORSimpleValue):
+            return _CanonicalWriter.encode_simple
+        # Subclasses of the supported types (IntEnum, OrderedDict, ...)
+        for kind in (bool, int, str, bytes, bytearray, float, dict, list, tuple, datetime.datetime, datetime.date):
+            if isinstance(value, kind):
+                return self.ENCODERS[kind]
+        raise CBOREncodeError(f"Cannot CBOR-encode {type(value).__name__}")
+
+    def maybe_flush(self):
+        if self.fp is not None and len(self.buf) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.fp is not None and self.buf:
+            self.fp.write(self.buf)
+            self.buf = bytearray()
+
+    def encode_int(self, value):
+        if value >= 0:
+            if value < 0x10000000000000000:
+                self.buf += _head(0, value)
+                return
+            self.encode_tag(CBORTag(2, value.to_bytes((value.bit_length() + 7) // 8, 'big')))
+            return
+        n = -1 - value
+        if n < 0x10000000000000000:
+            self.buf += _head(1, n)
+            return
+        self.encode_tag(CBORTag(3, n.to_bytes((n.bit_length() + 7) // 8, 'big')))
+
+    def encode_bool(self, value):
+        self.buf += b'\xf5' if value else b'\xf4'
+
+    def encode_none(self, value):
+        self.buf += b'\xf6'
+
+    def encode_undefined(self, value):
+        self.buf += b'\xf7'
+
+    def encode_simple(self, value):
+        n = value.value
+        if n < 24:
+            self.buf += _SMALL_HEADS[7][n]
+        elif 32 <= n < 256:
+            self.buf += bytes((0xf8, n))
+        else:
+            # 24..31 are reserved: RFC 8949 §3.3 forbids them in the two-byte form
+            raise CBOREncodeError(f"Invalid simple value {n}")
+
+    def encode_float(self, value):
+        self.buf += _float_bytes(value)
+
+    def encode_str(self, value):
+        data = value.encode('utf-8')
+        self.buf += _head(3, len(data))
+        self.buf += data
+
+    def encode_bytes(self, value):
+        if isinstance(value, memoryview) and (value.format != 'B' or value.ndim != 1):
+            value = value.cast('B')
+        self.buf += _head(2, len(value))
+        if self.fp is not None and len(value) >= self.direct_size:
+            self.flush()
+            self.fp.write(value)
+        else:
+            self.buf += value
+            self.maybe_flush()
+
+    def encode_array(self, value):
+        self.buf += _head(4, len(value))
+        encode = self.encode
+        for item in value:
+            encode(item)
+        self.maybe_flush()
+
+    def encode_map(self, value):
+        # Keys sort by the bytewise order of their own encodings
+        items = sorted(((_encode_key(k), v) for k, v in value.items()), key=itemgetter(0))
+        for i in range(1, len(items)):
+            if items[i][0] == items[i - 1][0]:
+                raise CBOREncodeError("Duplicate map key after encoding")
+        self.buf += _head(5, len(items))
+        encode = self.encode
+        for key, item in items:
+            self.buf += key
+            encode(item)
+        self.maybe_flush()
+
+    def encode_tag(self, value):
+        self.buf += _head(6, value.tag)
+        self.encode(value.value)
+
+    def encode_datetime(self, value):
+        # tdate (tag 0), always UTC: "2026-01-31T12:00:00Z"
+        if value.tzinfo is None:
+            raise CBOREncodeError("Naive datetimes have no deterministic encoding; attach a timezone")
+        value = value.astimezone(datetime.timezone.utc)
+        text = value.strftime('%Y-%m-%dT%H:%M:%S')
+        if value.microsecond:
+            text += f".{value.microsecond:06d}".rstrip('0')
+        self.buf += b'\xc0'
+        self.encode_str(text + 'Z')
+
+    def encode_date(self, value):
+        # full-date (tag 1004): "2026-01-31"
+        self.buf += b'\xd9\x03\xec'
+        self.encode_str(value.isoformat())
+
+    ENCODERS = {
+        int: encode_int,
+        bool: encode_bool,
+        str: encode_str,
+        bytes: encode_bytes,
+        bytearray: encode_bytes,
+        memoryview: encode_bytes,
+        float: encode_float,
+        list: encode_array,
+        tuple: encode_array,
+        dict: encode_map,
+        type(None): encode_none,
+        CBORTag: encode_tag,
+        datetime.datetime: encode_datetime,
+        datetime.date: encode_date,
+    }
+
+
+def _encode_key(key):
+    # Text and small-int keys dominate mDoc maps; skip the writer for them
+    if type(key) is str:
+        data = key.encode('utf-8')
+        return _head(3, len(data)) + data
+    if type(key) is int and -0x10000000000000000 <= key < 0x10000000000000000:
+        return _head(0, key) if key >= 0 else _head(1, -1 - key)
+    return CBOREncoder.encode(key)
+
 
 class CBOREncoder:
+    """
+    Deterministic CBOR (RFC 8949 §4.2.1 core requirements): shortest-form
+    arguments, definite lengths only, map keys sorted by their encoded
+    bytes, and the shortest float width that preserves the value. The same
+    data always encodes to the same bytes, which is what signatures need.
+
+    Supported: int (with bignums), bool, None, float, str, bytes-likes,
+    list/tuple, dict, aware datetime (tag 0), date (tag 1004), cbor2's
+    CBORTag, CBORSimpleValue and undefined.
+    """
+
     @staticmethod
     def encode(data):
-        return cbor2.dumps(data)
+        writer = _CanonicalWriter()
+        writer.encode(data)
+        return bytes(writer.buf)
 
-class CBORDecoder:
     @staticmethod
-    def decode(data):
-        return cbor2.loads(data)
+    def encode_to(data, fp, chunk_size=64 * 1024):
+        """
+        Streams the encoding of `data` to `fp` (anything with write()) in
+        chunks of about `chunk_size` bytes. Large byte strings such as
+        portraits are written through without an intermediate copy.
+        """
+        writer = _CanonicalWriter(fp, chunk_size=chunk_size)
+        writer.encode(data)
+        writer.flush()
@@ -0,0 +1,116 @@
+import datetime
+
+from cbor2 import CBORTag
+from django.test import SimpleTestCase
+
+from .decoder import MAX_DEPTH, CBORDecodeError, CBORDecoder
+from .encoder import CBOREncoder
+
+
+class CBORRoundTripTests(SimpleTestCase):
+    def test_encoded_values_decode_strictly(self):
+        value = {
+            'family_name': 'Doe',
+            'age_over_18': True,
+            'height': 182,
+            'balance': -1_000_000_000_000,
+            'ratio': 1.5,
+            'portrait': b'\xff\xd8\xff',
+            'birth_date': datetime.date(1990, 1, 2),
+            'codes': [1, [2, 3], {'a': None}],
+            1: 'integer key',
+        }
+        decoded = CBORDecoder.decode(CBOREncoder.encode(value), strict=True)
+        decoded['portrait'] = bytes(decoded['portrait'])
+        self.assertEqual(decoded, value)
+
+    def test_byte_strings_are_views_of_the_input(self):
+        data = CBOREncoder.encode([b'portrait'])
+        [portrait] = CBORDecoder.decode(data)
+        self.assertIsInstance(portrait, memoryview)
+        self.assertEqual(bytes(portrait), b'portrait')
+
+
+class CBORStrictModeTests(SimpleTestCase):
+    """Inputs a lenient decoder accepts but which are not deterministically encoded."""
+
+    NON_DETERMINISTIC = {
+        'argument not in shortest form': bytes.fromhex('1817'),         # 23 in one extra byte
+        'wide argument not in shortest form': bytes.fromhex('190017'),
+        'indefinite-length array': bytes.fromhex('9f0102ff'),
+        'indefinite-length byte string': bytes.fromhex('5f4101ff'),
+        'map keys out of order': bytes.fromhex('a2616201616101'),       # {"b": 1, "a": 1}
+        'float not in shortest form': bytes.fromhex('fb3ff8000000000000'),  # 1.5 as a double
+        'bignum that fits in an integer': bytes.fromhex('c24101'),
+    }
+
+    def test_lenient_mode_accepts_non_deterministic_input(self):
+        for name, data in self.NON_DETERMINISTIC.items():
+            with self.subTest(name):
+                CBORDecoder.decode(data)
+
+    def test_strict_mode_rejects_non_deterministic_input(self):
+        for name, data in self.NON_DETERMINISTIC.items():
+            with self.subTest(name), self.assertRaises(CBORDecodeError):
+                CBORDecoder.decode(data, strict=True)
+
+
+class CBORMalformedInputTests(SimpleTestCase):
+    MALFORMED = {
+        'empty input': b'',
+        'truncated argument': bytes.fromhex('19'),
+        'truncated string': bytes.fromhex('636162'),
+        'truncated array': bytes.fromhex('8201'),
+        'reserved additional info': bytes.fromhex('1c'),
+        'trailing data': bytes.fromhex('0000'),
+        'unexpected break': bytes.fromhex('ff'),
+        'unterminated indefinite array': bytes.fromhex('9f01'),
+        'indefinite-length integer': bytes.fromhex('1f'),
+        'indefinite-length tag': bytes.fromhex('df00'),
+        'invalid UTF-8': bytes.fromhex('62c328'),
+        'invalid UTF-8 in chunks': bytes.fromhex('7f61c3ff'),
+        'foreign chunk in indefinite string': bytes.fromhex('5f6161ff'),
+        'duplicate map key': bytes.fromhex('a2616101616102'),
+        'map as a map key': bytes.fromhex('a1a0a0'),
+        'tag as a map key': bytes.fromhex('a1c1a000'),
+        'invalid tag 0 content': bytes.fromhex('c001'),
+        'invalid tag 1004 content': bytes.fromhex('d903ec63616263'),
+        'simple value below 32 in two bytes': bytes.fromhex('f810'),
+    }
+
+    def test_malformed_input_raises_decode_error(self):
+        for name, data in self.MALFORMED.items():
+            with self.subTest(name), self.assertRaises(CBORDecodeError):
+                CBORDecoder.decode(data)
+
+
+class CBORDepthLimitTests(SimpleTestCase):
+    @staticmethod
+    def nested_arrays(depth):
+        return b'\x81' * depth + b'\x00'
+
+    def test_nesting_up_to_the_limit_is_accepted(self):
+        value = CBORDecoder.decode(self.nested_arrays(MAX_DEPTH))
+        for _ in range(MAX_DEPTH):
+            value = value[0]
+        self.assertEqual(value, 0)
+
+    def test_nesting_past_the_limit_is_rejected(self):
+        with self.assertRaisesRegex(CBORDecodeError, 'Nesting too deep'):
+            CBORDecoder.decode(self.nested_arrays(MAX_DEPTH + 1))
+
+    def test_maps_and_tags_count_towards_the_limit(self):
+        data = (b'\xa1\x00' + b'\xc1') * 3 + b'\x00'  # {0: 1({0: 1({0: 1(0)})})}
+        self.assertIsInstance(CBORDecoder.decode(data, max_depth=6)[0], CBORTag)
+        with self.assertRaisesRegex(CBORDecodeError, 'Nesting too deep'):
+            CBORDecoder.decode(data, max_depth=5)
+
+    def test_hostile_depth_fails_cleanly(self):
+        for data in (b'\x9f' * 100_000, b'\x81' * 100_000 + b'\x00', b'\xc1' * 100_000 + b'\x00'):
+            with self.subTest(prefix=data[:1]), self.assertRaises(CBORDecodeError):
+                CBORDecoder.decode(data)
+
+    def test_sequence_decoding_applies_the_limit(self):
+        data = b'\x00' + self.nested_arrays(4)
+        with self.assertRaises(CBORDecodeError):
+            list(CBORDecoder.decode_sequence(data, max_depth=3))
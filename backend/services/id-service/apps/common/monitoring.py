@@ -58,11 +58,13 @@ class MonitorMetricsView(APIView):
     throttle_classes = [] 
 
     def get(self, request):
+        from apps.digital_id.services.iprs_client import iprs_client
         return Response({
             "maintenance_mode": state.maintenance_mode,
             "total_requests": state.total_requests,
             "error_count": state.error_count,
-            "recent_traffic": list(state.requests)
+            "recent_traffic": list(state.requests),
+            "iprs_client": iprs_client.metrics()
         })
 
 class MonitorControlView(APIView):
@@ -1,8 +1,153 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cbor2 import CBORTag
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from apps.cbor.encoder import CBOREncoder
+from .utils import (
+    COSE_SIGN1_TAG, ECDSA_ALGORITHMS, EDDSA, HEADER_ALG, HEADER_KID, HEADER_X5CHAIN,
+    algorithm_for_key, der_to_raw, key_id, sig_structure,
+)
+
+SigningKey = namedtuple('SigningKey', ['kid', 'alg', 'private_key'])
+
+# Parsed issuer keys, loaded once per process
+_keys_by_kid = {}
+_kids_by_path = {}
+_key_lock = threading.Lock()
+
+
+def load_signing_key(key_path, password=None):
+    """
+    Loads a PEM or DER private key (P-256/384/521 or Ed25519) and caches
+    it by key ID. Later calls for the same path return the cached key.
+    """
+    path = os.path.abspath(key_path)
+    kid = _kids_by_path.get(path)
+    if kid is None:
+        with _key_lock:
+            kid = _kids_by_path.get(path)
+            if kid is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if isinstance(password, str):
+                    password = password.encode()
+                if b'-----BEGIN' in data:
+                    private_key = serialization.load_pem_private_key(data, password=password)
+                else:
+                    private_key = serialization.load_der_private_key(data, password=password)
+                alg = algorithm_for_key(private_key)
+                kid = key_id(private_key.public_key())
+                _keys_by_kid[kid] = SigningKey(kid, alg, private_key)
+                _kids_by_path[path] = kid
+    return _keys_by_kid[kid]
+
+
+def get_signing_key(kid):
+    """Cached key for `kid`, or None if it has not been loaded in this process."""
+    return _keys_by_kid.get(kid)
+
+
+# Per-process signer for ProcessPoolExecutor workers
+_worker_signer = None
+
+
+def _init_worker(key_path, password, x5chain):
+    global _worker_signer
+    _worker_signer = Signer(key_path, password=password, x5chain=x5chain)
+
+
+def _sign_chunk(payloads, external_aad):
+    return [_worker_signer.sign(payload, external_aad) for payload in payloads]
+
+
 class Signer:
-    def __init__(self, key_path):
+    """
+    COSE_Sign1 (RFC 9052) signer for ES256/ES384/ES512 and EdDSA.
+    The algorithm follows the key type; the key ID goes in the unprotected
+    header, with the optional x5chain (DER certificate, or a list of them)
+    as ISO 18013-5 issuerAuth requires.
+    """
+
+    def __init__(self, key_path, password=None, x5chain=None):
         self.key_path = key_path
+        self.password = password
+        self.x5chain = x5chain
+        self._key = None
+        self._protected = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def key(self):
+        if self._key is None:
+            key = load_signing_key(self.key_path, self.password)
+            self._protected = CBOREncoder.encode({HEADER_ALG: key.alg})
+            self._key = key
+        return self._key
+
+    @property
+    def kid(self):
+        return self.key.kid
+
+    def _signature(self, to_be_signed):
+        key = self.key
+        if key.alg == EDDSA:
+            return key.private_key.sign(to_be_signed)
+        hash_cls, size = ECDSA_ALGORITHMS[key.alg]
+        return der_to_raw(key.private_key.sign(to_be_signed, ec.ECDSA(hash_cls())), size)
+
+    def sign_message(self, payload, external_aad=b'', unprotected=None):
+        """Returns the untagged [protected, unprotected, payload, signature] array."""
+        key = self.key
+        headers = {HEADER_KID: key.kid}
+        if self.x5chain:
+            headers[HEADER_X5CHAIN] = self.x5chain
+        if unprotected:
+            headers.update(unprotected)
+        signature = self._signature(sig_structure(self._protected, payload, external_aad))
+        return [self._protected, headers, payload, signature]
+
+    def sign(self, payload, external_aad=b'', unprotected=None):
+        """Returns the encoded, tagged COSE_Sign1 message."""
+        return CBOREncoder.encode(CBORTag(COSE_SIGN1_TAG, self.sign_message(payload, external_aad, unprotected)))
+
+    def sign_many(self, payloads, external_aad=b'', workers=None, use_processes=False, chunk_size=64):
+        """
+        Signs a batch of payloads (e.g. encoded MSOs) and returns the
+        encoded COSE_Sign1 messages in input order. Threads share this
+        process's cached key. With use_processes=True a persistent pool
+        is used, and each worker loads the key once when it starts.
+        """
+        payloads = list(payloads)
+        if len(payloads) <= chunk_size:
+            return [self.sign(payload, external_aad) for payload in payloads]
+
+        chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+        if use_processes:
+            results = self._process_pool(workers).map(_sign_chunk, chunks, [external_aad] * len(chunks))
+        else:
+            self.key  # Load once before fanning out
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                results = list(pool.map(lambda chunk: [self.sign(p, external_aad) for p in chunk], chunks))
+        return [message for chunk in results for message in chunk]
+
+    def _process_pool(self, workers):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=workers or os.cpu_count(),
+                        initializer=_init_worker,
+                        initargs=(self.key_path, self.password, self.x5chain),
+                    )
+        return self._pool
 
-    def sign(self, payload):
-        # Placeholder for COSE signing logic
-        # In reality, load private key and sign structure
-        return b"cose_signature_stub"
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
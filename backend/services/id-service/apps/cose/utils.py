@@ -0,0 +1,77 @@
+import hashlib
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+
+from apps.cbor.encoder import CBOREncoder
+
+# COSE header labels (RFC 9052 §3.1)
+HEADER_ALG = 1
+HEADER_KID = 4
+HEADER_X5CHAIN = 33
+
+# CBOR tag for COSE_Sign1
+COSE_SIGN1_TAG = 18
+
+# COSE algorithm IDs -> (hash, coordinate size in bytes); EdDSA hashes internally
+ES256, ES384, ES512, EDDSA = -7, -35, -36, -8
+ECDSA_ALGORITHMS = {
+    ES256: (hashes.SHA256, 32),
+    ES384: (hashes.SHA384, 48),
+    ES512: (hashes.SHA512, 66),
+}
+CURVE_ALGORITHMS = {'secp256r1': ES256, 'secp384r1': ES384, 'secp521r1': ES512}
+
+
+class COSEError(ValueError):
+    """Raised for unusable keys and malformed COSE structures."""
+
+
+def algorithm_for_key(key):
+    """COSE algorithm ID for a private or public key."""
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return EDDSA
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        alg = CURVE_ALGORITHMS.get(key.curve.name)
+        if alg is not None:
+            return alg
+    raise COSEError(f"Unsupported key type {type(key).__name__}")
+
+
+def key_id(public_key):
+    """8-byte key ID: SHA-256 of the SubjectPublicKeyInfo, truncated."""
+    spki = public_key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return hashlib.sha256(spki).digest()[:8]
+
+
+def sig_structure(protected, payload, external_aad=b''):
+    """Encoded Sig_structure for COSE_Sign1 (RFC 9052 §4.4)."""
+    return CBOREncoder.encode(['Signature1', protected, external_aad, payload])
+
+
+def cose_key(public_key):
+    """COSE_Key map (RFC 9053 §7) for an EC2 or Ed25519 public key."""
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {1: 1, -1: 6, -2: raw}  # kty OKP, crv Ed25519, x
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        curve = {'secp256r1': 1, 'secp384r1': 2, 'secp521r1': 3}.get(public_key.curve.name)
+        if curve is None:
+            raise COSEError(f"Unsupported curve {public_key.curve.name}")
+        numbers = public_key.public_numbers()
+        size = (public_key.curve.key_size + 7) // 8
+        return {1: 2, -1: curve, -2: numbers.x.to_bytes(size, 'big'), -3: numbers.y.to_bytes(size, 'big')}
+    raise COSEError(f"Unsupported key type {type(public_key).__name__}")
+
+
+def der_to_raw(signature, size):
+    """DER ECDSA signature -> fixed-width r || s as COSE requires."""
+    r, s = decode_dss_signature(signature)
+    return r.to_bytes(size, 'big') + s.to_bytes(size, 'big')
+
+
+def raw_to_der(signature, size):
+    if len(signature) != 2 * size:
+        raise COSEError("Bad ECDSA signature length")
+    return encode_dss_signature(int.from_bytes(signature[:size], 'big'), int.from_bytes(signature[size:], 'big'))
@@ -0,0 +1,274 @@
+import datetime
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from cbor2 import CBORTag
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature, UnsupportedAlgorithm
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from apps.cbor.decoder import CBORDecoder, CBORDecodeError
+from .utils import (
+    COSE_SIGN1_TAG, ECDSA_ALGORITHMS, EDDSA, HEADER_ALG, HEADER_KID, HEADER_X5CHAIN,
+    COSEError, algorithm_for_key, key_id, raw_to_der, sig_structure,
+)
+
+# COSE_Sign1 is a tagged array of headers and byte strings; headers may
+# hold an x5chain array but nothing deeper is legitimate
+MAX_DEPTH = 8
+
+TrustedKey = namedtuple('TrustedKey', ['kid', 'alg', 'public_key', 'chain', 'expires_at'])
+VerificationResult = namedtuple('VerificationResult', ['valid', 'kid', 'payload', 'error'])
+
+
+class TrustedKeyCache:
+    """
+    Parsed public keys keyed by key ID, each kept for `ttl` seconds (or
+    until its certificate expires, if sooner).
+
+    Keys come either from add_key() or from a document's x5chain, which is
+    validated against the IACA trust anchors once and then cached under
+    the leaf's key ID. Later documents signed by the same key skip both
+    certificate parsing and chain validation.
+    """
+
+    def __init__(self, ttl=3600, trust_anchors=()):
+        self.ttl = ttl
+        self._keys = {}
+        self._anchors = {}
+        self._by_certificate = {}  # SHA-256 of leaf DER -> kid
+        self._lock = threading.Lock()
+        for anchor in trust_anchors:
+            self.add_trust_anchor(anchor)
+
+    def add_trust_anchor(self, certificate):
+        """Adds an IACA root (x509.Certificate, PEM or DER bytes)."""
+        certificate = _load_certificate(certificate)
+        with self._lock:
+            self._anchors[certificate.subject.public_bytes()] = certificate
+
+    def add_key(self, public_key, kid=None, ttl=None):
+        """Trusts a bare public key, e.g. this service's own issuer key."""
+        kid = kid or key_id(public_key)
+        entry = TrustedKey(kid, algorithm_for_key(public_key), public_key, (), time.monotonic() + (ttl or self.ttl))
+        with self._lock:
+            self._keys[kid] = entry
+        return entry
+
+    def get(self, kid):
+        entry = self._keys.get(kid)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            with self._lock:
+                if self._keys.get(kid) is entry:
+                    del self._keys[kid]
+            return None
+        return entry
+
+    def resolve(self, kid, x5chain=None):
+        """
+        Trusted key for a message. With an `x5chain` (DER, leaf first) the
+        leaf certificate decides: it is validated against the trust anchors
+        on first sight and cached. Without one, `kid` must already be cached.
+        Raises COSEError if no trusted key can be found.
+        """
+        if not x5chain:
+            entry = self.get(kid) if kid else None
+            if entry is None:
+                raise COSEError("Unknown key ID and no certificate chain")
+            return entry
+
+        # With a chain, the leaf certificate (not the kid hint) picks the key
+        fingerprint = hashlib.sha256(_leaf_der(x5chain)).digest()
+        kid = self._by_certificate.get(fingerprint)
+        entry = self.get(kid) if kid else None
+        if entry is not None:
+            return entry
+
+        # Certificates parse lazily, so a malformed one can fail at any step
+        try:
+            chain = [_load_certificate(der) for der in ([x5chain] if isinstance(x5chain, (bytes, memoryview)) else x5chain)]
+            self._validate_chain(chain)
+            leaf_key = chain[0].public_key()
+            leaf_kid = key_id(leaf_key)
+            remaining = (chain[0].not_valid_after_utc - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            entry = TrustedKey(leaf_kid, algorithm_for_key(leaf_key), leaf_key, tuple(chain),
+                               time.monotonic() + min(self.ttl, remaining))
+        except COSEError:
+            raise
+        except (ValueError, TypeError, x509.InvalidVersion, UnsupportedAlgorithm) as e:
+            raise COSEError(f"Invalid certificate in x5chain: {e}")
+        with self._lock:
+            self._keys[leaf_kid] = entry
+            self._by_certificate[fingerprint] = leaf_kid
+        return entry
+
+    def _validate_chain(self, chain):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for certificate in chain:
+            if not certificate.not_valid_before_utc <= now <= certificate.not_valid_after_utc:
+                raise COSEError(f"Certificate {certificate.subject.rfc4514_string()} is not currently valid")
+        anchor = self._anchors.get(chain[-1].issuer.public_bytes())
+        if anchor is None:
+            raise COSEError("Certificate chain does not end at a trusted IACA root")
+        # Every issuing certificate must be a CA, within its path length
+        issuers = chain[1:] + ([anchor] if chain[-1] != anchor else [])
+        for below, issuer in enumerate(issuers):
+            try:
+                constraints = issuer.extensions.get_extension_for_class(x509.BasicConstraints).value
+            except x509.ExtensionNotFound:
+                constraints = None
+            if constraints is None or not constraints.ca:
+                raise COSEError(f"Certificate {issuer.subject.rfc4514_string()} is not a CA")
+            if constraints.path_length is not None and below > constraints.path_length:
+                raise COSEError(f"Certificate {issuer.subject.rfc4514_string()} exceeds its path length")
+        try:
+            for certificate, issuer in zip(chain, chain[1:]):
+                certificate.verify_directly_issued_by(issuer)
+            if chain[-1] != anchor:
+                chain[-1].verify_directly_issued_by(anchor)
+        except InvalidSignature:
+            raise COSEError("Invalid certificate chain: bad issuer signature")
+        except (ValueError, TypeError) as e:
+            raise COSEError(f"Invalid certificate chain: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._by_certificate.clear()
+
+
+def _load_certificate(data):
+    if isinstance(data, x509.Certificate):
+        return data
+    data = bytes(data)
+    if b'-----BEGIN' in data:
+        return x509.load_pem_x509_certificate(data)
+    return x509.load_der_x509_certificate(data)
+
+
+def _leaf_der(x5chain):
+    if not x5chain:
+        return None
+    return bytes(x5chain if isinstance(x5chain, (bytes, memoryview)) else x5chain[0])
+
+
+class COSEVerifier:
+    """
+    COSE_Sign1 verification against a TrustedKeyCache.
+
+    verify_many() parses every message, resolves each distinct signer once,
+    and checks the signatures in chunks over a thread pool. The
+    cryptography package has no Ed25519 batch (multi-scalar) verification,
+    so each Ed25519 signature is checked on its own; the batch gain comes
+    from skipping per-document key and certificate work.
+    """
+
+    def __init__(self, key_cache):
+        self.key_cache = key_cache
+
+    @staticmethod
+    def _parse(message):
+        """Returns (protected_bytes, alg, kid, x5chain, payload, signature)."""
+        if not isinstance(message, (list, tuple, CBORTag)):
+            message = CBORDecoder.decode(message, max_depth=MAX_DEPTH)
+        if isinstance(message, CBORTag):
+            if message.tag != COSE_SIGN1_TAG:
+                raise COSEError(f"Not a COSE_Sign1 message (tag {message.tag})")
+            message = message.value
+        if not isinstance(message, (list, tuple)) or len(message) != 4:
+            raise COSEError("COSE_Sign1 must be a 4-element array")
+
+        protected, unprotected, payload, signature = message
+        if not isinstance(protected, (bytes, memoryview)) or not isinstance(unprotected, dict):
+            raise COSEError("Malformed COSE headers")
+        if not isinstance(signature, (bytes, memoryview)):
+            raise COSEError("COSE_Sign1 signature must be a byte string")
+        if payload is not None and not isinstance(payload, (bytes, memoryview)):
+            raise COSEError("COSE_Sign1 payload must be a byte string or nil")
+        protected = bytes(protected)
+        protected_headers = CBORDecoder.decode(protected, max_depth=MAX_DEPTH) if protected else {}
+        if not isinstance(protected_headers, dict):
+            raise COSEError("Malformed COSE headers")
+        kid = protected_headers.get(HEADER_KID, unprotected.get(HEADER_KID))
+        if kid is not None and not isinstance(kid, (bytes, memoryview)):
+            raise COSEError("Key ID must be a byte string")
+        x5chain = protected_headers.get(HEADER_X5CHAIN, unprotected.get(HEADER_X5CHAIN))
+        if x5chain is not None and not isinstance(x5chain, (bytes, memoryview)) and not (
+                isinstance(x5chain, list) and x5chain and all(isinstance(der, (bytes, memoryview)) for der in x5chain)):
+            raise COSEError("x5chain must be a byte string or a non-empty array of them")
+        return (protected, protected_headers.get(HEADER_ALG), bytes(kid) if kid is not None else None,
+                x5chain, payload, bytes(signature))
+
+    @staticmethod
+    def _check(entry, alg, protected, payload, signature, external_aad):
+        if alg != entry.alg:
+            raise COSEError(f"Algorithm {alg} does not match key ({entry.alg})")
+        to_be_verified = sig_structure(protected, payload, external_aad)
+        try:
+            if alg == EDDSA:
+                entry.public_key.verify(signature, to_be_verified)
+            else:
+                hash_cls, size = ECDSA_ALGORITHMS[alg]
+                entry.public_key.verify(raw_to_der(signature, size), to_be_verified, ec.ECDSA(hash_cls()))
+        except InvalidSignature:
+            raise COSEError("Signature mismatch")
+
+    def verify(self, message, external_aad=b'', detached_payload=None):
+        return self.verify_many([message], external_aad, detached_payload and [detached_payload])[0]
+
+    def verify_many(self, messages, external_aad=b'', detached_payloads=None, workers=None, chunk_size=256):
+        """
+        Verifies COSE_Sign1 messages (encoded bytes or decoded arrays) and
+        returns a VerificationResult per message, in input order.
+        """
+        parsed = []
+        for i, message in enumerate(messages):
+            try:
+                protected, alg, kid, x5chain, payload, signature = self._parse(message)
+                if payload is None and detached_payloads:
+                    payload = detached_payloads[i]
+                if payload is None:
+                    raise COSEError("Missing payload")
+                if not isinstance(payload, (bytes, memoryview)):
+                    raise COSEError("Detached payload must be bytes")
+                parsed.append((protected, alg, kid, x5chain, bytes(payload), signature))
+            except (COSEError, CBORDecodeError) as e:
+                parsed.append(e)
+
+        # One key/certificate resolution per distinct signer
+        keys = {}
+        for item in parsed:
+            if isinstance(item, Exception):
+                continue
+            kid, x5chain = item[2], item[3]
+            signer = _leaf_der(x5chain) or kid
+            if signer not in keys:
+                try:
+                    keys[signer] = self.key_cache.resolve(kid, x5chain)
+                except COSEError as e:
+                    keys[signer] = e
+
+        def check(item):
+            if isinstance(item, Exception):
+                return VerificationResult(False, None, None, str(item))
+            protected, alg, kid, x5chain, payload, signature = item
+            entry = keys[_leaf_der(x5chain) or kid]
+            if isinstance(entry, Exception):
+                return VerificationResult(False, kid, None, str(entry))
+            try:
+                self._check(entry, alg, protected, payload, signature, external_aad)
+            except COSEError as e:
+                return VerificationResult(False, entry.kid, None, str(e))
+            return VerificationResult(True, entry.kid, payload, None)
+
+        if len(parsed) <= chunk_size:
+            return [check(item) for item in parsed]
+        chunks = [parsed[i:i + chunk_size] for i in range(0, len(parsed), chunk_size)]
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            return [result for chunk in pool.map(lambda c: [check(item) for item in c], chunks) for result in chunk]
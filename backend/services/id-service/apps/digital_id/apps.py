@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class DigitalIdConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.digital_id'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,122 @@
+"""
+Async versions of the IPRS-bound endpoints, routed in place of the DRF
+views when ASYNC_VIEWS is on (the default under id_service/asgi.py).
+
+Waiting on IPRS holds no worker thread. Analytics reads IPRS and the
+local counters concurrently, and PDF rendering runs in the document
+process pool, so the event loop stays free while a card is drawn.
+"""
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.log import log_response
+
+from .services.async_iprs_client import async_iprs_client
+from .services.batch_service import DocumentBatchService, render_chunk
+from .services.iprs_client import IPRSUnavailable
+from .services.pdf_cache import get_pdf_cache
+from .services.stats_service import StatsService, iprs_analytics
+from .views import DigitalIDViewSet, DocumentViewSet, not_modified, tag_response
+
+
+def require_GET(view):
+    """
+    django.views.decorators.http.require_GET for coroutine views (Django
+    4.2's wraps them in a sync function). HEAD is allowed too, as DRF does.
+    """
+    @functools.wraps(view)
+    async def inner(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = HttpResponseNotAllowed(['GET', 'HEAD'])
+            log_response("Method Not Allowed (%s): %s", request.method, request.path,
+                         response=response, request=request)
+            return response
+        return await view(request, *args, **kwargs)
+    return inner
+
+
+async def _render(doc_type, citizen_id, citizen_data):
+    cache = get_pdf_cache()
+    key = cache.key(doc_type, citizen_data)
+    # The disk tier reads, writes and evicts files: keep it off the event loop
+    pdf = await sync_to_async(cache.get, thread_sensitive=False)(key)
+    if pdf is None:
+        loop = asyncio.get_running_loop()
+        pool = DocumentBatchService._get_process_pool()
+        [(_, pdf)] = await loop.run_in_executor(pool, render_chunk, doc_type, 'single', [(citizen_id, citizen_data)])
+        await sync_to_async(cache.put, thread_sensitive=False)(key, pdf)
+    return pdf
+
+
+async def _render_document(request, download=False):
+    doc_type = request.GET.get('type')
+    citizen_id = request.GET.get('citizen_id')
+
+    citizen_data = None
+    if citizen_id:
+        try:
+            citizen_data = await async_iprs_client.get_citizen(citizen_id)
+        except IPRSUnavailable:
+            pass
+    if not citizen_data:
+        return JsonResponse({"error": "Citizen not found"}, status=404)
+
+    if doc_type not in DocumentViewSet.FILENAME_PREFIXES:
+        return JsonResponse({"error": "Invalid document type"}, status=400)
+
+    etag = f'"{get_pdf_cache().key(doc_type, citizen_data)}"'
+    response = not_modified(request, etag)
+    if response is None:
+        pdf = await _render(doc_type, citizen_id, citizen_data)
+        filename = f"{DocumentViewSet.FILENAME_PREFIXES[doc_type]}_{citizen_id}.pdf"
+        response = tag_response(DocumentViewSet._generate_response(pdf, filename, download=download), etag)
+    # Embedded in the dashboard iframe
+    response.xframe_options_exempt = True
+    return response
+
+
+@require_GET
+async def document_preview(request):
+    return await _render_document(request)
+
+
+@require_GET
+async def document_download(request):
+    return await _render_document(request, download=True)
+
+
+def _proxy_response(result):
+    response = JsonResponse(result.data, status=result.status_code, safe=False)
+    if result.stale:
+        # Served from the last good copy while IPRS is unreachable
+        response['Warning'] = '110 - "Response is Stale"'
+    return response
+
+
+@require_GET
+async def citizen_list(request):
+    try:
+        result = await async_iprs_client.get('', params=request.GET.dict())
+    except IPRSUnavailable:
+        return JsonResponse({"error": "IPRS Service Down"}, status=503)
+    return _proxy_response(result)
+
+
+@require_GET
+async def citizen_detail(request, pk):
+    try:
+        result = await async_iprs_client.get(f"{pk}/")
+    except IPRSUnavailable:
+        return JsonResponse({"error": "IPRS Service Down"}, status=503)
+    return _proxy_response(result)
+
+
+@require_GET
+async def digital_id_analytics(request):
+    counters, iprs_stats = await asyncio.gather(
+        sync_to_async(StatsService.snapshot)(),
+        iprs_analytics.aget(),
+    )
+    return JsonResponse(DigitalIDViewSet.analytics_payload(counters, iprs_stats))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.digital_id.services.revocation_service import RevocationService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the revocation status list from DigitalID statuses. Run once after "
+        "deploying, and after bulk status updates that bypass model signals."
+    )
+
+    def handle(self, *args, **options):
+        corrected = RevocationService.rebuild()
+        if not corrected:
+            self.stdout.write(self.style.SUCCESS("Status list in sync"))
+            return
+        self.stdout.write(self.style.WARNING(f"Corrected {corrected} status bit(s)"))
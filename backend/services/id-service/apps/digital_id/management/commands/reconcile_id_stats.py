@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.digital_id.services.stats_service import StatsService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the dashboard counters from the DigitalID and IssuanceRequest "
+        "tables and corrects any drift. Schedule it periodically (e.g. cron every 15 minutes)."
+    )
+
+    def handle(self, *args, **options):
+        drift = StatsService.reconcile()
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Counters in sync"))
+            return
+        for name, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{name}: {stored} -> {actual}")
+        self.stdout.write(self.style.WARNING(f"Corrected {len(drift)} counter(s)"))
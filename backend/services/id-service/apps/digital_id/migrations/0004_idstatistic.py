@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_counters(apps, schema_editor):
+    DigitalID = apps.get_model('digital_id', 'DigitalID')
+    IssuanceRequest = apps.get_model('digital_id', 'IssuanceRequest')
+    IDStatistic = apps.get_model('digital_id', 'IDStatistic')
+
+    counts = {
+        'digital_ids.total': DigitalID.objects.count(),
+        'requests.total': IssuanceRequest.objects.count(),
+    }
+    for row in DigitalID.objects.values('status').annotate(n=Count('id')):
+        counts[f"digital_ids.status.{row['status']}"] = row['n']
+    for row in IssuanceRequest.objects.values('status').annotate(n=Count('id')):
+        counts[f"requests.status.{row['status']}"] = row['n']
+    IDStatistic.objects.bulk_create([IDStatistic(name=k, value=v) for k, v in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digital_id', '0003_digitalid_document_type_digitalid_national_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IDStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digital_id', '0004_idstatistic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField()),
+            ],
+        ),
+    ]
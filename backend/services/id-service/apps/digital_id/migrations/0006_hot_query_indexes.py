@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:52
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def suspend_duplicate_active(apps, schema_editor):
+    """
+    Legacy rows may hold several ACTIVE documents of one type for a citizen.
+    Keep the newest active and suspend the rest so the constraint can be added.
+    """
+    DigitalID = apps.get_model('digital_id', 'DigitalID')
+    IDStatistic = apps.get_model('digital_id', 'IDStatistic')
+
+    duplicates = (
+        DigitalID.objects.filter(status='ACTIVE')
+        .values('citizen_id', 'document_type')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+    )
+    suspended = 0
+    for dup in duplicates:
+        ids = list(
+            DigitalID.objects.filter(status='ACTIVE', citizen_id=dup['citizen_id'], document_type=dup['document_type'])
+            .order_by('-issuance_date', '-id')
+            .values_list('id', flat=True)
+        )
+        suspended += DigitalID.objects.filter(id__in=ids[1:]).update(status='SUSPENDED')
+
+    if suspended:
+        print(f"Suspended {suspended} duplicate ACTIVE documents")
+        IDStatistic.objects.filter(name='digital_ids.status.ACTIVE').update(value=F('value') - suspended)
+        counter, _ = IDStatistic.objects.get_or_create(name='digital_ids.status.SUSPENDED')
+        IDStatistic.objects.filter(pk=counter.pk).update(value=F('value') + suspended)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digital_id', '0005_documentnumbersequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='digitalid',
+            index=models.Index(fields=['citizen_id', 'document_type', 'status'], name='digitalid_citizen_type_status'),
+        ),
+        migrations.AddIndex(
+            model_name='issuancerequest',
+            index=models.Index(fields=['status', 'request_date'], name='issuancereq_status_date'),
+        ),
+        migrations.RunPython(suspend_duplicate_active, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='digitalid',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'ACTIVE')), fields=('citizen_id', 'document_type'), name='digitalid_one_active_per_type'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digital_id', '0006_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('size', models.BigIntegerField(default=0)),
+                ('data', models.BinaryField(default=b'')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatusListDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+                ('index', models.BigIntegerField()),
+                ('revoked', models.BooleanField()),
+                ('status_list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deltas', to='digital_id.statuslist')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status_list', 'version'], name='statuslistdelta_list_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digital_id', '0007_status_list'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issuancerequest',
+            index=models.Index(fields=['request_date', 'id'], name='issuancereq_date_id'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digital_id', '0008_issuancerequest_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=32, unique=True)),
+                ('status', models.CharField(default='RUNNING', max_length=10)),
+                ('document_type', models.CharField(max_length=20)),
+                ('layout', models.CharField(max_length=10)),
+                ('total', models.IntegerField()),
+                ('rendered', models.IntegerField(default=0)),
+                ('failed', models.JSONField(default=list)),
+                ('started_at', models.FloatField(db_index=True)),
+                ('finished_at', models.FloatField(null=True)),
+            ],
+        ),
+    ]
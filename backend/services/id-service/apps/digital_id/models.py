@@ -24,9 +24,29 @@ class DigitalID(models.Model):
     public_key = models.TextField()
     doc_type = models.CharField(max_length=50, default='org.iso.18013.5.1.mDL')
 
+    class Meta:
+        indexes = [
+            # Issuance existence check: citizen + type + status
+            models.Index(fields=['citizen_id', 'document_type', 'status'], name='digitalid_citizen_type_status'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['citizen_id', 'document_type'],
+                condition=models.Q(status='ACTIVE'),
+                name='digitalid_one_active_per_type',
+            ),
+        ]
+
     def __str__(self):
         return f"ID-{self.citizen_id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the persisted status so signal handlers can see transitions
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
 class IssuanceRequest(models.Model):
     citizen_id = models.CharField(max_length=20)
     doc_type = models.CharField(max_length=50) # DRIVING_LICENSE, PASSPORT, etc.
@@ -34,5 +54,90 @@ class IssuanceRequest(models.Model):
     status = models.CharField(max_length=20, default='PENDING') # PENDING, APPROVED, REJECTED
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Request queues: filter by status, oldest first
+            models.Index(fields=['status', 'request_date'], name='issuancereq_status_date'),
+            # Unfiltered listing: newest first, keyset-paginated on (request_date, id)
+            models.Index(fields=['request_date', 'id'], name='issuancereq_date_id'),
+        ]
+
     def __str__(self):
         return f"REQ-{self.citizen_id}-{self.doc_type}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+class IDStatistic(models.Model):
+    """
+    Incrementally maintained counters backing the dashboard analytics.
+    Kept in step by signal handlers and corrected by `reconcile_id_stats`.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+class DocumentNumberSequence(models.Model):
+    """
+    Per-document-type counter from which issuers lease blocks of numbers.
+    See services.sequence_allocator.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}@{self.next_value}"
+
+class StatusList(models.Model):
+    """
+    Revocation status list: bit i is set when the credential with index i
+    (the DigitalID primary key) is suspended or revoked. `data` holds the
+    zlib-compressed bit string; see services.revocation_service.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    size = models.BigIntegerField(default=0)  # bits
+    data = models.BinaryField(default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}@v{self.version}"
+
+class StatusListDelta(models.Model):
+    """One bit change, recorded so verifiers can catch up without a full download."""
+    status_list = models.ForeignKey(StatusList, on_delete=models.CASCADE, related_name='deltas')
+    version = models.BigIntegerField()  # list version the change produced
+    index = models.BigIntegerField()
+    revoked = models.BooleanField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status_list', 'version'], name='statuslistdelta_list_version'),
+        ]
+
+    def __str__(self):
+        return f"{self.status_list_id}@v{self.version}:{self.index}={int(self.revoked)}"
+
+class DocumentBatchJob(models.Model):
+    """
+    Progress of one streamed document batch, kept in the database so any
+    worker can answer batch/<job_id>/ polls. See services.batch_service.
+    """
+    job_id = models.CharField(max_length=32, unique=True)
+    status = models.CharField(max_length=10, default='RUNNING')  # RUNNING, COMPLETED, CANCELLED, FAILED
+    document_type = models.CharField(max_length=20)
+    layout = models.CharField(max_length=10)
+    total = models.IntegerField()
+    rendered = models.IntegerField(default=0)
+    failed = models.JSONField(default=list)  # citizen IDs not rendered
+    started_at = models.FloatField(db_index=True)  # epoch seconds, as reported to clients
+    finished_at = models.FloatField(null=True)
+
+    def __str__(self):
+        return f"BATCH-{self.job_id}-{self.status}"
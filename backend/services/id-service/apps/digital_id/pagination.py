@@ -0,0 +1,23 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: each page is a bounded index range scan
+    from the last key seen, so deep pages cost the same as the first.
+    Viewsets set `ordering` to an indexed column.
+    """
+    page_size = settings.LIST_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.LIST_MAX_PAGE_SIZE
+    ordering = '-id'
+
+
+class DigitalIDPagination(KeysetPagination):
+    ordering = '-id'
+
+
+class IssuanceRequestPagination(KeysetPagination):
+    # Newest first; ties on request_date are broken by the cursor offset
+    ordering = ('-request_date', '-id')
@@ -0,0 +1,57 @@
+import asyncio
+import weakref
+
+import httpx
+
+from .iprs_client import IPRSCall, iprs_client
+
+
+class AsyncIPRSClient:
+    """
+    asyncio counterpart of IPRSClient for the ASGI views.
+
+    Deadline, retry/backoff and stale-copy rules are the same (both drive
+    an IPRSCall), and the circuit breaker, stale responses and counters are
+    shared with the wrapped sync client, so both paths agree on IPRS
+    health. Only the transport differs: one pooled httpx.AsyncClient per
+    event loop, and a waiting request holds no thread.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._http_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+    def _http(self):
+        loop = asyncio.get_running_loop()
+        http = self._http_clients.get(loop)
+        if http is None:
+            size = self.client.pool_size
+            http = httpx.AsyncClient(limits=httpx.Limits(max_connections=size, max_keepalive_connections=size))
+            self._http_clients[loop] = http
+        return http
+
+    async def get(self, path='', params=None, deadline=None):
+        """Same contract as IPRSClient.get()."""
+        client = self.client
+        call = IPRSCall(client, path, params, deadline)
+        while call.pending():
+            with client.tracking():
+                try:
+                    response, error = await self._http().get(call.url, params=params, timeout=call.timeout), None
+                except httpx.HTTPError as e:
+                    response, error = None, e
+            delay = call.record(response, error)
+            if delay:
+                await asyncio.sleep(delay)
+        return call.result()
+
+    async def get_citizen(self, citizen_id):
+        """Returns the citizen record, or None if IPRS does not know the ID."""
+        result = await self.get(f"{citizen_id}/")
+        return result.data if result.status_code == 200 else None
+
+    async def get_analytics(self):
+        return (await self.get('analytics/')).data
+
+
+async_iprs_client = AsyncIPRSClient(iprs_client)
@@ -0,0 +1,288 @@
+import inspect
+import io
+import json
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from ..models import DocumentBatchJob
+from .iprs_client import iprs_client, IPRSUnavailable
+from .pdf_service import DOCUMENT_DRAWERS, DOCUMENT_GENERATORS, FILENAME_PREFIXES, StaticLayerCanvas
+
+
+class BatchLimitExceeded(Exception):
+    """Raised when the per-process cap on concurrent batches is reached."""
+
+
+def render_chunk(doc_type, layout, citizens):
+    """
+    Runs in a pool process. `citizens` is a list of (citizen_id, data).
+    Returns a list of (filename, pdf_bytes): one file per citizen for the
+    'single' layout, or one multi-page file sharing the static layers for
+    the 'merged' layout.
+    """
+    prefix = FILENAME_PREFIXES[doc_type]
+    if layout == 'single':
+        generate = DOCUMENT_GENERATORS[doc_type]
+        return [(f"{prefix}_{citizen_id}.pdf", generate(data)) for citizen_id, data in citizens]
+
+    draw = DOCUMENT_DRAWERS[doc_type]
+    buffer = io.BytesIO()
+    c = StaticLayerCanvas(buffer)
+    for _, data in citizens:
+        draw(c, data)
+    c.save()
+    first, last = citizens[0][0], citizens[-1][0]
+    return [(f"{prefix}_{first}-{last}.pdf", buffer.getvalue())]
+
+
+class _ZipStream:
+    """Write-only file object that hands over whatever zipfile wrote so far."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _BatchStream:
+    """
+    Iterable handed to StreamingHttpResponse. Django calls close() once the
+    response is done (or abandoned), which releases the batch slot even if
+    the generator never started. A job whose generator never started has
+    no finally block to record its end, so close() calls `abandon` for it.
+    """
+
+    def __init__(self, release, abandon):
+        self.generator = None
+        self._release = release
+        self._abandon = abandon
+        self._released = False
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self.generator
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._release()
+
+    def close(self):
+        started = inspect.getgeneratorstate(self.generator) != inspect.GEN_CREATED
+        self.generator.close()
+        if not started:
+            self._abandon()
+        self.release()
+
+    def as_async(self):
+        """
+        The same stream as an async iterator, for ASGI. Django 4.2 would
+        otherwise collect a sync iterator into a list before sending it.
+        """
+        return _AsyncBatchStream(self)
+
+
+class _AsyncBatchStream:
+    """Async iterator over a _BatchStream that renders each chunk in a worker thread."""
+
+    _DONE = object()
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._next = sync_to_async(next)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await self._next(self._stream.generator, self._DONE)
+        if chunk is self._DONE:
+            raise StopAsyncIteration
+        return chunk
+
+    def close(self):
+        self._stream.close()
+
+
+class DocumentBatchService:
+    """
+    Bulk document generation for printing centres.
+
+    Citizen records are fetched from IPRS over the pooled client and the
+    PDFs are rendered across a process pool. Finished files are streamed out
+    as a ZIP in completion order. Only a bounded window of chunks is ever in
+    flight, so memory stays flat however large the batch is. Progress is
+    kept in a DocumentBatchJob row, so a poll can land on any worker; rows
+    older than PROGRESS_TTL are deleted as new batches start.
+    """
+    LAYOUTS = ('single', 'merged')
+    PROGRESS_TTL = 60 * 60
+
+    _process_pool = None
+    _pool_lock = threading.Lock()
+    _slots = threading.BoundedSemaphore(settings.DOCUMENT_BATCH_MAX_CONCURRENT)
+
+    @classmethod
+    def _get_process_pool(cls):
+        if cls._process_pool is None:
+            with cls._pool_lock:
+                if cls._process_pool is None:
+                    cls._process_pool = ProcessPoolExecutor(max_workers=settings.DOCUMENT_BATCH_WORKERS)
+        return cls._process_pool
+
+    PROGRESS_FIELDS = ('job_id', 'status', 'document_type', 'layout', 'total', 'rendered', 'failed',
+                       'started_at', 'finished_at')
+
+    @classmethod
+    def get_progress(cls, job_id):
+        return DocumentBatchJob.objects.filter(
+            job_id=job_id, started_at__gte=time.time() - cls.PROGRESS_TTL
+        ).values(*cls.PROGRESS_FIELDS).first()
+
+    @classmethod
+    def _save_progress(cls, progress):
+        fields = {name: progress[name] for name in cls.PROGRESS_FIELDS if name != 'job_id'}
+        DocumentBatchJob.objects.update_or_create(job_id=progress['job_id'], defaults=fields)
+
+    @classmethod
+    def _abandon(cls, progress):
+        """Records a job whose response was never read (client gone before the first byte)."""
+        progress['status'] = 'CANCELLED'
+        progress['finished_at'] = time.time()
+        cls._save_progress(progress)
+
+    @classmethod
+    def start(cls, citizen_ids, doc_type, layout='single'):
+        """
+        Reserves a batch slot and returns (job_id, iterator of ZIP bytes).
+        Raises BatchLimitExceeded when too many batches are already running.
+        """
+        if not cls._slots.acquire(blocking=False):
+            raise BatchLimitExceeded("Too many document batches in progress")
+
+        job_id = uuid.uuid4().hex
+        progress = {
+            'job_id': job_id,
+            'status': 'RUNNING',
+            'document_type': doc_type,
+            'layout': layout,
+            'total': len(citizen_ids),
+            'rendered': 0,
+            'failed': [],
+            'started_at': time.time(),
+            'finished_at': None,
+        }
+        try:
+            DocumentBatchJob.objects.filter(started_at__lt=time.time() - cls.PROGRESS_TTL).delete()
+            cls._save_progress(progress)
+        except Exception:
+            cls._slots.release()
+            raise
+        stream = _BatchStream(cls._slots.release, lambda: cls._abandon(progress))
+        stream.generator = cls._stream(progress, citizen_ids, doc_type, layout, stream.release)
+        return job_id, stream
+
+    @staticmethod
+    def _fetch_and_render(pool, doc_type, layout, chunk):
+        """
+        Runs in a fetch thread: pulls the chunk from IPRS, then renders it in
+        a pool process. Returns (files, rendered_count, missing_ids).
+        """
+        citizens = []
+        missing = []
+        for citizen_id in chunk:
+            try:
+                data = iprs_client.get_citizen(citizen_id)
+            except IPRSUnavailable:
+                data = None
+            if data:
+                citizens.append((citizen_id, data))
+            else:
+                missing.append(citizen_id)
+        files = pool.submit(render_chunk, doc_type, layout, citizens).result() if citizens else []
+        return files, len(citizens), missing
+
+    @classmethod
+    def _stream(cls, progress, citizen_ids, doc_type, layout, release):
+        chunk_size = 1 if layout == 'single' else settings.DOCUMENT_BATCH_CHUNK_SIZE
+        chunks = iter([citizen_ids[i:i + chunk_size] for i in range(0, len(citizen_ids), chunk_size)])
+        window = settings.DOCUMENT_BATCH_WORKERS * 2
+
+        out = _ZipStream()
+        # PDFs are already Flate-compressed; storing them avoids a second pass
+        archive = zipfile.ZipFile(out, mode='w', compression=zipfile.ZIP_STORED)
+        fetchers = ThreadPoolExecutor(max_workers=window)
+        pending = {}
+        try:
+            pool = cls._get_process_pool()
+            while True:
+                for chunk in chunks:
+                    pending[fetchers.submit(cls._fetch_and_render, pool, doc_type, layout, chunk)] = chunk
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    try:
+                        files, rendered, missing = future.result()
+                    except Exception as e:
+                        print(f"Document batch {progress['job_id']} chunk failed: {e}")
+                        progress['failed'].extend(chunk)
+                        continue
+                    for filename, pdf in files:
+                        archive.writestr(filename, pdf)
+                        yield out.drain()
+                    progress['rendered'] += rendered
+                    progress['failed'].extend(missing)
+                cls._save_progress(progress)
+
+            archive.writestr('manifest.json', json.dumps({
+                'job_id': progress['job_id'],
+                'document_type': doc_type,
+                'layout': layout,
+                'total': progress['total'],
+                'rendered': progress['rendered'],
+                'failed': progress['failed'],
+            }, indent=2))
+            archive.close()
+            yield out.drain()
+            progress['status'] = 'COMPLETED'
+        except GeneratorExit:
+            # Client went away; stop queuing work
+            progress['status'] = 'CANCELLED'
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+            fetchers.shutdown(wait=False, cancel_futures=True)
+            if progress['status'] == 'RUNNING':
+                progress['status'] = 'FAILED'
+            progress['finished_at'] = time.time()
+            cls._save_progress(progress)
+            release()
@@ -0,0 +1,293 @@
+import contextlib
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+IPRSResult = namedtuple('IPRSResult', ['status_code', 'data', 'stale'])
+
+
+class IPRSUnavailable(Exception):
+    """Raised when IPRS cannot be reached and no stale copy is available."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker (CLOSED -> OPEN -> HALF_OPEN).
+    While OPEN every call fails fast; after `reset_timeout` seconds a single
+    probe call is let through and its outcome decides the next state.
+    """
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class IPRSCall:
+    """
+    The deadline, retry, breaker and stale-copy policy of one IPRS GET,
+    independent of the transport. IPRSClient and AsyncIPRSClient drive it
+    the same way and only differ in how they send and sleep:
+
+        call = IPRSCall(client, path, params, deadline)
+        while call.pending():
+            response = GET call.url with call.timeout (None on transport error)
+            sleep for call.record(response, error)
+        return call.result()
+    """
+
+    def __init__(self, client, path, params, deadline):
+        self.client = client
+        self.url = client.base_url + path
+        self.key = (self.url, tuple(sorted((params or {}).items())))
+        self.timeout = None
+        self.attempt = 0
+        self.answer = None
+        self.reason = 'IPRS request failed'
+        self.expires = time.monotonic() + (deadline or client.deadline)
+        client._incr('calls')
+        self.open = not client.breaker.allow()
+        if self.open:
+            client._incr('short_circuited')
+            self.reason = 'IPRS circuit open'
+        self.done = self.open
+
+    def pending(self):
+        """True if another attempt should be made; sets `timeout` for it."""
+        if self.done:
+            return False
+        remaining = self.expires - time.monotonic()
+        if remaining <= 0:
+            self.reason = 'IPRS deadline exceeded'
+            self.done = True
+            return False
+        self.timeout = min(self.client.timeout, remaining)
+        return True
+
+    def record(self, response, error=None):
+        """
+        Takes the outcome of an attempt (a requests or httpx response, or
+        None and the transport error). Returns the seconds to back off
+        before the next attempt, or 0.
+        """
+        client = self.client
+        if response is not None and response.status_code < 500:
+            client.breaker.record_success()
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+            if response.status_code == 200:
+                client._remember(self.key, data)
+            self.answer = IPRSResult(response.status_code, data, False)
+            self.done = True
+            return 0
+        self.reason = f"IPRS returned {response.status_code}" if response is not None else f"IPRS connection error: {error}"
+        if self.attempt >= client.max_retries:
+            self.done = True
+            return 0
+        self.attempt += 1
+        client._incr('retries')
+        # Full jitter: sleep U(0, base * 2^attempt), never past the deadline
+        backoff = random.uniform(0, client.backoff_base * (2 ** self.attempt))
+        return max(0.0, min(backoff, self.expires - time.monotonic()))
+
+    def result(self):
+        """The IPRSResult, a stale copy if IPRS failed, or IPRSUnavailable."""
+        if self.answer is not None:
+            return self.answer
+        if not self.open:
+            self.client._incr('failures')
+            self.client.breaker.record_failure()
+        return self.client._stale_or_raise(self.key, self.reason)
+
+
+class IPRSClient:
+    """
+    Shared, process-wide client for the IPRS registry.
+
+    - Keep-alive connection pooling through a single requests.Session.
+    - Per-call deadline covering all attempts, not just one socket read.
+    - Bounded retries with full-jitter exponential backoff on connection
+      errors and 5xx responses.
+    - Circuit breaker that fails fast while IPRS is down and serves the last
+      good response (stale) when one is available.
+    """
+
+    def __init__(self, base_url, timeout=3.0, deadline=5.0, max_retries=2,
+                 backoff_base=0.1, pool_size=20, failure_threshold=5,
+                 reset_timeout=30.0, stale_entries=1024):
+        self.base_url = base_url.rstrip('/') + '/'
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self._stale = OrderedDict()
+        self._stale_entries = stale_entries
+        self._lock = threading.Lock()
+        self._session = None
+        self._in_flight = 0
+        self._counters = {
+            'calls': 0,
+            'failures': 0,
+            'retries': 0,
+            'short_circuited': 0,
+            'stale_served': 0,
+        }
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def _incr(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._stale[key] = data
+            self._stale.move_to_end(key)
+            while len(self._stale) > self._stale_entries:
+                self._stale.popitem(last=False)
+
+    def _stale_or_raise(self, key, reason):
+        with self._lock:
+            data = self._stale.get(key)
+        if data is None:
+            raise IPRSUnavailable(reason)
+        self._incr('stale_served')
+        return IPRSResult(200, data, True)
+
+    @contextlib.contextmanager
+    def tracking(self):
+        """Counts a request as in flight for metrics()."""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get(self, path='', params=None, deadline=None):
+        """
+        GET `path` relative to the citizens endpoint.
+        Returns an IPRSResult; raises IPRSUnavailable when IPRS is down and
+        nothing cached can stand in for it.
+        """
+        call = IPRSCall(self, path, params, deadline)
+        while call.pending():
+            with self.tracking():
+                try:
+                    response, error = self.session.get(call.url, params=params, timeout=call.timeout), None
+                except requests.RequestException as e:
+                    response, error = None, e
+            delay = call.record(response, error)
+            if delay:
+                time.sleep(delay)
+        return call.result()
+
+    def get_citizen(self, citizen_id):
+        """Returns the citizen record, or None if IPRS does not know the ID."""
+        result = self.get(f"{citizen_id}/")
+        return result.data if result.status_code == 200 else None
+
+    def get_analytics(self):
+        return self.get('analytics/').data
+
+    def metrics(self):
+        pools = []
+        if self._session is not None:
+            adapter = self._session.get_adapter(self.base_url)
+            for pool_key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(pool_key)
+                if pool is None:
+                    continue
+                pools.append({
+                    'host': pool.host,
+                    'port': pool.port,
+                    'connections_opened': pool.num_connections,
+                    'requests_sent': pool.num_requests,
+                    # Unused slots in the urllib3 queue are None placeholders
+                    'idle_connections': sum(1 for conn in list(pool.pool.queue) if conn) if pool.pool else 0,
+                    'max_size': self.pool_size,
+                })
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+            stale_entries = len(self._stale)
+        return {
+            'breaker': {
+                'state': self.breaker.state,
+                'consecutive_failures': self.breaker.failures,
+                'times_opened': self.breaker.times_opened,
+            },
+            'in_flight': in_flight,
+            'pools': pools,
+            'stale_entries': stale_entries,
+            **counters,
+        }
+
+
+iprs_client = IPRSClient(
+    base_url=settings.IPRS_URL,
+    timeout=settings.IPRS_TIMEOUT,
+    deadline=settings.IPRS_DEADLINE,
+    max_retries=settings.IPRS_MAX_RETRIES,
+    pool_size=settings.IPRS_POOL_SIZE,
+    failure_threshold=settings.IPRS_BREAKER_THRESHOLD,
+    reset_timeout=settings.IPRS_BREAKER_RESET,
+)
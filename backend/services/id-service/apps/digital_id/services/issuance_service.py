@@ -1,9 +1,50 @@
 from ..models import DigitalID
+from .sequence_allocator import allocator
+from .stats_service import StatsService
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 import datetime
 
+# Document number format per type; NATIONAL_ID numbers derive from the citizen ID
+NUMBER_FORMATS = {
+    'PASSPORT': "A{n}",
+    'DRIVING_LICENSE': "DL-{n}",
+}
+
 class IssuanceService:
     @staticmethod
+    def _document_numbers(citizen_ids, doc_type):
+        """
+        Returns {citizen_id: document_number}. Passport/licence numbers come
+        from the block allocator; a National ID is ID-<citizen_id>, with an
+        allocated suffix when a previous (revoked/suspended) card already
+        holds that number.
+        """
+        if doc_type == 'NATIONAL_ID':
+            wanted = {cid: f"ID-{cid}" for cid in citizen_ids}
+            taken = set(DigitalID.objects.filter(national_id__in=wanted.values()).values_list('national_id', flat=True))
+            clashes = [cid for cid, number in wanted.items() if number in taken]
+            for cid, n in zip(clashes, allocator.take(doc_type, len(clashes))):
+                wanted[cid] = f"ID-{cid}-{n}"
+            return wanted
+
+        template = NUMBER_FORMATS.get(doc_type, "DOC-{n}")
+        numbers = allocator.take(doc_type, len(citizen_ids))
+        return {cid: template.format(n=n) for cid, n in zip(citizen_ids, numbers)}
+
+    @staticmethod
+    def _new_id(citizen_id, doc_number, doc_type):
+        # Mocking cryptographic keys for now
+        return DigitalID(
+            citizen_id=citizen_id,
+            national_id=doc_number,
+            document_type=doc_type,
+            expiry_date=timezone.now() + datetime.timedelta(days=365*10), # 10 years
+            public_key="mock_pub_key_12345",
+            doc_type="org.iso.18013.5.1.mDL", # Technical standard
+            status='ACTIVE'
+        )
+
     @staticmethod
     def issue_id(citizen_id, doc_type='NATIONAL_ID'):
         # 1. Check if ID already exists
@@ -16,28 +57,23 @@ class IssuanceService:
                 'document_number': existing_id.national_id
             }
 
-        # 2. Persist new Digital ID
-        # Generate a mock unique ID number based on type
-        import random
-        if doc_type == 'NATIONAL_ID':
-            doc_number = f"ID-{citizen_id}" # Or random
-        elif doc_type == 'PASSPORT':
-            doc_number = f"A{random.randint(1000000, 9999999)}"
-        elif doc_type == 'DRIVING_LICENSE':
-            doc_number = f"DL-{random.randint(1000000, 9999999)}"
-        else:
-            doc_number = f"DOC-{random.randint(1000, 9999)}"
-
-        # Mocking cryptographic keys for now
-        new_id = DigitalID.objects.create(
-            citizen_id=citizen_id,
-            national_id=doc_number,
-            document_type=doc_type,
-            expiry_date=timezone.now() + datetime.timedelta(days=365*10), # 10 years
-            public_key="mock_pub_key_12345",
-            doc_type="org.iso.18013.5.1.mDL", # Technical standard
-            status='ACTIVE'
-        )
+        # 2. Persist new Digital ID with a collision-free number
+        doc_number = IssuanceService._document_numbers([citizen_id], doc_type)[citizen_id]
+        new_id = IssuanceService._new_id(citizen_id, doc_number, doc_type)
+        try:
+            with transaction.atomic():
+                new_id.save()
+        except IntegrityError:
+            # A concurrent request issued it first (one ACTIVE per citizen and type)
+            existing_id = DigitalID.objects.filter(citizen_id=citizen_id, document_type=doc_type, status='ACTIVE').first()
+            if existing_id is None:
+                raise
+            return {
+                'status': 'exists',
+                'citizen_id': citizen_id,
+                'message': f'Active {doc_type} already exists',
+                'document_number': existing_id.national_id
+            }
 
         return {
             'status': 'issued',
@@ -46,3 +82,49 @@ class IssuanceService:
             'document_number': new_id.national_id,
             'message': f'{doc_type} issued and persisted successfully'
         }
+
+    @staticmethod
+    def bulk_issue(citizen_ids, doc_type='NATIONAL_ID', batch_size=500):
+        """
+        Issues `doc_type` to many citizens at once for re-issuance campaigns.
+        One query finds citizens who already hold an active document, numbers
+        are drawn from the allocator up front, and the rest are inserted with
+        bulk_create inside a single transaction.
+        """
+        # De-duplicate while keeping the campaign order
+        citizen_ids = list(dict.fromkeys(str(cid) for cid in citizen_ids))
+
+        for attempt in range(2):
+            # 1. One query for every citizen that already holds an active document
+            existing = dict(
+                DigitalID.objects.filter(citizen_id__in=citizen_ids, document_type=doc_type, status='ACTIVE')
+                .values_list('citizen_id', 'national_id')
+            )
+            to_issue = [cid for cid in citizen_ids if cid not in existing]
+
+            # 2. Numbers are allocated before the transaction opens (see SequenceAllocator)
+            numbers = IssuanceService._document_numbers(to_issue, doc_type)
+
+            # 3. Insert in one transaction; bulk_create skips signals, so bump counters here
+            new_ids = [IssuanceService._new_id(cid, numbers[cid], doc_type) for cid in to_issue]
+            try:
+                with transaction.atomic():
+                    DigitalID.objects.bulk_create(new_ids, batch_size=batch_size)
+                    StatsService.apply({
+                        'digital_ids.total': len(new_ids),
+                        'digital_ids.status.ACTIVE': len(new_ids),
+                        'digital_ids.changes': len(new_ids),
+                    })
+                break
+            except IntegrityError:
+                # Another issuer got to some of these citizens first; re-check once
+                if attempt:
+                    raise
+
+        return {
+            'status': 'completed',
+            'document_type': doc_type,
+            'issued': [{'citizen_id': cid, 'document_number': numbers[cid]} for cid in to_issue],
+            'existing': [{'citizen_id': cid, 'document_number': number} for cid, number in existing.items()],
+            'message': f'{len(to_issue)} {doc_type} issued, {len(existing)} already active'
+        }
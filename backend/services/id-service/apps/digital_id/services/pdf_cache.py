@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+
+class MemoryLRU:
+    """Byte-bounded in-process LRU of rendered PDFs."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DiskCache:
+    """
+    On-disk tier shared by every worker on the host.
+    Entries live under `<root>/<template_version>/`. Directories of other
+    template versions are left in place, since during a rolling deploy old
+    and new workers share the root; they count towards `max_bytes` and, no
+    longer being hit, are the first to go. When the tier grows past
+    `max_bytes` the least recently used files (by mtime, bumped on hit) are
+    deleted down to LOW_WATER of it, so the directory scan this takes runs
+    once per that much new data rather than on every write.
+    """
+    LOW_WATER = 0.9
+
+    def __init__(self, root, template_version, max_bytes):
+        self.root = Path(root)
+        self.dir = self.root / template_version
+        self.max_bytes = max_bytes
+        self._size = None  # Lazily scanned, then tracked incrementally
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.dir / key[:2] / f"{key}.pdf"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        try:
+            replaced = path.stat().st_size  # e.g. two workers rendering the same document
+        except OSError:
+            replaced = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"PDF cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += len(data) - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _scan(self):
+        entries = []
+        for path in self.root.glob('*/*/*.pdf'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                target = self.max_bytes * self.LOW_WATER
+                entries.sort()
+                for _, size, path in entries:
+                    try:
+                        path.unlink()
+                    except OSError:
+                        continue
+                    total -= size
+                    if total <= target:
+                        break
+            self._size = total
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            self._size = None
+
+
+class PDFCache:
+    """
+    Content-addressed cache for generated identity documents.
+
+    The key is a SHA-256 over the normalized citizen record, the document
+    type and the template version, so the same citizen data always maps to
+    the same PDF and bumping PDFService.TEMPLATE_VERSION invalidates every
+    entry without an explicit flush.
+    """
+
+    def __init__(self, template_version, disk_dir, memory_bytes, disk_bytes):
+        self.template_version = template_version
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk = DiskCache(disk_dir, template_version, disk_bytes) if disk_dir else None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(citizen_data):
+        """Canonical JSON for the citizen record: sorted keys, stripped strings."""
+        def clean(value):
+            if isinstance(value, dict):
+                return {str(k): clean(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [clean(v) for v in value]
+            if isinstance(value, str):
+                return value.strip()
+            return value
+        return json.dumps(clean(citizen_data), sort_keys=True, separators=(',', ':'), default=str)
+
+    def key(self, doc_type, citizen_data):
+        digest = hashlib.sha256()
+        digest.update(self.template_version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(doc_type.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(self.normalize(citizen_data).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Cached PDF for a key() or None; counts the hit or miss."""
+        pdf = self.memory.get(key)
+        if pdf is None and self.disk is not None:
+            pdf = self.disk.get(key)
+            if pdf is not None:
+                self.memory.put(key, pdf)
+        if pdf is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return pdf
+
+    def put(self, key, pdf):
+        self.memory.put(key, pdf)
+        if self.disk is not None:
+            self.disk.put(key, pdf)
+
+    def get_or_render(self, doc_type, citizen_data, render):
+        """Returns the cached PDF for this citizen/document, rendering it on a miss."""
+        key = self.key(doc_type, citizen_data)
+        pdf = self.get(key)
+        if pdf is None:
+            pdf = render(citizen_data)
+            self.put(key, pdf)
+        return pdf
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from .pdf_service import PDFService
+                _cache = PDFCache(
+                    template_version=PDFService.TEMPLATE_VERSION,
+                    disk_dir=settings.PDF_CACHE_DIR,
+                    memory_bytes=settings.PDF_CACHE_MEMORY_BYTES,
+                    disk_bytes=settings.PDF_CACHE_DISK_BYTES,
+                )
+    return _cache
@@ -1,11 +1,18 @@
 import io
+from functools import lru_cache
+from reportlab import rl_config
 from reportlab.pdfgen import canvas
+from reportlab.pdfgen.pathobject import PDFPathObject
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import inch, mm
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
+# Streams are Flate-compressed only; the extra ASCII85 pass adds ~25% to the
+# file size and dominates render time with the pure-Python encoder.
+rl_config.useA85 = 0
+
 # Kenyan Flag Colors
 KENYA_BLACK = colors.black
 KENYA_RED = colors.Color(0.75, 0.05, 0.05) # Blood Red
@@ -13,7 +20,40 @@ KENYA_GREEN = colors.Color(0.0, 0.4, 0.0)  # Forest Green
 KENYA_GOLD = colors.Color(0.85, 0.65, 0.13) # Gold for Arms
 KENYA_WHITE = colors.white
 
+# Card dimensions
+ID_WIDTH, ID_HEIGHT = 85.6 * mm, 53.98 * mm  # ID-1
+PASSPORT_WIDTH, PASSPORT_HEIGHT = 125 * mm, 88 * mm
+
+
+def _over(color, background):
+    """
+    Opaque equivalent of a translucent `color` painted over a solid background.
+    ReportLab does not attach ExtGState resources to form XObjects, so alpha
+    cannot be used inside the static layers; the result is pixel-identical
+    wherever the background is a flat fill.
+    """
+    a = color.alpha
+    return colors.Color(*(a*fc + (1-a)*bc for fc, bc in zip(color.rgb(), background.rgb())))
+
+
+@lru_cache(maxsize=None)
+def _guilloche_path(x, y, width, height):
+    """
+    All guilloche waves as one path, built once per size per process.
+    The dash pattern restarts on every subpath, so a single stroke renders
+    exactly like stroking each wave separately.
+    """
+    path = PDFPathObject()
+    for i in range(0, int(height/mm), 4):
+        path.moveTo(x, y + i*mm)
+        path.curveTo(x + width/3, y + (i+5)*mm, x + 2*width/3, y + (i-5)*mm, x + width, y + i*mm)
+    return PDFPathObject(code=[path.getCode()])
+
+
 class PDFService:
+    # Bump whenever a document layout changes; cached PDFs are keyed on it.
+    TEMPLATE_VERSION = '2026.02.2'
+
     @staticmethod
     def _draw_guilloche_pattern(c, x, y, width, height, color=colors.lightgrey):
         """Draws a simulated guilloche security pattern."""
@@ -22,11 +62,7 @@ class PDFService:
         c.setLineWidth(0.3)
         c.setDash([1, 2])
         # Draw intersecting sine-like waves
-        for i in range(0, int(height/mm), 4):
-            path = c.beginPath()
-            path.moveTo(x, y + i*mm)
-            path.curveTo(x + width/3, y + (i+5)*mm, x + 2*width/3, y + (i-5)*mm, x + width, y + i*mm)
-            c.drawPath(path, stroke=1, fill=0)
+        c.drawPath(_guilloche_path(x, y, width, height), stroke=1, fill=0)
         c.restoreState()
 
     @staticmethod
@@ -48,35 +84,51 @@ class PDFService:
         c.restoreState()
 
     @staticmethod
-    def generate_national_id(citizen_data):
+    def _static_layer(c, name, draw):
         """
-        Generates a Premium National ID Card PDF (Front and Back).
-        Format: ID-1 (85.60 × 53.98 mm)
+        Paints a layer that is identical for every citizen.
+
+        On a StaticLayerCanvas (many cards in one file) the layer is defined
+        once as a form XObject and every further card only references it.
+        A standalone card paints it inline: for a one- or two-page file the
+        per-XObject overhead costs more bytes than the reuse saves.
         """
-        buffer = io.BytesIO()
-        card_width = 85.6 * mm
-        card_height = 53.98 * mm
-        c = canvas.Canvas(buffer, pagesize=(card_width, card_height))
-        
-        # --- FRONT ---
+        if not getattr(c, 'share_static_layers', False):
+            draw(c)
+            return
+        if not c.hasForm(name):
+            c.beginForm(name)
+            draw(c)
+            c.endForm()
+        c.doForm(name)
+
+    # --- Static layers ---
+
+    @staticmethod
+    def _id_background(c):
+        background = colors.Color(0.96, 0.98, 1.0)
+        c.setFillColor(background)
+        c.rect(0, 0, ID_WIDTH, ID_HEIGHT, fill=1, stroke=0)
+        PDFService._draw_guilloche_pattern(c, 0, 0, ID_WIDTH, ID_HEIGHT, _over(colors.Color(0.8, 0.85, 0.9, alpha=0.5), background))
+
+    @staticmethod
+    def _id_front_base(c):
         # 1. Background (Light Blue-Grey gradient simulation)
-        c.setFillColor(colors.Color(0.96, 0.98, 1.0))
-        c.rect(0, 0, card_width, card_height, fill=1, stroke=0)
-        PDFService._draw_guilloche_pattern(c, 0, 0, card_width, card_height, colors.Color(0.8, 0.85, 0.9, alpha=0.5))
+        PDFService._static_layer(c, 'IDBackground', PDFService._id_background)
 
         # 2. Top Banner (Kenyan Flag + Republic Text)
         c.setFillColor(colors.Color(0.9, 0.9, 0.95)) # Header background
-        c.rect(0, card_height - 12*mm, card_width, 12*mm, fill=1, stroke=0)
-        
+        c.rect(0, ID_HEIGHT - 12*mm, ID_WIDTH, 12*mm, fill=1, stroke=0)
+
         # Flag Strip on top edge
-        PDFService._draw_kenyan_flag_strip(c, 0, card_height - 3*mm, card_width, 3*mm)
-        
+        PDFService._draw_kenyan_flag_strip(c, 0, ID_HEIGHT - 3*mm, ID_WIDTH, 3*mm)
+
         c.setFont("Helvetica-Bold", 9)
         c.setFillColor(KENYA_BLACK)
-        c.drawCentredString(card_width/2, card_height - 7*mm, "REPUBLIC OF KENYA")
+        c.drawCentredString(ID_WIDTH/2, ID_HEIGHT - 7*mm, "REPUBLIC OF KENYA")
         c.setFont("Helvetica-Bold", 8)
         c.setFillColor(KENYA_RED)
-        c.drawCentredString(card_width/2, card_height - 10*mm, "NATIONAL IDENTITY CARD")
+        c.drawCentredString(ID_WIDTH/2, ID_HEIGHT - 10*mm, "NATIONAL IDENTITY CARD")
 
         # 3. Photo & Chip
         # Photo Frame
@@ -84,7 +136,7 @@ class PDFService:
         c.setLineWidth(0.5)
         c.setFillColor(colors.white)
         c.rect(3*mm, 10*mm, 26*mm, 32*mm, fill=1, stroke=1)
-        
+
         # Ghost Photo text
         c.setFont("Helvetica", 6)
         c.setFillColor(colors.lightgrey)
@@ -102,40 +154,19 @@ class PDFService:
         c.line(8.5*mm, 22*mm, 8.5*mm, 32*mm)
         c.line(12.5*mm, 22*mm, 12.5*mm, 32*mm)
 
-        # 4. Data Fields (Aligned)
-        x_labels = 32*mm
-        x_values = 58*mm
+        # Field labels
+        c.setFont("Helvetica-Bold", 6)
+        c.setFillColor(colors.darkslategrey)
         y_cursor = 37*mm
-        
-        # ID Number Highlight
-        c.setFont("Helvetica-Bold", 11)
-        KENYA_BLUE = colors.darkblue
-        c.setFillColor(KENYA_BLUE) # Official Blue
-        c.drawString(x_labels, 42*mm, f"ID: {citizen_data.get('national_id', 'N/A')}")
-        
-        # Helper for rows
-        def draw_row(label, value):
-            nonlocal y_cursor
-            c.setFont("Helvetica-Bold", 6)
-            c.setFillColor(colors.darkslategrey)
-            c.drawString(x_labels, y_cursor, label)
-            
-            c.setFont("Helvetica-Bold", 7)
-            c.setFillColor(KENYA_BLACK)
-            # Use fixed positioning for better alignment than simple offset
-            c.drawString(x_labels + 20*mm, y_cursor, str(value).upper())
+        for label in ("FULL NAMES", "GIVEN NAMES", "DATE OF BIRTH", "SEX", "DISTRICT", "DATE OF ISSUE"):
+            c.drawString(32*mm, y_cursor, label)
             y_cursor -= 4.2*mm
 
-        draw_row("FULL NAMES", f"{citizen_data.get('last_name', '')}")
-        draw_row("GIVEN NAMES", f"{citizen_data.get('first_name', '')}")
-        draw_row("DATE OF BIRTH", str(citizen_data.get('date_of_birth', '')))
-        draw_row("SEX", citizen_data.get('gender', 'M'))
-        draw_row("DISTRICT", citizen_data.get('county_of_birth', 'NAIROBI').split('-')[-1].strip().upper())
-        draw_row("DATE OF ISSUE", "03.02.2026")
-
-        # 5. Coat of Arms (Right Watermark)
+    @staticmethod
+    def _id_front_overlay(c):
+        # 5. Coat of Arms (Right Watermark) - painted over the data fields
         c.saveState()
-        c.translate(card_width - 12*mm, card_height - 18*mm)
+        c.translate(ID_WIDTH - 12*mm, ID_HEIGHT - 18*mm)
         c.setFillColor(colors.gold)
         c.circle(0, 0, 8*mm, fill=1, stroke=0)
         c.setFont("Times-Bold", 20)
@@ -146,31 +177,23 @@ class PDFService:
         # Serial Number (Bottom Right)
         c.setFont("Courier-Bold", 6)
         c.setFillColor(KENYA_RED)
-        c.drawRightString(card_width - 3*mm, 3*mm, "SERIAL 94837261")
+        c.drawRightString(ID_WIDTH - 3*mm, 3*mm, "SERIAL 94837261")
 
-        c.showPage()
-        
-        # --- BACK ---
-        c.setFillColor(colors.Color(0.96, 0.98, 1.0))
-        c.rect(0, 0, card_width, card_height, fill=1, stroke=0)
-        PDFService._draw_guilloche_pattern(c, 0, 0, card_width, card_height, colors.Color(0.8, 0.85, 0.9, alpha=0.5))
+    @staticmethod
+    def _id_back_base(c):
+        PDFService._static_layer(c, 'IDBackground', PDFService._id_background)
 
         # PDF417 Area
         c.setFillColor(colors.white)
-        c.rect(2*mm, card_height - 20*mm, card_width - 4*mm, 15*mm, fill=1, stroke=1)
+        c.rect(2*mm, ID_HEIGHT - 20*mm, ID_WIDTH - 4*mm, 15*mm, fill=1, stroke=1)
         # Mock Barcode
         c.setFillColor(KENYA_BLACK)
-        c.rect(5*mm, card_height - 18*mm, card_width - 10*mm, 10*mm, fill=1, stroke=0) 
-        c.setFillColor(colors.white)
-        c.setFont("Courier-Bold", 10)
-        c.drawCentredString(card_width/2, card_height - 14*mm, f"<{citizen_data.get('national_id', 'ID')}>")
+        c.rect(5*mm, ID_HEIGHT - 18*mm, ID_WIDTH - 10*mm, 10*mm, fill=1, stroke=0)
 
         # District/Location
         c.setFillColor(KENYA_BLACK)
         c.setFont("Helvetica-Bold", 6)
         c.drawString(5*mm, 20*mm, "DISTRICT OF BIRTH:")
-        c.setFont("Helvetica", 6)
-        c.drawString(30*mm, 20*mm, citizen_data.get('county_of_birth', 'NAIROBI').upper())
 
         c.setFont("Helvetica-Bold", 6)
         c.drawString(5*mm, 16*mm, "PLACE OF ISSUE:")
@@ -179,26 +202,17 @@ class PDFService:
 
         # Footer
         c.setFont("Helvetica-Oblique", 5)
-        c.drawCentredString(card_width/2, 5*mm, "Property of the Government of Kenya. If found, return to nearest authority.")
-
-        c.save()
-        buffer.seek(0)
-        return buffer.getvalue()
+        c.drawCentredString(ID_WIDTH/2, 5*mm, "Property of the Government of Kenya. If found, return to nearest authority.")
 
     @staticmethod
-    def generate_passport(citizen_data):
-        """
-        Generates a Passport Bio Page PDF (ICAO 9303 Compliant Layout).
-        """
-        buffer = io.BytesIO()
-        p_width = 125*mm
-        p_height = 88*mm
-        c = canvas.Canvas(buffer, pagesize=(p_width, p_height))
-        
+    def _passport_base(c):
+        p_width, p_height = PASSPORT_WIDTH, PASSPORT_HEIGHT
+
         # 1. Background Pattern (Detailed)
-        c.setFillColor(colors.Color(0.98, 0.96, 0.98)) # Off-white pinkish
+        background = colors.Color(0.98, 0.96, 0.98) # Off-white pinkish
+        c.setFillColor(background)
         c.rect(0, 0, p_width, p_height, fill=1, stroke=0)
-        PDFService._draw_guilloche_pattern(c, 0, 0, p_width, p_height, colors.Color(0.9, 0.8, 0.8, alpha=0.5))
+        PDFService._draw_guilloche_pattern(c, 0, 0, p_width, p_height, _over(colors.Color(0.9, 0.8, 0.8, alpha=0.5), background))
 
         # 2. Header
         c.setFont("Times-Bold", 10)
@@ -206,7 +220,7 @@ class PDFService:
         c.drawCentredString(p_width/2, p_height - 7*mm, "REPUBLIC OF KENYA")
         c.setFont("Times-Roman", 8)
         c.drawCentredString(p_width/2, p_height - 11*mm, "PASSPORT / PASSEPORT")
-        
+
         # Coat of Arms (Center Top)
         c.setFillColor(KENYA_GOLD)
         c.circle(p_width/2, p_height - 7*mm, 2*mm, fill=1, stroke=0) # Tiny dot simulation
@@ -216,7 +230,7 @@ class PDFService:
         c.drawString(5*mm, p_height - 16*mm, "Type/Type")
         c.drawString(20*mm, p_height - 16*mm, "Country Code/Code du pays")
         c.drawString(55*mm, p_height - 16*mm, "Passport No./No du passeport")
-        
+
         c.setFont("Helvetica-Bold", 8)
         c.drawString(5*mm, p_height - 19*mm, "P")
         c.drawString(20*mm, p_height - 19*mm, "KEN")
@@ -233,75 +247,40 @@ class PDFService:
         c.setFillColor(colors.grey)
         c.drawCentredString(19*mm, 40*mm, "PHOTO")
 
-        # 5. Data Fields (Grid Layout)
+        # 5. Field labels and the values that never change
         x_col = 38*mm
         y_cur = p_height - 25*mm
-        
-        def draw_pass_field(label, value, x, y, width=40*mm):
-            c.setFont("Helvetica", 5)
-            c.setFillColor(colors.darkgrey)
-            c.drawString(x, y, label)
-            c.setFont("Helvetica-Bold", 7.5)
-            c.setFillColor(KENYA_BLACK)
-            c.drawString(x, y - 3*mm, str(value).upper())
-
-        draw_pass_field("Surname / Nom", citizen_data.get('last_name', ''), x_col, y_cur)
-        y_cur -= 7.5*mm
-        draw_pass_field("Given Names / Prenoms", citizen_data.get('first_name', ''), x_col, y_cur)
-        y_cur -= 7.5*mm
-        draw_pass_field("Nationality / Nationalite", "KENYAN", x_col, y_cur)
-        y_cur -= 7.5*mm
-        draw_pass_field("Date of Birth / Date de naissance", str(citizen_data.get('date_of_birth', '')), x_col, y_cur)
-        draw_pass_field("Sex / Sexe", citizen_data.get('gender', 'M'), x_col + 35*mm, y_cur) # Inline
-        y_cur -= 7.5*mm
-        draw_pass_field("Place of Birth / Lieu de naissance", citizen_data.get('place_of_birth', ''), x_col, y_cur)
-        y_cur -= 7.5*mm
-        draw_pass_field("Date of Issue / Date de delivrance", "03 FEB 2026", x_col, y_cur)
-        draw_pass_field("Date of Expiry / Date d'expiration", "03 FEB 2036", x_col + 35*mm, y_cur) # Inline
-
-        # 6. MRZ Zone (Strict Typography)
-        c.setFont("Courier-Bold", 10) # Monospace is critical
+        c.setFont("Helvetica", 5)
+        c.setFillColor(colors.darkgrey)
+        for label, inline_label in (
+            ("Surname / Nom", None),
+            ("Given Names / Prenoms", None),
+            ("Nationality / Nationalite", None),
+            ("Date of Birth / Date de naissance", "Sex / Sexe"),
+            ("Place of Birth / Lieu de naissance", None),
+            ("Date of Issue / Date de delivrance", "Date of Expiry / Date d'expiration"),
+        ):
+            c.drawString(x_col, y_cur, label)
+            if inline_label:
+                c.drawString(x_col + 35*mm, y_cur, inline_label)
+            y_cur -= 7.5*mm
+
+        c.setFont("Helvetica-Bold", 7.5)
         c.setFillColor(KENYA_BLACK)
-        
-        # MRZ Logic
-        last_name = citizen_data.get('last_name', '').upper().replace(' ', '<')
-        first_name = citizen_data.get('first_name', '').upper().replace(' ', '<')
-        mrz_1 = f"P<KEN{last_name}<<{first_name}"
-        mrz_1 = mrz_1.ljust(44, '<')[:44]
-        
-        p_no = "AK029384<"
-        nat = "KEN"
-        dob = "950101" # Mock
-        sex = citizen_data.get('gender', 'M')
-        exp = "300101" # Mock
-        mrz_2 = f"{p_no}4{nat}{dob}8{sex}{exp}2<<<<<<<<<<<<<<02"
-        mrz_2 = mrz_2.ljust(44, '<')[:44]
-
-        c.drawString(5*mm, 10*mm, mrz_1)
-        c.drawString(5*mm, 5*mm, mrz_2)
-
-        c.save()
-        buffer.seek(0)
-        return buffer.getvalue()
+        c.drawString(x_col, p_height - 25*mm - 2*7.5*mm - 3*mm, "KENYAN")
+        c.drawString(x_col, p_height - 25*mm - 5*7.5*mm - 3*mm, "03 FEB 2026")
+        c.drawString(x_col + 35*mm, p_height - 25*mm - 5*7.5*mm - 3*mm, "03 FEB 2036")
 
     @staticmethod
-    def generate_birth_certificate(citizen_data):
-        """
-        Generates a Ceremonial Birth Certificate PDF (A4) with Kenyan Theme.
-        """
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
+    def _birth_certificate_base(c):
         width, height = A4
-        
+
         # 1. Kenyan Flag Border
-        border_w = 4*mm
-        # Top = Black, Bottom = Green, Sides = Red (Stylized)
-        
         # Outer Gold Frame
         c.setStrokeColor(KENYA_GOLD)
         c.setLineWidth(1)
         c.rect(10*mm, 10*mm, width - 20*mm, height - 20*mm)
-        
+
         # Inner Content Box
         c.rect(15*mm, 15*mm, width - 30*mm, height - 30*mm)
 
@@ -310,12 +289,12 @@ class PDFService:
         c.setFont("Times-Bold", 26)
         c.setFillColor(KENYA_BLACK)
         c.drawCentredString(width/2, y_cursor, "CERTIFICATE OF BIRTH")
-        
+
         y_cursor -= 12*mm
         c.setFont("Times-Bold", 16)
         c.setFillColor(KENYA_RED)
         c.drawCentredString(width/2, y_cursor, "REPUBLIC OF KENYA")
-        
+
         y_cursor -= 8*mm
         c.setFont("Times-Italic", 12)
         c.setFillColor(KENYA_BLACK)
@@ -326,49 +305,27 @@ class PDFService:
         c.translate(width/2, height/2)
         c.rotate(30)
         c.setFont("Helvetica-Bold", 80)
-        c.setFillColor(colors.Color(0.8, 0.8, 0.8, alpha=0.15))
+        c.setFillColor(_over(colors.Color(0.8, 0.8, 0.8, alpha=0.15), colors.white))
         c.drawCentredString(0, 0, "KENYA")
         c.restoreState()
 
-        # 4. Form Data (Table Layout with Dotted Lines)
+        # 4. Form labels with dotted value lines
         y_start = height - 85*mm
-        row_h = 14*mm
         left_margin = 35*mm
         label_w = 60*mm
-
-        data = [
-            ("Birth Entry Number", "129038475"),
-            ("Name of Child", f"{citizen_data.get('first_name', '')} {citizen_data.get('last_name', '')}"),
-            ("Date of Birth", str(citizen_data.get('date_of_birth', ''))),
-            ("Sex", "Male" if citizen_data.get('gender') == 'M' else "Female"),
-            ("Place of Birth", citizen_data.get('place_of_birth', 'Nairobi').title()),
-            ("Name of Mother", "Jane Doe (Mock)"),
-            ("Name of Father", "John Doe (Mock)"),
-            ("Date of Registration", "02 Feb 2026"),
-        ]
-
-        for label, val in data:
-            # Label
+        c.setStrokeColor(colors.grey)
+        c.setLineWidth(0.5)
+        c.setDash([1, 2])
+        for label in PDFService.BIRTH_CERTIFICATE_LABELS:
             c.setFont("Times-Bold", 12)
             c.setFillColor(colors.darkslategrey)
             c.drawString(left_margin, y_start, label + ":")
-            
-            # Value
-            c.setFont("Courier-Bold", 13) # Monospace for data looks official
-            c.setFillColor(KENYA_BLACK)
-            c.drawString(left_margin + label_w, y_start, str(val).upper())
-            
-            # Dotted Underline
-            c.setStrokeColor(colors.grey)
-            c.setLineWidth(0.5)
-            c.setDash([1, 2])
             c.line(left_margin + label_w, y_start - 2*mm, width - 35*mm, y_start - 2*mm)
-            
-            y_start -= row_h
+            y_start -= 14*mm
 
         # 5. Seal & Signatures
         y_sig = 40*mm
-        
+
         # Seal (Left)
         c.setStrokeColor(KENYA_RED)
         c.setLineWidth(2)
@@ -390,7 +347,218 @@ class PDFService:
         # 6. Bottom Border Strip (Kenyan Flag Colors)
         PDFService._draw_kenyan_flag_strip(c, 10*mm, 10*mm, width - 20*mm, 4*mm)
 
+    BIRTH_CERTIFICATE_LABELS = (
+        "Birth Entry Number",
+        "Name of Child",
+        "Date of Birth",
+        "Sex",
+        "Place of Birth",
+        "Name of Mother",
+        "Name of Father",
+        "Date of Registration",
+    )
+
+    # --- Documents ---
+
+    @staticmethod
+    def draw_national_id(c, citizen_data):
+        """Draws the front and back of a National ID card as two pages of `c`."""
+        card_width = ID_WIDTH
+        card_height = ID_HEIGHT
+        c.setPageSize((card_width, card_height))
+
+        # --- FRONT ---
+        PDFService._static_layer(c, 'IDFrontBase', PDFService._id_front_base)
+
+        # 4. Data Fields (Aligned)
+        x_labels = 32*mm
+        y_cursor = 37*mm
+
+        # ID Number Highlight
+        c.setFont("Helvetica-Bold", 11)
+        KENYA_BLUE = colors.darkblue
+        c.setFillColor(KENYA_BLUE) # Official Blue
+        c.drawString(x_labels, 42*mm, f"ID: {citizen_data.get('national_id', 'N/A')}")
+
+        # Values only; labels live in the static front layer
+        c.setFont("Helvetica-Bold", 7)
+        c.setFillColor(KENYA_BLACK)
+        for value in (
+            f"{citizen_data.get('last_name', '')}",
+            f"{citizen_data.get('first_name', '')}",
+            str(citizen_data.get('date_of_birth', '')),
+            citizen_data.get('gender', 'M'),
+            citizen_data.get('county_of_birth', 'NAIROBI').split('-')[-1].strip().upper(),
+            "03.02.2026",
+        ):
+            # Use fixed positioning for better alignment than simple offset
+            c.drawString(x_labels + 20*mm, y_cursor, str(value).upper())
+            y_cursor -= 4.2*mm
+
+        PDFService._static_layer(c, 'IDFrontOverlay', PDFService._id_front_overlay)
+
+        c.showPage()
+
+        # --- BACK ---
+        PDFService._static_layer(c, 'IDBackBase', PDFService._id_back_base)
+
+        c.setFillColor(colors.white)
+        c.setFont("Courier-Bold", 10)
+        c.drawCentredString(card_width/2, card_height - 14*mm, f"<{citizen_data.get('national_id', 'ID')}>")
+
+        c.setFillColor(KENYA_BLACK)
+        c.setFont("Helvetica", 6)
+        c.drawString(30*mm, 20*mm, citizen_data.get('county_of_birth', 'NAIROBI').upper())
+        c.showPage()
+
+    @staticmethod
+    def generate_national_id(citizen_data):
+        """
+        Generates a Premium National ID Card PDF (Front and Back).
+        Format: ID-1 (85.60 × 53.98 mm)
+        """
+        return PDFService._generate(PDFService.draw_national_id, citizen_data)
+
+    @staticmethod
+    def draw_passport(c, citizen_data):
+        """Draws a Passport bio page as one page of `c`."""
+        p_width = PASSPORT_WIDTH
+        p_height = PASSPORT_HEIGHT
+        c.setPageSize((p_width, p_height))
+
+        PDFService._static_layer(c, 'PassportBase', PDFService._passport_base)
+
+        # 5. Data Fields (Grid Layout) - labels are in the static layer
+        x_col = 38*mm
+        y_cur = p_height - 25*mm
+
+        def draw_pass_value(value, x, y):
+            c.drawString(x, y - 3*mm, str(value).upper())
+
+        c.setFont("Helvetica-Bold", 7.5)
+        c.setFillColor(KENYA_BLACK)
+        draw_pass_value(citizen_data.get('last_name', ''), x_col, y_cur)
+        y_cur -= 7.5*mm
+        draw_pass_value(citizen_data.get('first_name', ''), x_col, y_cur)
+        y_cur -= 2*7.5*mm
+        draw_pass_value(str(citizen_data.get('date_of_birth', '')), x_col, y_cur)
+        draw_pass_value(citizen_data.get('gender', 'M'), x_col + 35*mm, y_cur) # Inline
+        y_cur -= 7.5*mm
+        draw_pass_value(citizen_data.get('place_of_birth', ''), x_col, y_cur)
+
+        # 6. MRZ Zone (Strict Typography)
+        c.setFont("Courier-Bold", 10) # Monospace is critical
+        c.setFillColor(KENYA_BLACK)
+
+        # MRZ Logic
+        last_name = citizen_data.get('last_name', '').upper().replace(' ', '<')
+        first_name = citizen_data.get('first_name', '').upper().replace(' ', '<')
+        mrz_1 = f"P<KEN{last_name}<<{first_name}"
+        mrz_1 = mrz_1.ljust(44, '<')[:44]
+
+        p_no = "AK029384<"
+        nat = "KEN"
+        dob = "950101" # Mock
+        sex = citizen_data.get('gender', 'M')
+        exp = "300101" # Mock
+        mrz_2 = f"{p_no}4{nat}{dob}8{sex}{exp}2<<<<<<<<<<<<<<02"
+        mrz_2 = mrz_2.ljust(44, '<')[:44]
+
+        c.drawString(5*mm, 10*mm, mrz_1)
+        c.drawString(5*mm, 5*mm, mrz_2)
+        c.showPage()
+
+    @staticmethod
+    def generate_passport(citizen_data):
+        """
+        Generates a Passport Bio Page PDF (ICAO 9303 Compliant Layout).
+        """
+        return PDFService._generate(PDFService.draw_passport, citizen_data)
+
+    @staticmethod
+    def draw_birth_certificate(c, citizen_data):
+        """Draws a Birth Certificate as one A4 page of `c`."""
+        width, height = A4
+        c.setPageSize(A4)
+
+        PDFService._static_layer(c, 'BirthCertificateBase', PDFService._birth_certificate_base)
+
+        # 4. Form Data - labels and dotted lines are in the static layer
+        y_start = height - 85*mm
+        row_h = 14*mm
+        left_margin = 35*mm
+        label_w = 60*mm
+
+        values = [
+            "129038475",
+            f"{citizen_data.get('first_name', '')} {citizen_data.get('last_name', '')}",
+            str(citizen_data.get('date_of_birth', '')),
+            "Male" if citizen_data.get('gender') == 'M' else "Female",
+            citizen_data.get('place_of_birth', 'Nairobi').title(),
+            "Jane Doe (Mock)",
+            "John Doe (Mock)",
+            "02 Feb 2026",
+        ]
+
+        c.setFont("Courier-Bold", 13) # Monospace for data looks official
+        c.setFillColor(KENYA_BLACK)
+        for val in values:
+            c.drawString(left_margin + label_w, y_start, str(val).upper())
+            y_start -= row_h
+        c.showPage()
+
+    @staticmethod
+    def generate_birth_certificate(citizen_data):
+        """
+        Generates a Ceremonial Birth Certificate PDF (A4) with Kenyan Theme.
+        """
+        return PDFService._generate(PDFService.draw_birth_certificate, citizen_data)
+
+    @staticmethod
+    def _generate(draw, citizen_data):
+        buffer = io.BytesIO()
+        # No timestamps or random IDs: same input, same bytes (documents carry strong ETags)
+        c = canvas.Canvas(buffer, invariant=1)
+        draw(c, citizen_data)
         c.save()
         buffer.seek(0)
         return buffer.getvalue()
 
+    @staticmethod
+    def render(doc_type, citizen_data):
+        """
+        Returns the PDF for `doc_type` ('national_id', 'passport' or
+        'birth_certificate'), served from the document cache when the
+        citizen record and template version are unchanged.
+        """
+        from .pdf_cache import get_pdf_cache
+        generator = DOCUMENT_GENERATORS[doc_type]
+        return get_pdf_cache().get_or_render(doc_type, citizen_data, generator)
+
+
+class StaticLayerCanvas(canvas.Canvas):
+    """
+    Canvas for files holding many cards (e.g. bulk printing runs): the
+    static layers are written once as form XObjects and shared by every page.
+    """
+    share_static_layers = True
+
+
+# Document type -> filename prefix for generated files
+FILENAME_PREFIXES = {
+    'national_id': 'id',
+    'passport': 'passport',
+    'birth_certificate': 'birth_cert',
+}
+
+DOCUMENT_GENERATORS = {
+    'national_id': PDFService.generate_national_id,
+    'passport': PDFService.generate_passport,
+    'birth_certificate': PDFService.generate_birth_certificate,
+}
+
+DOCUMENT_DRAWERS = {
+    'national_id': PDFService.draw_national_id,
+    'passport': PDFService.draw_passport,
+    'birth_certificate': PDFService.draw_birth_certificate,
+}
@@ -0,0 +1,58 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from ..models import DocumentNumberSequence
+
+
+class SequenceAllocator:
+    """
+    Hands out document numbers from blocks leased from DocumentNumberSequence.
+
+    Each process leases `block_size` numbers at a time with a single row
+    update, so parallel issuers always draw from disjoint ranges: no two
+    workers can produce the same number and nobody has to retry an insert.
+    Numbers left in a lease when a process exits are simply skipped.
+
+    Call next()/take() outside any transaction that may roll back; a lease
+    undone by a rollback could be handed out again to another worker.
+    """
+    # Legacy numbers were random 7-digit values; leased ranges start above them
+    START = 10_000_000
+
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self._leases = {}  # name -> [next, end)
+        self._lock = threading.Lock()
+
+    def _lease(self, name, size):
+        with transaction.atomic():
+            # UPDATE first so the row is write-locked before we read it back
+            updated = DocumentNumberSequence.objects.filter(name=name).update(next_value=F('next_value') + size)
+            if not updated:
+                DocumentNumberSequence.objects.get_or_create(name=name, defaults={'next_value': self.START})
+                DocumentNumberSequence.objects.filter(name=name).update(next_value=F('next_value') + size)
+            end = DocumentNumberSequence.objects.values_list('next_value', flat=True).get(name=name)
+        return [end - size, end]
+
+    def take(self, name, count):
+        """Returns `count` unique numbers for sequence `name`."""
+        numbers = []
+        with self._lock:
+            while len(numbers) < count:
+                lease = self._leases.get(name)
+                if lease is None or lease[0] >= lease[1]:
+                    lease = self._lease(name, max(self.block_size, count - len(numbers)))
+                    self._leases[name] = lease
+                n = min(lease[1] - lease[0], count - len(numbers))
+                numbers.extend(range(lease[0], lease[0] + n))
+                lease[0] += n
+        return numbers
+
+    def next(self, name):
+        return self.take(name, 1)[0]
+
+
+allocator = SequenceAllocator(block_size=settings.DOCUMENT_NUMBER_BLOCK_SIZE)
@@ -0,0 +1,175 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from ..models import DigitalID, IssuanceRequest, IDStatistic
+from .iprs_client import iprs_client, IPRSUnavailable
+
+
+class StatsService:
+    """
+    O(1) counters for the id-service dashboard.
+
+    Counter names:
+      digital_ids.total
+      digital_ids.status.<STATUS>
+      requests.total
+      requests.status.<STATUS>
+      <prefix>.changes   bumped on every write; never decreases (listing ETags)
+    """
+
+    @staticmethod
+    def increment(name, delta=1):
+        if not delta:
+            return
+        updated = IDStatistic.objects.filter(name=name).update(value=F('value') + delta)
+        if not updated:
+            IDStatistic.objects.get_or_create(name=name)
+            IDStatistic.objects.filter(name=name).update(value=F('value') + delta)
+
+    @staticmethod
+    def apply(deltas):
+        """Applies a {counter: delta} mapping atomically."""
+        with transaction.atomic():
+            for name, delta in deltas.items():
+                StatsService.increment(name, delta)
+
+    @staticmethod
+    def status_change_deltas(prefix, old_status, new_status, created=False, deleted=False):
+        deltas = {f"{prefix}.changes": 1}
+        if created:
+            deltas[f"{prefix}.total"] = 1
+        if deleted:
+            deltas[f"{prefix}.total"] = -1
+        if old_status != new_status or deleted:
+            if old_status:
+                deltas[f"{prefix}.status.{old_status}"] = -1
+            if new_status and not deleted:
+                deltas[f"{prefix}.status.{new_status}"] = deltas.get(f"{prefix}.status.{new_status}", 0) + 1
+        return deltas
+
+    @staticmethod
+    def snapshot():
+        return dict(IDStatistic.objects.values_list('name', 'value'))
+
+    @staticmethod
+    def compute():
+        """Exact counters recomputed from the source tables."""
+        counts = {
+            'digital_ids.total': DigitalID.objects.count(),
+            'requests.total': IssuanceRequest.objects.count(),
+        }
+        for row in DigitalID.objects.values('status').annotate(n=Count('id')):
+            counts[f"digital_ids.status.{row['status']}"] = row['n']
+        for row in IssuanceRequest.objects.values('status').annotate(n=Count('id')):
+            counts[f"requests.status.{row['status']}"] = row['n']
+        return counts
+
+    @staticmethod
+    def reconcile():
+        """
+        Rewrites every counter from the source tables and returns the drift
+        that was corrected as {counter: (stored, actual)}.
+        """
+        with transaction.atomic():
+            actual = StatsService.compute()
+            stored = dict(IDStatistic.objects.select_for_update().values_list('name', 'value'))
+            drift = {}
+            for name in set(stored) | set(actual):
+                if name.endswith('.changes'):
+                    continue
+                value = actual.get(name, 0)
+                if stored.get(name) != value:
+                    drift[name] = (stored.get(name), value)
+                    IDStatistic.objects.update_or_create(name=name, defaults={'value': value})
+            # Drift means rows changed behind the signals; move listing ETags on
+            for prefix in {name.split('.', 1)[0] for name in drift}:
+                StatsService.increment(f"{prefix}.changes")
+        return drift
+
+
+class IPRSAnalyticsCache:
+    """
+    IPRS demographics held in-process with a TTL.
+    Reads never wait on IPRS once the first copy is loaded: a stale copy is
+    served while a background thread refreshes it. The top-county cut is
+    computed at refresh time so the endpoint does no sorting.
+    """
+    TOP_COUNTIES = 5
+    FALLBACK_TRENDS = {
+        "months": ["Aug", "Sep", "Oct", "Nov", "Dec", "Jan"],
+        "registrations": [0, 0, 0, 0, 0, 0]
+    }
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._data = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _shape(self, iprs_stats):
+        gender = iprs_stats.get('demographics', {}).get('gender', {})
+        county_data = iprs_stats.get('demographics', {}).get('county', {})
+        top = sorted(county_data.items(), key=lambda x: x[1], reverse=True)[:self.TOP_COUNTIES]
+        return {
+            # Sum of all gender counts = total citizens
+            'total_citizens': sum(gender.values()) if gender else 0,
+            'trends': iprs_stats.get('trends', self.FALLBACK_TRENDS),
+            'labels': [label for label, _ in top] or ["N/A"],
+            'sizes': [size for _, size in top] or [0],
+        }
+
+    def _store(self, data):
+        with self._lock:
+            if data is not None:
+                self._data = data
+                self._fetched_at = time.monotonic()
+            self._refreshing = False
+            return self._data or self._shape({})
+
+    def _refresh(self):
+        try:
+            data = self._shape(iprs_client.get_analytics())
+        except IPRSUnavailable as e:
+            print(f"Error fetching IPRS stats: {e}")
+            data = None
+        return self._store(data)
+
+    def _current(self):
+        """Cached copy (None when cold); starts a background refresh if it is stale."""
+        with self._lock:
+            data = self._data
+            stale = time.monotonic() - self._fetched_at > self.ttl
+            start_refresh = stale and not self._refreshing and data is not None
+            if start_refresh:
+                self._refreshing = True
+        if start_refresh:
+            threading.Thread(target=self._refresh, daemon=True).start()
+        return data
+
+    def get(self):
+        data = self._current()
+        if data is None:
+            # Cold start: one bounded synchronous fetch
+            return self._refresh()
+        return data
+
+    async def aget(self):
+        """get() for async views: a cold start awaits IPRS instead of blocking a thread."""
+        data = self._current()
+        if data is None:
+            from .async_iprs_client import async_iprs_client
+            try:
+                data = self._shape(await async_iprs_client.get_analytics())
+            except IPRSUnavailable as e:
+                print(f"Error fetching IPRS stats: {e}")
+                data = None
+            return self._store(data)
+        return data
+
+
+iprs_analytics = IPRSAnalyticsCache(ttl=settings.IPRS_ANALYTICS_TTL)
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import DigitalID, IssuanceRequest
+from .services.revocation_service import RevocationService
+from .services.stats_service import StatsService
+
+
+def _track(prefix, instance, created=False, deleted=False):
+    old_status = None if created else getattr(instance, '_loaded_status', None)
+    if deleted and old_status is None:
+        old_status = instance.status
+    deltas = StatsService.status_change_deltas(
+        prefix, old_status, instance.status, created=created, deleted=deleted
+    )
+    StatsService.apply(deltas)
+    instance._loaded_status = None if deleted else instance.status
+
+
+@receiver(post_save, sender=DigitalID)
+def digital_id_saved(sender, instance, created, **kwargs):
+    RevocationService.status_changed(instance, getattr(instance, '_loaded_status', None), created=created)
+    _track('digital_ids', instance, created=created)
+
+
+@receiver(post_delete, sender=DigitalID)
+def digital_id_deleted(sender, instance, **kwargs):
+    RevocationService.status_changed(instance, getattr(instance, '_loaded_status', None), deleted=True)
+    _track('digital_ids', instance, deleted=True)
+
+
+@receiver(post_save, sender=IssuanceRequest)
+def issuance_request_saved(sender, instance, created, **kwargs):
+    _track('requests', instance, created=created)
+
+
+@receiver(post_delete, sender=IssuanceRequest)
+def issuance_request_deleted(sender, instance, **kwargs):
+    _track('requests', instance, deleted=True)
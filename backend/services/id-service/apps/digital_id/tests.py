@@ -0,0 +1,77 @@
+import datetime
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import DigitalID, IssuanceRequest
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    Guards the indexes added for the issuance check and the request queues.
+    Fails if any of these queries falls back to a full table scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        expiry = timezone.now() + datetime.timedelta(days=365)
+        DigitalID.objects.bulk_create([
+            DigitalID(
+                citizen_id=str(i),
+                national_id=f"ID-{i}",
+                document_type='NATIONAL_ID',
+                expiry_date=expiry,
+                public_key='k',
+            )
+            for i in range(200)
+        ])
+        IssuanceRequest.objects.bulk_create([
+            IssuanceRequest(citizen_id=str(i), doc_type='PASSPORT', status='PENDING' if i % 4 else 'APPROVED')
+            for i in range(200)
+        ])
+
+    def plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be sequentially scanned
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, table):
+        plan = self.plan(queryset)
+        if connection.vendor == 'sqlite':
+            self.assertNotRegex(plan, rf'SCAN {table}(?! USING)', plan)
+            self.assertIn(f'SEARCH {table}', plan)
+        elif connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan, plan)
+        return plan
+
+    def test_active_document_check_uses_index(self):
+        queryset = DigitalID.objects.filter(citizen_id='42', document_type='NATIONAL_ID', status='ACTIVE')
+        self.assertUsesIndex(queryset, DigitalID._meta.db_table)
+
+    def test_bulk_active_document_check_uses_index(self):
+        queryset = DigitalID.objects.filter(
+            citizen_id__in=['1', '2', '3'], document_type='NATIONAL_ID', status='ACTIVE'
+        ).values_list('citizen_id', 'national_id')
+        self.assertUsesIndex(queryset, DigitalID._meta.db_table)
+
+    def test_request_queue_uses_index(self):
+        queryset = IssuanceRequest.objects.filter(status='PENDING').order_by('request_date')
+        plan = self.assertUsesIndex(queryset, IssuanceRequest._meta.db_table)
+        if connection.vendor == 'sqlite':
+            # The index also supplies the ordering
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_one_active_document_per_type(self):
+        expiry = timezone.now() + datetime.timedelta(days=365)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DigitalID.objects.create(
+                citizen_id='42', national_id='ID-42-2', document_type='NATIONAL_ID', expiry_date=expiry, public_key='k'
+            )
+        # A suspended card alongside the active one is fine
+        DigitalID.objects.create(
+            citizen_id='42', national_id='ID-42-3', document_type='NATIONAL_ID', expiry_date=expiry,
+            public_key='k', status='SUSPENDED'
+        )
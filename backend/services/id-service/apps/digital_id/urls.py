@@ -1,14 +1,30 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentViewSet, DigitalIDViewSet, IssuanceRequestViewSet, CitizenProxyViewSet, health_check
+from .views import DocumentViewSet, DigitalIDViewSet, IssuanceRequestViewSet, CitizenProxyViewSet, StatusListViewSet, health_check
 
 router = DefaultRouter()
 router.register(r'digital_ids', DigitalIDViewSet, basename='digital_ids')
 router.register(r'requests', IssuanceRequestViewSet, basename='requests')
 router.register(r'documents', DocumentViewSet, basename='documents')
 router.register(r'citizens', CitizenProxyViewSet, basename='citizens')
+router.register(r'status_list', StatusListViewSet, basename='status_list')
 
 urlpatterns = [
     path('health/', health_check, name='health'),
+]
+
+if settings.ASYNC_VIEWS:
+    # Async views for the IPRS-bound endpoints; listed first so they shadow the router routes
+    from . import async_views
+    urlpatterns += [
+        path('documents/preview/', async_views.document_preview, name='documents-preview-async'),
+        path('documents/download/', async_views.document_download, name='documents-download-async'),
+        path('citizens/', async_views.citizen_list, name='citizens-list-async'),
+        path('citizens/<str:pk>/', async_views.citizen_detail, name='citizens-detail-async'),
+        path('digital_ids/analytics/', async_views.digital_id_analytics, name='digital_ids-analytics-async'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
 ]
@@ -1,82 +1,173 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.http import HttpResponse, JsonResponse
-from .models import DigitalID, IssuanceRequest
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+import hashlib
+from .models import DigitalID, IssuanceRequest, IDStatistic
 from .serializers import DigitalIDSerializer, IssuanceRequestSerializer
-from .services.pdf_service import PDFService
-import requests
-
-# Mock IPRS URL - In prod, this would be in settings
-IPRS_URL = "http://localhost:8005/api/v1/citizens/"
+from .pagination import DigitalIDPagination, IssuanceRequestPagination
+from .services.pdf_service import FILENAME_PREFIXES, PDFService
+from .services.pdf_cache import get_pdf_cache
+from .services.iprs_client import iprs_client, IPRSUnavailable
+from .services.batch_service import DocumentBatchService, BatchLimitExceeded
+from .services.stats_service import StatsService, iprs_analytics
+from .services.issuance_service import IssuanceService
+from .services.revocation_service import RevocationService, StatusListUnavailable, DeltaUnavailable
 
 def health_check(request):
     return JsonResponse({"status": "ok", "service": "id-service"})
 
+def not_modified(request, etag):
+    """304 response if the client's If-None-Match holds `etag` (a quoted strong ETag), else None."""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+def tag_response(response, etag):
+    if response.status_code == 200:
+        response['ETag'] = etag
+        # Cache, but revalidate on every view
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def conditional(request, etag, build):
+    """not_modified() if the client's copy is current; otherwise build() the response and tag it."""
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    return tag_response(build(), etag)
+
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.utils.decorators import method_decorator
 
-class DigitalIDViewSet(viewsets.ModelViewSet):
+class CountSummaryMixin:
+    """
+    Query-param filters for listings plus cheap `count` and `summary`
+    actions. Unfiltered totals are read from the IDStatistic counters;
+    filtered ones are an indexed COUNT, never a row download.
+
+    list, count and summary carry an ETag built from the table's
+    `<prefix>.changes` counter and the request URL, so a repeated GET with
+    If-None-Match costs one counter read and no query or serialization.
+    """
+    filter_params = {}  # query param -> model field
+    counter_prefix = None
+
+    def _filters(self):
+        params = self.request.query_params
+        return {field: params[param] for param, field in self.filter_params.items() if params.get(param)}
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**self._filters())
+
+    def _listing_etag(self, request):
+        changes = IDStatistic.objects.filter(name=f"{self.counter_prefix}.changes").values_list('value', flat=True).first()
+        view = hashlib.sha256(f"{request.get_full_path()}\0{request.accepted_media_type}".encode()).hexdigest()[:16]
+        return f'"{self.counter_prefix}-{changes or 0}-{view}"'
+
+    def list(self, request, *args, **kwargs):
+        return conditional(request, self._listing_etag(request), lambda: super(CountSummaryMixin, self).list(request, *args, **kwargs))
+
+    @action(detail=False, methods=['get'])
+    def count(self, request):
+        return conditional(request, self._listing_etag(request), lambda: self._count(request))
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Totals per status: {"total": N, "by_status": {"ACTIVE": n, ...}}"""
+        return conditional(request, self._listing_etag(request), lambda: self._summary(request))
+
+    def _count(self, request):
+        if self._filters():
+            count = self.get_queryset().count()
+        else:
+            count = StatsService.snapshot().get(f"{self.counter_prefix}.total", 0)
+        return Response({"count": count})
+
+    def _summary(self, request):
+        if self._filters():
+            by_status = dict(self.get_queryset().order_by().values_list('status').annotate(n=Count('id')))
+            total = sum(by_status.values())
+        else:
+            counters = StatsService.snapshot()
+            status_prefix = f"{self.counter_prefix}.status."
+            by_status = {
+                name[len(status_prefix):]: value
+                for name, value in counters.items() if name.startswith(status_prefix) and value
+            }
+            total = counters.get(f"{self.counter_prefix}.total", 0)
+        return Response({"total": total, "by_status": by_status})
+
+class DigitalIDViewSet(CountSummaryMixin, viewsets.ModelViewSet):
     queryset = DigitalID.objects.all()
     serializer_class = DigitalIDSerializer
+    pagination_class = DigitalIDPagination
+    filter_params = {'citizen_id': 'citizen_id', 'type': 'document_type', 'status': 'status'}
+    counter_prefix = 'digital_ids'
 
     @action(detail=False, methods=['get'])
     def analytics(self, request):
         """
         Returns stats for the dashboard in the format expected by Overview.jsx.
-        Fetches real Citizen count from IPRS.
+        Local counts come from the incrementally maintained counters and the
+        IPRS demographics from a TTL cache refreshed in the background.
         """
+        return Response(self.analytics_payload(StatsService.snapshot(), iprs_analytics.get()))
+
+    @staticmethod
+    def analytics_payload(counters, iprs_stats):
         # 1. Local ID Stats
-        total_ids = DigitalID.objects.count()
-        pending = IssuanceRequest.objects.filter(status='PENDING').count()
-        
-        # 2. Fetch Citizen Stats from IPRS
-        iprs_stats = {}
-        try:
-            # Call the new analytics endpoint
-            response = requests.get(f"{IPRS_URL}analytics/")
-            if response.status_code == 200:
-                iprs_stats = response.json()
-        except Exception as e:
-            print(f"Error fetching IPRS stats: {e}")
-
-        # Extract IPRS data or use fallbacks
-        total_citizens = iprs_stats.get('demographics', {}).get('gender', {})
-        # Sum of all gender counts = total citizens
-        total_citizens_count = sum(total_citizens.values()) if total_citizens else 0
-
-        # Trends
-        trends = iprs_stats.get('trends', {
-            "months": ["Aug", "Sep", "Oct", "Nov", "Dec", "Jan"],
-            "registrations": [0, 0, 0, 0, 0, 0]
-        })
-
-        # Demographics - County
-        county_data = iprs_stats.get('demographics', {}).get('county', {})
-        demo_labels = list(county_data.keys()) if county_data else ["N/A"]
-        demo_sizes = list(county_data.values()) if county_data else [0]
-        
-        # Limit demographics to top 5 for UI cleanliness
-        if len(demo_labels) > 5:
-            sorted_demos = sorted(zip(demo_labels, demo_sizes), key=lambda x: x[1], reverse=True)[:5]
-            demo_labels, demo_sizes = zip(*sorted_demos)
-
-        return Response({
+        total_ids = counters.get('digital_ids.total', 0)
+        pending = counters.get('requests.status.PENDING', 0)
+
+        # 2. Citizen Stats from IPRS
+        total_citizens_count = iprs_stats['total_citizens']
+
+        return {
             "kpi": {
                 "total_citizens": total_citizens_count if total_citizens_count > 0 else total_ids,
                 "ids_issued": total_ids,
                 "pending_reviews": pending
             },
-            "trends": trends,
+            "trends": iprs_stats['trends'],
             "demographics": {
-                "labels": demo_labels,
-                "sizes": demo_sizes
+                "labels": iprs_stats['labels'],
+                "sizes": iprs_stats['sizes']
             }
-        })
+        }
+
+    @action(detail=False, methods=['post'])
+    def bulk_issue(self, request):
+        """
+        Mass (re-)issuance. Body: {"citizen_ids": [...], "document_type": "PASSPORT"}
+        """
+        doc_type = request.data.get('document_type', 'NATIONAL_ID')
+        citizen_ids = request.data.get('citizen_ids') or []
 
-class IssuanceRequestViewSet(viewsets.ModelViewSet):
+        if doc_type not in dict(DigitalID.TYPE_CHOICES):
+            return Response({"error": "Invalid document type"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(citizen_ids, list) or not citizen_ids:
+            return Response({"error": "citizen_ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(citizen_ids) > settings.BULK_ISSUANCE_MAX_SIZE:
+            return Response(
+                {"error": f"At most {settings.BULK_ISSUANCE_MAX_SIZE} citizens per call"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = IssuanceService.bulk_issue(citizen_ids, doc_type)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+class IssuanceRequestViewSet(CountSummaryMixin, viewsets.ModelViewSet):
     queryset = IssuanceRequest.objects.all()
     serializer_class = IssuanceRequestSerializer
+    pagination_class = IssuanceRequestPagination
+    filter_params = {'citizen_id': 'citizen_id', 'type': 'doc_type', 'status': 'status'}
+    counter_prefix = 'requests'
 
 class DocumentViewSet(viewsets.ViewSet):
     """
@@ -92,14 +183,12 @@ class DocumentViewSet(viewsets.ViewSet):
             return None
         try:
             # Connect to IPRS Mock Service to get real-time data
-            response = requests.get(f"{IPRS_URL}{citizen_id}/")
-            if response.status_code == 200:
-                return response.json()
-        except requests.exceptions.RequestException:
-            pass
-        return None
-
-    def _generate_response(self, pdf_bytes, filename, download=False):
+            return iprs_client.get_citizen(citizen_id)
+        except IPRSUnavailable:
+            return None
+
+    @staticmethod
+    def _generate_response(pdf_bytes, filename, download=False):
         response = HttpResponse(pdf_bytes, content_type='application/pdf')
         disposition = 'attachment' if download else 'inline'
         response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
@@ -107,63 +196,135 @@ class DocumentViewSet(viewsets.ViewSet):
         response['X-Frame-Options'] = 'ALLOWALL'
         return response
 
-    @action(detail=False, methods=['get'], url_path='preview')
-    def preview(self, request):
+    # Query-param document type -> filename prefix
+    FILENAME_PREFIXES = FILENAME_PREFIXES
+
+    def _render_document(self, request, download=False):
         doc_type = request.query_params.get('type')
         citizen_id = request.query_params.get('citizen_id')
-        
+
         citizen_data = self._fetch_citizen_data(citizen_id)
         if not citizen_data:
-             return Response({"error": "Citizen not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        if doc_type == 'national_id':
-             pdf = PDFService.generate_national_id(citizen_data)
-             return self._generate_response(pdf, f"id_{citizen_id}.pdf")
-        elif doc_type == 'passport':
-             pdf = PDFService.generate_passport(citizen_data)
-             return self._generate_response(pdf, f"passport_{citizen_id}.pdf")
-        elif doc_type == 'birth_certificate':
-             pdf = PDFService.generate_birth_certificate(citizen_data)
-             return self._generate_response(pdf, f"birth_cert_{citizen_id}.pdf")
-        
-        return Response({"error": "Invalid document type"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"error": "Citizen not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if doc_type not in self.FILENAME_PREFIXES:
+            return Response({"error": "Invalid document type"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Preview and download share the same cache entry and ETag: the
+        # cache key hashes the citizen record and the template version
+        etag = f'"{get_pdf_cache().key(doc_type, citizen_data)}"'
+        filename = f"{self.FILENAME_PREFIXES[doc_type]}_{citizen_id}.pdf"
+        return conditional(
+            request, etag,
+            lambda: self._generate_response(PDFService.render(doc_type, citizen_data), filename, download=download)
+        )
+
+    @action(detail=False, methods=['get'], url_path='preview')
+    def preview(self, request):
+        return self._render_document(request)
 
     @action(detail=False, methods=['get'], url_path='download')
     def download(self, request):
-        doc_type = request.query_params.get('type')
-        citizen_id = request.query_params.get('citizen_id')
+        return self._render_document(request, download=True)
 
-        citizen_data = self._fetch_citizen_data(citizen_id)
-        if not citizen_data:
-             return Response({"error": "Citizen not found"}, status=status.HTTP_404_NOT_FOUND)
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Bulk generation for printing centres.
+        Body: {"citizen_ids": [...], "type": "national_id", "layout": "single" | "merged"}
+        Streams a ZIP as documents finish; poll batch/<job_id>/ for progress.
+        """
+        doc_type = request.data.get('type')
+        layout = request.data.get('layout', 'single')
+        citizen_ids = request.data.get('citizen_ids') or []
+
+        if doc_type not in self.FILENAME_PREFIXES:
+            return Response({"error": "Invalid document type"}, status=status.HTTP_400_BAD_REQUEST)
+        if layout not in DocumentBatchService.LAYOUTS:
+            return Response({"error": "Invalid layout"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(citizen_ids, list) or not citizen_ids:
+            return Response({"error": "citizen_ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(citizen_ids) > settings.DOCUMENT_BATCH_MAX_SIZE:
+            return Response(
+                {"error": f"At most {settings.DOCUMENT_BATCH_MAX_SIZE} citizens per batch"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # De-duplicate while keeping the requested print order
+        citizen_ids = list(dict.fromkeys(str(cid) for cid in citizen_ids))
+
+        try:
+            job_id, stream = DocumentBatchService.start(citizen_ids, doc_type, layout)
+        except BatchLimitExceeded as e:
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Under ASGI a sync iterator would be buffered whole before the first byte
+        asgi = isinstance(request._request, ASGIRequest)
+        response = StreamingHttpResponse(stream.as_async() if asgi else stream, content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{self.FILENAME_PREFIXES[doc_type]}_batch_{job_id}.zip"'
+        response['X-Batch-Job-ID'] = job_id
+        return response
 
-        if doc_type == 'national_id':
-             pdf = PDFService.generate_national_id(citizen_data)
-             return self._generate_response(pdf, f"id_{citizen_id}.pdf", download=True)
-        elif doc_type == 'passport':
-             pdf = PDFService.generate_passport(citizen_data)
-             return self._generate_response(pdf, f"passport_{citizen_id}.pdf", download=True)
-        elif doc_type == 'birth_certificate':
-             pdf = PDFService.generate_birth_certificate(citizen_data)
-             return self._generate_response(pdf, f"birth_cert_{citizen_id}.pdf", download=True)
+    @action(detail=False, methods=['get'], url_path=r'batch/(?P<job_id>[0-9a-f]+)')
+    def batch_progress(self, request, job_id=None):
+        progress = DocumentBatchService.get_progress(job_id)
+        if progress is None:
+            return Response({"error": "Batch not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(progress)
 
-        return Response({"error": "Invalid document type"}, status=status.HTTP_400_BAD_REQUEST)
+class StatusListViewSet(viewsets.ViewSet):
+    """
+    Signed revocation status list for verifiers: the full snapshot, or
+    only the changes since a version they already hold.
+    """
+    CONTENT_TYPE = 'application/cose; cose-type="cose-sign1"'
+
+    def _signed_response(self, version, signed):
+        response = HttpResponse(signed, content_type=self.CONTENT_TYPE)
+        response['X-Status-List-Version'] = str(version)
+        response['Cache-Control'] = f"public, max-age={settings.STATUS_LIST_TTL // 2}"
+        return response
+
+    def list(self, request):
+        try:
+            version, signed = RevocationService.snapshot()
+        except StatusListUnavailable as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return self._signed_response(version, signed)
+
+    @action(detail=False, methods=['get'])
+    def delta(self, request):
+        try:
+            since = int(request.query_params.get('since', ''))
+        except ValueError:
+            return Response({"error": "since must be a version number"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            version, signed = RevocationService.delta(since)
+        except DeltaUnavailable as e:
+            # The verifier must fall back to a full snapshot
+            return Response({"error": str(e)}, status=status.HTTP_410_GONE)
+        except StatusListUnavailable as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return self._signed_response(version, signed)
 
 class CitizenProxyViewSet(viewsets.ViewSet):
     """
     Proxy ViewSet to forward requests to IPRS.
     This ensures endpoints like /api/v1/citizens/ work on port 8001 as well.
     """
-    def list(self, request):
+    def _proxy(self, path, params=None):
         try:
-            resp = requests.get(IPRS_URL, params=request.query_params)
-            return Response(resp.json(), status=resp.status_code)
-        except:
+            result = iprs_client.get(path, params=params)
+        except IPRSUnavailable:
             return Response({"error": "IPRS Service Down"}, status=503)
+        response = Response(result.data, status=result.status_code)
+        if result.stale:
+            # Served from the last good copy while IPRS is unreachable
+            response['Warning'] = '110 - "Response is Stale"'
+        return response
+
+    def list(self, request):
+        return self._proxy('', params=request.query_params.dict())
 
     def retrieve(self, request, pk=None):
-        try:
-            resp = requests.get(f"{IPRS_URL}{pk}/")
-            return Response(resp.json(), status=resp.status_code)
-        except:
-            return Response({"error": "IPRS Service Down"}, status=503)
+        return self._proxy(f"{pk}/")
@@ -1,10 +1,176 @@
+import datetime
+import hashlib
+import secrets
+from collections import namedtuple
+
+from cbor2 import CBORTag
+
+from apps.cbor.decoder import CBORDecoder
+from apps.cbor.encoder import CBOREncoder
+from apps.cose.utils import cose_key
+
+MDL_DOCTYPE = 'org.iso.18013.5.1.mDL'
+MDL_NAMESPACE = 'org.iso.18013.5.1'
+
+# Encoded-CBOR wrapper (bstr .cbor) used for IssuerSignedItemBytes and MSO bytes
+ENCODED_CBOR_TAG = 24
+
+DIGEST_ALGORITHMS = {
+    'SHA-256': hashlib.sha256,
+    'SHA-384': hashlib.sha384,
+    'SHA-512': hashlib.sha512,
+}
+
+# One data element: `item` is the encoded IssuerSignedItem, `digest` the
+# digest of its tag-24 wrapping, both computed once when the value is set
+Element = namedtuple('Element', ['digest_id', 'value', 'item', 'digest'])
+
+
+def _tdate(value):
+    # ISO 18013-5 tdate carries whole seconds only
+    return value.astimezone(datetime.timezone.utc).replace(microsecond=0)
+
+
 class MDoc:
-    def __init__(self):
-        self.namespaces = {}
+    """
+    ISO 18013-5 mdoc builder.
+
+    Every data element is salted, encoded and digested once, when it is
+    set. sign() assembles the Mobile Security Object from the stored
+    digests and signs it as issuerAuth. After an update (say, a new
+    address), only that element is re-salted and re-digested; the other
+    elements keep their digests, and only the MSO is re-encoded and
+    re-signed. Re-issuance cost therefore follows the size of the change.
+
+    to_state()/from_state() round-trip the salted elements as CBOR, so the
+    stored digests survive between issuance runs.
+    """
+
+    def __init__(self, doc_type=MDL_DOCTYPE, digest_algorithm='SHA-256'):
+        self.doc_type = doc_type
+        self.digest_algorithm = digest_algorithm
+        self._hash = DIGEST_ALGORITHMS[digest_algorithm]
+        self.namespaces = {}  # namespace -> {identifier: Element}
+        self._next_digest_id = {}
+        self._issuer_auth = None
+        self._signed_with = None
 
     def add_namespace(self, name, items):
-        self.namespaces[name] = items
+        for identifier, value in items.items():
+            self.set_element(name, identifier, value)
+
+    def set_element(self, namespace, identifier, value):
+        """Sets one element; returns False if the value was unchanged."""
+        elements = self.namespaces.setdefault(namespace, {})
+        current = elements.get(identifier)
+        if current is not None and current.value == value and type(current.value) is type(value):
+            return False
+        if current is not None:
+            digest_id = current.digest_id
+        else:
+            digest_id = self._next_digest_id.get(namespace, 0)
+            self._next_digest_id[namespace] = digest_id + 1
+        elements[identifier] = self._element(digest_id, identifier, value)
+        self._issuer_auth = None
+        return True
+
+    def remove_element(self, namespace, identifier):
+        if self.namespaces.get(namespace, {}).pop(identifier, None) is not None:
+            self._issuer_auth = None
+
+    def _element(self, digest_id, identifier, value):
+        # A fresh salt on every change so old and new digests cannot be linked
+        item = CBOREncoder.encode({
+            'digestID': digest_id,
+            'random': secrets.token_bytes(16),
+            'elementIdentifier': identifier,
+            'elementValue': value,
+        })
+        digest = self._hash(CBOREncoder.encode(CBORTag(ENCODED_CBOR_TAG, item))).digest()
+        return Element(digest_id, value, item, digest)
+
+    def mso(self, device_key, valid_from, valid_until, signed=None, expected_update=None):
+        """
+        The MSO as a dict. `device_key` is a COSE_Key map or a public key
+        from the cryptography package.
+        """
+        if not isinstance(device_key, dict):
+            device_key = cose_key(device_key)
+        validity = {
+            'signed': _tdate(signed or datetime.datetime.now(datetime.timezone.utc)),
+            'validFrom': _tdate(valid_from),
+            'validUntil': _tdate(valid_until),
+        }
+        if expected_update is not None:
+            validity['expectedUpdate'] = _tdate(expected_update)
+        return {
+            'version': '1.0',
+            'digestAlgorithm': self.digest_algorithm,
+            'valueDigests': {
+                namespace: {element.digest_id: element.digest for element in elements.values()}
+                for namespace, elements in self.namespaces.items() if elements
+            },
+            'deviceKeyInfo': {'deviceKey': device_key},
+            'docType': self.doc_type,
+            'validityInfo': validity,
+        }
+
+    def sign(self, signer, device_key, valid_from, valid_until, expected_update=None):
+        """
+        Returns issuerAuth (an untagged COSE_Sign1 array over
+        MobileSecurityObjectBytes). It is re-signed only if an element or
+        the validity window changed since the last call.
+        """
+        if not isinstance(device_key, dict):
+            device_key = cose_key(device_key)
+        signed_with = (signer.kid, CBOREncoder.encode(device_key), valid_from, valid_until, expected_update)
+        if self._issuer_auth is None or self._signed_with != signed_with:
+            mso = self.mso(device_key, valid_from, valid_until, expected_update=expected_update)
+            payload = CBOREncoder.encode(CBORTag(ENCODED_CBOR_TAG, CBOREncoder.encode(mso)))
+            self._issuer_auth = signer.sign_message(payload)
+            self._signed_with = signed_with
+        return self._issuer_auth
+
+    def issuer_signed(self, issuer_auth=None):
+        """IssuerSigned structure: nameSpaces of IssuerSignedItemBytes plus issuerAuth."""
+        issuer_signed = {
+            'nameSpaces': {
+                namespace: [CBORTag(ENCODED_CBOR_TAG, element.item) for element in elements.values()]
+                for namespace, elements in self.namespaces.items() if elements
+            },
+        }
+        issuer_auth = issuer_auth or self._issuer_auth
+        if issuer_auth is not None:
+            issuer_signed['issuerAuth'] = issuer_auth
+        return issuer_signed
 
     def to_cbor(self):
-        # Stub for ISO 18013-5 mDoc structure
-        return {"docType": "org.iso.18013.5.1.mDL", "namespaces": self.namespaces}
+        """The Document structure (docType + issuerSigned) as CBOR-ready data."""
+        return {'docType': self.doc_type, 'issuerSigned': self.issuer_signed()}
+
+    def to_state(self):
+        """Salted elements and digests as CBOR bytes, for storage."""
+        return CBOREncoder.encode({
+            'docType': self.doc_type,
+            'digestAlgorithm': self.digest_algorithm,
+            'nextDigestID': self._next_digest_id,
+            'elements': {
+                namespace: {identifier: [e.digest_id, e.item, e.digest] for identifier, e in elements.items()}
+                for namespace, elements in self.namespaces.items()
+            },
+        })
+
+    @classmethod
+    def from_state(cls, data):
+        state = CBORDecoder.decode(data)
+        mdoc = cls(state['docType'], state['digestAlgorithm'])
+        mdoc._next_digest_id = dict(state['nextDigestID'])
+        for namespace, elements in state['elements'].items():
+            mdoc.namespaces[namespace] = {}
+            for identifier, (digest_id, item, digest) in elements.items():
+                item = bytes(item)
+                value = CBORDecoder.decode(item)['elementValue']
+                if isinstance(value, memoryview):
+                    value = bytes(value)
+                mdoc.namespaces[namespace][identifier] = Element(digest_id, value, item, bytes(digest))
+        return mdoc
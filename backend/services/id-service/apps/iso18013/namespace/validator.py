@@ -0,0 +1,215 @@
+import datetime
+import re
+from collections import namedtuple
+
+NamespaceError = namedtuple('NamespaceError', ['element', 'message'])
+
+# ISO 3166-1 alpha-2
+COUNTRY_CODES = frozenset('''
+AD AE AF AG AI AL AM AO AQ AR AS AT AU AW AX AZ BA BB BD BE BF BG BH BI BJ BL BM BN BO BQ BR BS BT BV BW BY BZ
+CA CC CD CF CG CH CI CK CL CM CN CO CR CU CV CW CX CY CZ DE DJ DK DM DO DZ EC EE EG EH ER ES ET FI FJ FK FM FO FR
+GA GB GD GE GF GG GH GI GL GM GN GP GQ GR GS GT GU GW GY HK HM HN HR HT HU ID IE IL IM IN IO IQ IR IS IT JE JM JO JP
+KE KG KH KI KM KN KP KR KW KY KZ LA LB LC LI LK LR LS LT LU LV LY MA MC MD ME MF MG MH MK ML MM MN MO MP MQ MR MS MT
+MU MV MW MX MY MZ NA NC NE NF NG NI NL NO NP NR NU NZ OM PA PE PF PG PH PK PL PM PN PR PS PT PW PY QA RE RO RS RU RW
+SA SB SC SD SE SG SH SI SJ SK SL SM SN SO SR SS ST SV SX SY SZ TC TD TF TG TH TJ TK TL TM TN TO TR TT TV TW TZ UA UG
+UM US UY UZ VA VC VE VG VI VN VU WF WS YE YT ZA ZM ZW
+'''.split())
+
+# ISO/IEC 5218
+SEX_CODES = frozenset((0, 1, 2, 9))
+EYE_COLOURS = frozenset(('black', 'blue', 'brown', 'dichromatic', 'grey', 'green', 'hazel', 'maroon', 'pink', 'unknown'))
+HAIR_COLOURS = frozenset(('bald', 'black', 'blond', 'brown', 'grey', 'red', 'auburn', 'sandy', 'white', 'unknown'))
+# ISO 18013-1 vehicle categories
+VEHICLE_CATEGORIES = frozenset(('AM', 'A1', 'A2', 'A', 'B1', 'B', 'BE', 'C1', 'C1E', 'C', 'CE', 'D1', 'D1E', 'D', 'DE'))
+
+TEXT, LATIN1, UINT, BOOL, BYTES, FULL_DATE, DATE_OR_TDATE, TDATE, COUNTRY, PRIVILEGES = range(10)
+
+# identifier -> (kind, mandatory, max_length, allowed values)
+MDL_SCHEMA = {
+    'family_name': (LATIN1, True, 150, None),
+    'given_name': (LATIN1, True, 150, None),
+    'birth_date': (FULL_DATE, True, None, None),
+    'issue_date': (DATE_OR_TDATE, True, None, None),
+    'expiry_date': (DATE_OR_TDATE, True, None, None),
+    'issuing_country': (COUNTRY, True, None, None),
+    'issuing_authority': (LATIN1, True, 150, None),
+    'document_number': (LATIN1, True, 150, None),
+    'portrait': (BYTES, True, None, None),
+    'driving_privileges': (PRIVILEGES, True, None, None),
+    'un_distinguishing_sign': (TEXT, True, 150, None),
+    'administrative_number': (LATIN1, False, 150, None),
+    'sex': (UINT, False, None, SEX_CODES),
+    'height': (UINT, False, None, None),
+    'weight': (UINT, False, None, None),
+    'eye_colour': (TEXT, False, None, EYE_COLOURS),
+    'hair_colour': (TEXT, False, None, HAIR_COLOURS),
+    'birth_place': (LATIN1, False, 150, None),
+    'resident_address': (LATIN1, False, 150, None),
+    'portrait_capture_date': (TDATE, False, None, None),
+    'age_in_years': (UINT, False, None, None),
+    'age_birth_year': (UINT, False, None, None),
+    'issuing_jurisdiction': (TEXT, False, 6, None),
+    'nationality': (COUNTRY, False, None, None),
+    'resident_city': (LATIN1, False, 150, None),
+    'resident_state': (LATIN1, False, 150, None),
+    'resident_postal_code': (LATIN1, False, 150, None),
+    'resident_country': (COUNTRY, False, None, None),
+    'family_name_national_character': (TEXT, False, 150, None),
+    'given_name_national_character': (TEXT, False, 150, None),
+    'signature_usual_mark': (BYTES, False, None, None),
+}
+
+# Element families defined by pattern rather than name
+MDL_PATTERNS = (
+    (re.compile(r'age_over_\d\d'), (BOOL, False, None, None)),
+    (re.compile(r'biometric_template_\w+'), (BYTES, False, None, None)),
+)
+
+_BYTES_TYPES = (bytes, bytearray, memoryview)
+
+
+def _check_privileges(value, errors, element):
+    if not isinstance(value, list):
+        errors.append(NamespaceError(element, "must be an array"))
+        return
+    for i, privilege in enumerate(value):
+        where = f"{element}[{i}]"
+        if not isinstance(privilege, dict):
+            errors.append(NamespaceError(where, "must be a map"))
+            continue
+        category = privilege.get('vehicle_category_code')
+        if type(category) is not str or category not in VEHICLE_CATEGORIES:
+            errors.append(NamespaceError(where, f"unknown vehicle_category_code {category!r}"))
+        for date_field in ('issue_date', 'expiry_date'):
+            date = privilege.get(date_field)
+            if date is not None and (type(date) is not datetime.date):
+                errors.append(NamespaceError(f"{where}.{date_field}", "must be a full-date"))
+        codes = privilege.get('codes')
+        if codes is not None:
+            if not isinstance(codes, list) or not codes:
+                errors.append(NamespaceError(f"{where}.codes", "must be a non-empty array"))
+                continue
+            for code in codes:
+                if not isinstance(code, dict) or not isinstance(code.get('code'), str):
+                    errors.append(NamespaceError(f"{where}.codes", "each code needs a text 'code'"))
+
+
+def _compile(kind, max_length, allowed):
+    """Turns one schema row into a check(value) -> message-or-None closure."""
+    if kind in (TEXT, LATIN1):
+        def check(value):
+            if type(value) is not str:
+                return "must be text"
+            if max_length is not None and len(value) > max_length:
+                return f"longer than {max_length} characters"
+            if kind == LATIN1 and not value.isascii():
+                try:
+                    value.encode('latin-1')
+                except UnicodeEncodeError:
+                    return "must use Latin-1 characters"
+            if allowed is not None and value not in allowed:
+                return f"{value!r} is not an allowed value"
+            return None
+    elif kind == UINT:
+        def check(value):
+            if type(value) is not int or value < 0:
+                return "must be an unsigned integer"
+            if allowed is not None and value not in allowed:
+                return f"{value!r} is not an allowed value"
+            return None
+    elif kind == BOOL:
+        def check(value):
+            return None if type(value) is bool else "must be a boolean"
+    elif kind == BYTES:
+        def check(value):
+            if not isinstance(value, _BYTES_TYPES):
+                return "must be a byte string"
+            return None if len(value) else "must not be empty"
+    elif kind == FULL_DATE:
+        def check(value):
+            return None if type(value) is datetime.date else "must be a full-date (tag 1004)"
+    elif kind == TDATE:
+        def check(value):
+            if type(value) is not datetime.datetime or value.tzinfo is None:
+                return "must be a tdate (tag 0)"
+            return None
+    elif kind == DATE_OR_TDATE:
+        def check(value):
+            if type(value) is datetime.date or (type(value) is datetime.datetime and value.tzinfo is not None):
+                return None
+            return "must be a full-date or tdate"
+    elif kind == COUNTRY:
+        def check(value):
+            if type(value) is not str:
+                return "must be text"
+            return None if value in COUNTRY_CODES else f"{value!r} is not an ISO 3166-1 alpha-2 code"
+    else:
+        check = None  # PRIVILEGES: structured, handled separately
+    return check
+
+
+class NamespaceValidator:
+    """
+    Validates a namespace's data elements ({identifier: value}, as decoded
+    by CBORDecoder) against a schema compiled once into a table of check
+    functions. Each element costs one dict lookup and one call. Every
+    problem is collected, and validate() returns a list of NamespaceError
+    (empty when the namespace is valid).
+    """
+
+    def __init__(self, schema=MDL_SCHEMA, patterns=MDL_PATTERNS, allow_unknown=False):
+        self.allow_unknown = allow_unknown
+        self._checks = {name: (kind, _compile(kind, max_length, allowed)) for name, (kind, _, max_length, allowed) in schema.items()}
+        self._mandatory = frozenset(name for name, row in schema.items() if row[1])
+        self._patterns = [(pattern, row[0], _compile(row[0], row[2], row[3])) for pattern, row in patterns]
+
+    def _lookup(self, element):
+        for pattern, kind, check in self._patterns:
+            if pattern.fullmatch(element):
+                return kind, check
+        return None
+
+    def validate(self, elements, require_mandatory=True):
+        errors = []
+        if not isinstance(elements, dict):
+            return [NamespaceError(None, "namespace must be a map")]
+
+        checks = self._checks
+        for element, value in elements.items():
+            if type(element) is not str:
+                errors.append(NamespaceError(element, "element identifier must be a text string"))
+                continue
+            entry = checks.get(element) or self._lookup(element)
+            if entry is None:
+                if not self.allow_unknown:
+                    errors.append(NamespaceError(element, "unknown data element"))
+                continue
+            kind, check = entry
+            if check is None:
+                _check_privileges(value, errors, element)
+                continue
+            message = check(value)
+            if message is not None:
+                errors.append(NamespaceError(element, message))
+
+        if require_mandatory:
+            for element in sorted(self._mandatory.difference(elements)):
+                errors.append(NamespaceError(element, "mandatory data element missing"))
+        return errors
+
+    def validate_items(self, items, require_mandatory=True):
+        """Same as validate() for a list of decoded IssuerSignedItems."""
+        errors = []
+        elements = {}
+        for item in items:
+            identifier = item.get('elementIdentifier') if isinstance(item, dict) else None
+            if not isinstance(identifier, str):
+                errors.append(NamespaceError(None, "IssuerSignedItem without elementIdentifier"))
+                continue
+            if identifier in elements:
+                errors.append(NamespaceError(identifier, "duplicate data element"))
+            elements[identifier] = item.get('elementValue')
+        return errors + self.validate(elements, require_mandatory)
+
+
+mdl_validator = NamespaceValidator()
@@ -0,0 +1,117 @@
+import datetime
+
+from django.test import SimpleTestCase
+
+from .namespace.validator import MDL_SCHEMA, NamespaceError, NamespaceValidator, mdl_validator
+
+
+def _valid_mdl():
+    return {
+        'family_name': 'Doe',
+        'given_name': 'Jane',
+        'birth_date': datetime.date(1990, 1, 2),
+        'issue_date': datetime.date(2024, 1, 1),
+        'expiry_date': datetime.datetime(2034, 1, 1, tzinfo=datetime.timezone.utc),
+        'issuing_country': 'KE',
+        'issuing_authority': 'NTSA',
+        'document_number': 'DL123456',
+        'portrait': b'\xff\xd8\xff',
+        'driving_privileges': [{'vehicle_category_code': 'B', 'issue_date': datetime.date(2024, 1, 1)}],
+        'un_distinguishing_sign': 'EAK',
+        'age_over_18': True,
+    }
+
+
+class NamespaceValidatorTests(SimpleTestCase):
+    def test_valid_namespace_has_no_errors(self):
+        self.assertEqual(mdl_validator.validate(_valid_mdl()), [])
+
+    def test_unknown_elements_are_reported(self):
+        elements = {**_valid_mdl(), 'favourite_colour': 'blue', 'age_over_eighteen': True}
+        self.assertEqual(mdl_validator.validate(elements), [
+            NamespaceError('favourite_colour', "unknown data element"),
+            NamespaceError('age_over_eighteen', "unknown data element"),
+        ])
+
+    def test_unknown_elements_can_be_allowed(self):
+        elements = {**_valid_mdl(), 'favourite_colour': 'blue'}
+        self.assertEqual(NamespaceValidator(allow_unknown=True).validate(elements), [])
+
+    def test_missing_mandatory_elements_are_reported(self):
+        elements = _valid_mdl()
+        del elements['portrait'], elements['family_name']
+        self.assertEqual(mdl_validator.validate(elements), [
+            NamespaceError('family_name', "mandatory data element missing"),
+            NamespaceError('portrait', "mandatory data element missing"),
+        ])
+        self.assertEqual(mdl_validator.validate(elements, require_mandatory=False), [])
+
+    def test_empty_namespace_reports_every_mandatory_element(self):
+        mandatory = sorted(name for name, row in MDL_SCHEMA.items() if row[1])
+        self.assertEqual([e.element for e in mdl_validator.validate({})], mandatory)
+
+    def test_mistyped_elements_are_all_collected(self):
+        elements = {
+            **_valid_mdl(),
+            'family_name': 42,
+            'birth_date': '1990-01-02',
+            'expiry_date': datetime.datetime(2034, 1, 1),  # naive
+            'issuing_country': 'XX',
+            'portrait': b'',
+            'sex': 3,
+            'height': -1,
+            'age_over_18': 1,
+            'given_name': 'Ĵane',
+            'document_number': 'x' * 151,
+            'driving_privileges': [{'vehicle_category_code': 7, 'issue_date': '2024-01-01'}, 'B'],
+        }
+        self.assertEqual(sorted(mdl_validator.validate(elements)), sorted([
+            NamespaceError('family_name', "must be text"),
+            NamespaceError('birth_date', "must be a full-date (tag 1004)"),
+            NamespaceError('expiry_date', "must be a full-date or tdate"),
+            NamespaceError('issuing_country', "'XX' is not an ISO 3166-1 alpha-2 code"),
+            NamespaceError('portrait', "must not be empty"),
+            NamespaceError('sex', "3 is not an allowed value"),
+            NamespaceError('height', "must be an unsigned integer"),
+            NamespaceError('age_over_18', "must be a boolean"),
+            NamespaceError('given_name', "must use Latin-1 characters"),
+            NamespaceError('document_number', "longer than 150 characters"),
+            NamespaceError('driving_privileges[0]', "unknown vehicle_category_code 7"),
+            NamespaceError('driving_privileges[0].issue_date', "must be a full-date"),
+            NamespaceError('driving_privileges[1]', "must be a map"),
+        ]))
+
+    def test_non_map_namespace_is_an_error_not_an_exception(self):
+        for elements in (None, [], 'family_name', b'\xa0'):
+            with self.subTest(elements=elements):
+                self.assertEqual(mdl_validator.validate(elements), [NamespaceError(None, "namespace must be a map")])
+
+    def test_non_text_identifiers_are_reported(self):
+        errors = NamespaceValidator().validate({1: 'x', b'family_name': 'Doe', b'age_over_18': True},
+                                               require_mandatory=False)
+        self.assertEqual(errors, [
+            NamespaceError(1, "element identifier must be a text string"),
+            NamespaceError(b'family_name', "element identifier must be a text string"),
+            NamespaceError(b'age_over_18', "element identifier must be a text string"),
+        ])
+
+    def test_non_text_identifiers_do_not_satisfy_mandatory_elements(self):
+        errors = NamespaceValidator().validate({b'family_name': 'Doe'})
+        self.assertIn(NamespaceError('family_name', "mandatory data element missing"), errors)
+
+
+class ValidateItemsTests(SimpleTestCase):
+    def test_items_are_validated_like_a_namespace(self):
+        items = [{'elementIdentifier': name, 'elementValue': value} for name, value in _valid_mdl().items()]
+        self.assertEqual(mdl_validator.validate_items(items), [])
+
+    def test_malformed_and_duplicate_items_are_reported(self):
+        items = [{'elementIdentifier': name, 'elementValue': value} for name, value in _valid_mdl().items()]
+        items += [{'elementIdentifier': 'family_name', 'elementValue': 'Roe'}, {'elementValue': 1}, 'junk',
+                  {'elementIdentifier': 5, 'elementValue': 1}]
+        self.assertEqual(mdl_validator.validate_items(items), [
+            NamespaceError('family_name', "duplicate data element"),
+            NamespaceError(None, "IssuerSignedItem without elementIdentifier"),
+            NamespaceError(None, "IssuerSignedItem without elementIdentifier"),
+            NamespaceError(None, "IssuerSignedItem without elementIdentifier"),
+        ])
@@ -0,0 +1,85 @@
+import zlib
+
+from apps.cbor.decoder import CBORDecoder
+from apps.cbor.encoder import CBOREncoder
+
+# Version prefix so scanners can tell compact credentials from other QR content
+COMPACT_PREFIX = 'KE1:'
+
+# RFC 9285; every character is in the QR alphanumeric set
+BASE45_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_BASE45_VALUES = {c: i for i, c in enumerate(BASE45_ALPHABET)}
+
+
+class CompactDecodeError(ValueError):
+    """Raised for text that is not a valid compact credential."""
+
+
+def b45encode(data):
+    out = []
+    append = out.append
+    alphabet = BASE45_ALPHABET
+    for i in range(0, len(data) - 1, 2):
+        n = (data[i] << 8) | data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        append(alphabet[c] + alphabet[d] + alphabet[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        append(alphabet[c] + alphabet[d])
+    return ''.join(out)
+
+
+def b45decode(text):
+    try:
+        values = [_BASE45_VALUES[c] for c in text]
+    except KeyError:
+        raise CompactDecodeError("Invalid Base45 character")
+    if len(values) % 3 == 1:
+        raise CompactDecodeError("Invalid Base45 length")
+    out = bytearray()
+    for i in range(0, len(values) - 2, 3):
+        n = values[i] + values[i + 1] * 45 + values[i + 2] * 2025
+        if n > 0xffff:
+            raise CompactDecodeError("Invalid Base45 triplet")
+        out += n.to_bytes(2, 'big')
+    if len(values) % 3 == 2:
+        n = values[-2] + values[-1] * 45
+        if n > 0xff:
+            raise CompactDecodeError("Invalid Base45 pair")
+        out.append(n)
+    return bytes(out)
+
+
+def encode_compact(data):
+    """
+    CBOR -> zlib -> Base45, prefixed with COMPACT_PREFIX. `data` that is
+    already bytes (e.g. a signed COSE_Sign1 message) is taken as CBOR and
+    compressed as-is; anything else is canonically CBOR-encoded first.
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = CBOREncoder.encode(data)
+    return COMPACT_PREFIX + b45encode(zlib.compress(data, 9))
+
+
+def decode_compact_bytes(text, max_size=64 * 1024):
+    """Inverse of encode_compact up to the CBOR bytes (not decoded)."""
+    if not text.startswith(COMPACT_PREFIX):
+        raise CompactDecodeError("Missing compact credential prefix")
+    compressed = b45decode(text[len(COMPACT_PREFIX):])
+    try:
+        inflater = zlib.decompressobj()
+        # Bounded so a hostile code cannot inflate into a huge buffer
+        data = inflater.decompress(compressed, max_size)
+        if inflater.unconsumed_tail:
+            raise CompactDecodeError("Compact credential too large")
+        if not inflater.eof:
+            raise CompactDecodeError("Truncated compressed payload")
+    except zlib.error as e:
+        raise CompactDecodeError(f"Invalid compressed payload: {e}")
+    return data
+
+
+def decode_compact(text, max_size=64 * 1024):
+    """Inverse of encode_compact for structured (non-bytes) data."""
+    return CBORDecoder.decode(decode_compact_bytes(text, max_size))
@@ -0,0 +1,206 @@
+import datetime
+import os
+import tempfile
+import zlib
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from django.test import SimpleTestCase
+
+from apps.cbor.encoder import CBOREncoder
+from apps.cose.signer import Signer
+from apps.cose.verifier import COSEVerifier, TrustedKeyCache
+from .compact import (
+    BASE45_ALPHABET, COMPACT_PREFIX, CompactDecodeError, b45decode, b45encode, decode_compact,
+    decode_compact_bytes, encode_compact,
+)
+from .validator import MAX_QR_CHARS, QRValidator, ValidationResult
+
+
+class Base45Tests(SimpleTestCase):
+    # RFC 9285 section 4.3 / 4.4
+    VECTORS = {
+        b'AB': 'BB8',
+        b'Hello!!': '%69 VD92EX0',
+        b'base-45': 'UJCLQE7W581',
+        b'ietf!': 'QED8WEX0',
+        b'': '',
+    }
+
+    def test_rfc_vectors(self):
+        for data, text in self.VECTORS.items():
+            with self.subTest(data=data):
+                self.assertEqual(b45encode(data), text)
+                self.assertEqual(b45decode(text), data)
+
+    def test_round_trip(self):
+        for length in (1, 2, 3, 64, 1001):
+            data = os.urandom(length)
+            with self.subTest(length=length):
+                text = b45encode(data)
+                self.assertEqual(len(text), length // 2 * 3 + length % 2 * 2)
+                self.assertTrue(set(text) <= set(BASE45_ALPHABET))
+                self.assertEqual(b45decode(text), data)
+
+    def test_extreme_values_round_trip(self):
+        for data in (b'\x00\x00', b'\xff\xff', b'\x00', b'\xff'):
+            with self.subTest(data=data):
+                self.assertEqual(b45decode(b45encode(data)), data)
+
+    def test_invalid_characters_are_rejected(self):
+        for text in ('bb8', 'BB8=', 'BB_', 'ÀB8', 'BB8\n'):
+            with self.subTest(text=text), self.assertRaisesRegex(CompactDecodeError, 'character'):
+                b45decode(text)
+
+    def test_invalid_length_is_rejected(self):
+        for text in ('B', 'BB8B', 'BB8BB8B'):
+            with self.subTest(text=text), self.assertRaisesRegex(CompactDecodeError, 'length'):
+                b45decode(text)
+
+    def test_out_of_range_groups_are_rejected(self):
+        # 'GGW' is 65536 and ':6' is 256, one past the largest two- and one-byte values
+        with self.assertRaisesRegex(CompactDecodeError, 'triplet'):
+            b45decode('GGW')
+        with self.assertRaisesRegex(CompactDecodeError, 'pair'):
+            b45decode('BB8' + ':6')
+
+
+class CompactCredentialTests(SimpleTestCase):
+    def test_structured_data_round_trips(self):
+        value = {'name': 'Jane Doe', 'id': 12345678, 'photo': b'\xff\xd8'}
+        text = encode_compact(value)
+        self.assertTrue(text.startswith(COMPACT_PREFIX))
+        decoded = decode_compact(text)
+        decoded['photo'] = bytes(decoded['photo'])
+        self.assertEqual(decoded, value)
+
+    def test_bytes_are_compressed_as_is(self):
+        data = b'\xd2\x84' + os.urandom(40)
+        self.assertEqual(decode_compact_bytes(encode_compact(data)), data)
+
+    def test_missing_prefix_is_rejected(self):
+        text = encode_compact({'a': 1})
+        with self.assertRaisesRegex(CompactDecodeError, 'prefix'):
+            decode_compact_bytes(text[len(COMPACT_PREFIX):])
+
+    def test_invalid_compressed_payload_is_rejected(self):
+        for payload in (b'not zlib', zlib.compress(b'x' * 100)[:-4]):
+            with self.subTest(payload=payload), self.assertRaises(CompactDecodeError):
+                decode_compact_bytes(COMPACT_PREFIX + b45encode(payload))
+
+    def test_inflate_is_bounded(self):
+        text = COMPACT_PREFIX + b45encode(zlib.compress(b'\x00' * 100_000))
+        with self.assertRaisesRegex(CompactDecodeError, 'too large'):
+            decode_compact_bytes(text, max_size=1024)
+        self.assertEqual(len(decode_compact_bytes(text, max_size=100_000)), 100_000)
+
+
+class _CountingVerifier:
+    """Wraps a COSEVerifier and records how many messages reach the signature check."""
+
+    def __init__(self, verifier):
+        self.verifier = verifier
+        self.verified = 0
+
+    def verify_many(self, messages):
+        self.verified += len(messages)
+        return self.verifier.verify_many(messages)
+
+
+class QRValidatorTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        cls.key_dir = tempfile.TemporaryDirectory()
+        key_path = os.path.join(cls.key_dir.name, 'issuer.pem')
+        with open(key_path, 'wb') as f:
+            f.write(private_key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+        cls.signer = Signer(key_path)
+        cls.public_key = private_key.public_key()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.key_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        key_cache = TrustedKeyCache()
+        key_cache.add_key(self.public_key)
+        self.verifier = _CountingVerifier(COSEVerifier(key_cache))
+        self.validator = QRValidator(self.verifier)
+
+    def credential(self, claims):
+        return encode_compact(self.signer.sign(CBOREncoder.encode(claims)))
+
+    def assertRejected(self, text, error):
+        result = self.validator.validate(text)
+        self.assertFalse(result.valid)
+        self.assertRegex(result.error, error)
+        return result
+
+    def test_valid_credential(self):
+        expiry = datetime.date.today() + datetime.timedelta(days=30)
+        result = self.validator.validate(self.credential({'sub': 'ID-1', 'exp': expiry}))
+        self.assertEqual(result, ValidationResult(True, self.signer.kid, {'sub': 'ID-1', 'exp': expiry}, None))
+
+    def test_expired_credential(self):
+        expiry = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=1)
+        result = self.assertRejected(self.credential({'sub': 'ID-1', 'exp': expiry}), 'expired')
+        self.assertEqual(result.kid, self.signer.kid)
+
+    def test_non_map_claims(self):
+        self.assertRejected(self.credential(['sub', 'ID-1']), 'Claims must be a map')
+
+    def test_untrusted_signer(self):
+        self.validator = QRValidator(COSEVerifier(TrustedKeyCache()))
+        self.assertRejected(self.credential({'sub': 'ID-1'}), 'Unknown key ID')
+
+    def test_tampered_signature(self):
+        message = bytearray(self.signer.sign(CBOREncoder.encode({'sub': 'ID-1'})))
+        message[-1] ^= 1
+        self.assertRejected(encode_compact(bytes(message)), 'Signature mismatch')
+
+    def test_malformed_input_is_rejected_before_crypto(self):
+        too_long = COMPACT_PREFIX + 'A' * (MAX_QR_CHARS - len(COMPACT_PREFIX) + 2)
+        cases = [
+            (b'KE1:BB8', 'must be text'),
+            (None, 'must be text'),
+            ('', 'length out of range'),
+            (COMPACT_PREFIX, 'length out of range'),
+            (too_long, 'length out of range'),
+            ('HC1:' + self.credential({'sub': 'ID-1'})[len(COMPACT_PREFIX):], 'Not a compact credential'),
+            (COMPACT_PREFIX + 'bb8', 'Invalid Base45 payload'),
+            (COMPACT_PREFIX + 'BB8B', 'Invalid Base45 payload'),
+            (COMPACT_PREFIX + b45encode(b'\x00\x00' + os.urandom(20)), 'Invalid compressed payload'),
+            (COMPACT_PREFIX + b45encode(zlib.compress(b'\xd2\x84')[:-2]), 'Truncated'),
+            (COMPACT_PREFIX + b45encode(zlib.compress(b'\x00' * 10_000)), 'too large'),
+            (encode_compact({'sub': 'ID-1'}), 'Not a COSE_Sign1 credential'),
+            (encode_compact(b'\xd2\x84\x01\x02\x03\x04'), r'expected \[bstr, map, bstr, bstr\]'),
+            (encode_compact(b'\xd2\x84\x40\xa0'), 'Malformed COSE_Sign1'),
+            (encode_compact(b'\xd2\x84' + b'\x81' * 50 + b'\x00'), 'Malformed COSE_Sign1'),
+        ]
+        for text, error in cases:
+            with self.subTest(text=text if not isinstance(text, str) else text[:40]):
+                self.assertRejected(text, error)
+        self.assertEqual(self.verifier.verified, 0)
+
+    def test_results_are_cached_by_payload(self):
+        text = self.credential({'sub': 'ID-1'})
+        first = self.validator.validate(text)
+        self.assertIs(self.validator.validate(text), first)
+        self.assertEqual(self.verifier.verified, 1)
+
+    def test_rejections_are_cached(self):
+        text = encode_compact({'sub': 'ID-1'})
+        first = self.validator.validate(text)
+        self.assertIs(self.validator.validate(text), first)
+
+    def test_batch_verifies_each_distinct_payload_once(self):
+        one, two = self.credential({'sub': 'ID-1'}), self.credential({'sub': 'ID-2'})
+        results = self.validator.validate_many([one, 'junk', two, one, None, two])
+        self.assertEqual([r.valid for r in results], [True, False, True, True, False, True])
+        self.assertEqual(results[0].claims, {'sub': 'ID-1'})
+        self.assertEqual(results[2].claims, {'sub': 'ID-2'})
+        self.assertEqual(self.verifier.verified, 2)
@@ -0,0 +1,168 @@
+import datetime
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from cbor2 import CBORTag
+
+from apps.cbor.decoder import CBORDecoder, CBORDecodeError
+from apps.cose.utils import COSE_SIGN1_TAG
+from apps.cose.verifier import MAX_DEPTH as COSE_MAX_DEPTH
+from .compact import COMPACT_PREFIX, CompactDecodeError, b45decode, decode_compact_bytes
+
+ValidationResult = namedtuple('ValidationResult', ['valid', 'kid', 'claims', 'error'])
+
+# Largest alphanumeric payload a version-40 QR code can hold
+MAX_QR_CHARS = 4296
+
+_BASE45_RE = re.compile(r'[0-9A-Z $%*+\-./:]*')
+
+
+class _ResultCache:
+    """Bounded LRU of validation results keyed by payload digest, with a TTL."""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return result
+
+    def put(self, digest, result):
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class QRValidator:
+    """
+    Validates compact QR credentials (Base45 -> inflate -> COSE_Sign1 ->
+    CBOR claims) for verifier lanes.
+
+    The checks run cheapest first: length, prefix and alphabet, then the
+    zlib header, then the bounded inflate, then the COSE_Sign1 framing
+    bytes and structure (a depth-bounded decode to [bstr, map, bstr,
+    bstr]). Only input that passes all of them reaches the signature check,
+    and malformed input always ends in a rejection, never an exception.
+    Results (failures included) are cached by SHA-256 of the scanned
+    text for `cache_ttl` seconds, so repeated scans of the same code cost
+    one hash.
+    """
+
+    def __init__(self, verifier, cache_ttl=30, cache_size=10000, max_inflated=8 * 1024):
+        self.verifier = verifier
+        self.max_inflated = max_inflated
+        self.cache = _ResultCache(cache_ttl, cache_size)
+
+    @staticmethod
+    def _reject(error):
+        return ValidationResult(False, None, None, error)
+
+    def _precheck(self, text):
+        """Structural checks without crypto. Returns the decoded COSE_Sign1 or a failed result."""
+        if not isinstance(text, str):
+            return self._reject("Payload must be text")
+        if not len(COMPACT_PREFIX) + 3 <= len(text) <= MAX_QR_CHARS:
+            return self._reject("Payload length out of range")
+        if not text.startswith(COMPACT_PREFIX):
+            return self._reject("Not a compact credential")
+        body_length = len(text) - len(COMPACT_PREFIX)
+        if body_length % 3 == 1 or not _BASE45_RE.fullmatch(text, len(COMPACT_PREFIX)):
+            return self._reject("Invalid Base45 payload")
+        try:
+            # zlib header: CM=8 and the FCHECK bits (first two bytes, 3 chars)
+            header = int.from_bytes(b45decode(text[len(COMPACT_PREFIX):len(COMPACT_PREFIX) + 3]), 'big')
+            if header >> 8 & 0x0f != 8 or header % 31:
+                return self._reject("Invalid compressed payload")
+            data = decode_compact_bytes(text, self.max_inflated)
+        except CompactDecodeError as e:
+            return self._reject(str(e))
+        # COSE_Sign1: tag 18 (0xd2) wrapping a 4-element array (0x84)
+        if data[:2] != b'\xd2\x84':
+            return self._reject("Not a COSE_Sign1 credential")
+        try:
+            message = CBORDecoder.decode(data, max_depth=COSE_MAX_DEPTH)
+        except CBORDecodeError as e:
+            return self._reject(f"Malformed COSE_Sign1: {e}")
+        if not isinstance(message, CBORTag) or message.tag != COSE_SIGN1_TAG:
+            return self._reject("Not a COSE_Sign1 credential")
+        protected, unprotected, payload, signature = message.value
+        if not (isinstance(protected, memoryview) and isinstance(unprotected, dict)
+                and isinstance(payload, memoryview) and isinstance(signature, memoryview)):
+            return self._reject("Malformed COSE_Sign1: expected [bstr, map, bstr, bstr]")
+        return message
+
+    def _finish(self, verification):
+        if not verification.valid:
+            return self._reject(verification.error)
+        try:
+            claims = CBORDecoder.decode(verification.payload)
+        except CBORDecodeError as e:
+            return ValidationResult(False, verification.kid, None, f"Invalid claims: {e}")
+        if not isinstance(claims, dict):
+            return ValidationResult(False, verification.kid, None, "Claims must be a map")
+        expiry = claims.get('exp')
+        if isinstance(expiry, datetime.datetime):
+            expired = expiry < datetime.datetime.now(datetime.timezone.utc)
+        elif isinstance(expiry, datetime.date):
+            expired = expiry < datetime.date.today()
+        else:
+            expired = False
+        if expired:
+            return ValidationResult(False, verification.kid, claims, "Credential expired")
+        return ValidationResult(True, verification.kid, claims, None)
+
+    def validate(self, text):
+        return self.validate_many([text])[0]
+
+    def validate_many(self, texts):
+        """
+        Validates a batch of scanned payloads and returns one
+        ValidationResult per payload, in order. Signatures that pass the
+        prechecks are verified together, one key lookup per signer.
+        """
+        results = [None] * len(texts)
+        pending = {}  # digest -> (decoded COSE_Sign1, [indexes])
+        for i, text in enumerate(texts):
+            digest = hashlib.sha256(text.encode('utf-8', 'replace')).digest() if isinstance(text, str) else None
+            if digest is not None:
+                cached = self.cache.get(digest)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+                if digest in pending:
+                    pending[digest][1].append(i)
+                    continue
+            checked = self._precheck(text)
+            if isinstance(checked, ValidationResult):
+                results[i] = checked
+                if digest is not None:
+                    self.cache.put(digest, checked)
+                continue
+            pending[digest] = (checked, [i])
+
+        if pending:
+            digests = list(pending)
+            verifications = self.verifier.verify_many([pending[d][0] for d in digests])
+            for digest, verification in zip(digests, verifications):
+                result = self._finish(verification)
+                self.cache.put(digest, result)
+                for i in pending[digest][1]:
+                    results[i] = result
+        return results
+
@@ -0,0 +1,19 @@
+"""
+ASGI config for id_service project.
+
+Run with an ASGI server, e.g.:
+    uvicorn id_service.asgi:application --workers 2
+
+Serving through ASGI turns on the async IPRS-bound views (ASYNC_VIEWS)
+unless the environment says otherwise. Batch ZIPs are still streamed
+chunk by chunk: DocumentViewSet.batch hands ASGI an async iterator.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'id_service.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+
+application = get_asgi_application()
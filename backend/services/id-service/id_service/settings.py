@@ -67,3 +67,45 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# IPRS Client Config
+# In Docker, this would be http://iprs-mock:8000/api/v1/citizens/
+IPRS_URL = os.environ.get('IPRS_URL', 'http://localhost:8005/api/v1/citizens/')
+IPRS_TIMEOUT = float(os.environ.get('IPRS_TIMEOUT', '3'))  # seconds per attempt
+IPRS_DEADLINE = float(os.environ.get('IPRS_DEADLINE', '5'))  # seconds per call, all retries included
+IPRS_MAX_RETRIES = int(os.environ.get('IPRS_MAX_RETRIES', '2'))
+IPRS_POOL_SIZE = int(os.environ.get('IPRS_POOL_SIZE', '20'))
+IPRS_BREAKER_THRESHOLD = int(os.environ.get('IPRS_BREAKER_THRESHOLD', '5'))
+IPRS_BREAKER_RESET = float(os.environ.get('IPRS_BREAKER_RESET', '30'))
+
+# Generated Document Cache
+PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', str(BASE_DIR / 'pdf_cache'))
+PDF_CACHE_MEMORY_BYTES = int(os.environ.get('PDF_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+PDF_CACHE_DISK_BYTES = int(os.environ.get('PDF_CACHE_DISK_BYTES', str(512 * 1024 * 1024)))
+
+# Bulk Document Generation
+DOCUMENT_BATCH_WORKERS = int(os.environ.get('DOCUMENT_BATCH_WORKERS', str(os.cpu_count() or 2)))
+DOCUMENT_BATCH_MAX_CONCURRENT = int(os.environ.get('DOCUMENT_BATCH_MAX_CONCURRENT', '2'))  # per process
+DOCUMENT_BATCH_MAX_SIZE = int(os.environ.get('DOCUMENT_BATCH_MAX_SIZE', '1000'))
+DOCUMENT_BATCH_CHUNK_SIZE = int(os.environ.get('DOCUMENT_BATCH_CHUNK_SIZE', '50'))  # cards per merged PDF
+
+# Dashboard Analytics
+IPRS_ANALYTICS_TTL = float(os.environ.get('IPRS_ANALYTICS_TTL', '300'))  # seconds
+
+# Document Number Allocation
+DOCUMENT_NUMBER_BLOCK_SIZE = int(os.environ.get('DOCUMENT_NUMBER_BLOCK_SIZE', '100'))  # numbers leased per worker
+BULK_ISSUANCE_MAX_SIZE = int(os.environ.get('BULK_ISSUANCE_MAX_SIZE', '5000'))
+
+# List Pagination
+LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', '50'))
+LIST_MAX_PAGE_SIZE = int(os.environ.get('LIST_MAX_PAGE_SIZE', '500'))
+
+# Revocation Status List
+STATUS_LIST_SIGNING_KEY = os.environ.get('STATUS_LIST_SIGNING_KEY', '')  # PEM/DER private key path
+STATUS_LIST_SIGNING_KEY_PASSWORD = os.environ.get('STATUS_LIST_SIGNING_KEY_PASSWORD') or None
+STATUS_LIST_TTL = int(os.environ.get('STATUS_LIST_TTL', '3600'))  # seconds a verifier may use a snapshot
+STATUS_LIST_DELTA_RETENTION = int(os.environ.get('STATUS_LIST_DELTA_RETENTION', '1000'))  # versions kept for deltas
+
+# Async Views
+# Serve the IPRS-bound endpoints from apps.digital_id.async_views; asgi.py switches this on
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
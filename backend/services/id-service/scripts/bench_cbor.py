@@ -0,0 +1,104 @@
+"""
+Benchmark for the canonical CBOR layer against the previous cbor2 wrapper
+(plain cbor2.dumps / cbor2.loads).
+
+Usage (from the id-service directory):
+    python scripts/bench_cbor.py [iterations]
+"""
+import datetime
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import cbor2
+
+sys.path.append(os.getcwd())
+
+from apps.cbor.decoder import CBORDecoder
+from apps.cbor.encoder import CBOREncoder
+
+
+def claims():
+    return {
+        'family_name': 'Kamau',
+        'given_name': 'Wanjiru',
+        'birth_date': datetime.date(1990, 5, 17),
+        'issue_date': datetime.date(2026, 2, 1),
+        'expiry_date': datetime.date(2036, 2, 1),
+        'issuing_country': 'KE',
+        'issuing_authority': 'NRB',
+        'document_number': 'ID-12345678',
+        'sex': 2,
+        'age_over_18': True,
+        'age_over_21': True,
+        'nationality': 'KE',
+    }
+
+
+PAYLOADS = {
+    'claims': claims(),
+    'mdoc+portrait': {
+        'docType': 'org.iso.18013.5.1.mDL',
+        'nameSpaces': {'org.iso.18013.5.1': claims()},
+        'portrait': os.urandom(60 * 1024),
+        'digests': {i: os.urandom(32) for i in range(16)},
+    },
+    'batch-1000': [claims() for _ in range(1000)],
+}
+
+
+class NullWriter:
+    def write(self, data):
+        return len(data)
+
+
+def timed(fn, iterations):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def peak_bytes(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def bench(iterations):
+    print(f"{'payload':<16}{'op':<22}{'us/op':>12}{'peak KiB':>12}")
+    for name, payload in PAYLOADS.items():
+        n = max(1, iterations // 100) if name == 'batch-1000' else iterations
+        legacy = cbor2.dumps(payload)
+        canonical = CBOREncoder.encode(payload)
+        rows = [
+            ('cbor2.dumps', lambda: cbor2.dumps(payload)),
+            ('cbor2.dumps canonical', lambda: cbor2.dumps(payload, canonical=True)),
+            ('encode', lambda: CBOREncoder.encode(payload)),
+            ('encode_to (stream)', lambda: CBOREncoder.encode_to(payload, NullWriter())),
+            ('cbor2.loads', lambda: cbor2.loads(legacy)),
+            ('decode', lambda: CBORDecoder.decode(canonical)),
+            ('decode strict', lambda: CBORDecoder.decode(canonical, strict=True)),
+        ]
+        for op, fn in rows:
+            print(f"{name:<16}{op:<22}{timed(fn, n):>12.1f}{peak_bytes(fn) / 1024:>12.1f}")
+        print(f"{name:<16}{'size (legacy/canon)':<22}{len(legacy):>12}{len(canonical):>12}")
+
+    # Streaming keeps the encoder's own buffer bounded by chunk_size
+    big = {'portraits': [os.urandom(256 * 1024) for _ in range(16)]}
+    sink = io.BytesIO()
+    print(f"\n4 MiB payload, peak KiB: cbor2.dumps {peak_bytes(lambda: cbor2.dumps(big)) / 1024:.0f}, "
+          f"encode_to {peak_bytes(lambda: CBOREncoder.encode_to(big, NullWriter())) / 1024:.0f}")
+    CBOREncoder.encode_to(big, sink)
+    data = sink.getvalue()
+    print(f"4 MiB payload, decode peak KiB: cbor2.loads {peak_bytes(lambda: cbor2.loads(data)) / 1024:.0f}, "
+          f"CBORDecoder {peak_bytes(lambda: CBORDecoder.decode(data)) / 1024:.0f}")
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
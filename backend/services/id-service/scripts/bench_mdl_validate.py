@@ -0,0 +1,88 @@
+"""
+Benchmark for the org.iso.18013.5.1 namespace validator: namespaces
+validated per second on one core, for well-formed and faulty mDL payloads.
+
+Usage (from the id-service directory):
+    python scripts/bench_mdl_validate.py [namespaces]
+"""
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from apps.cbor.decoder import CBORDecoder
+from apps.iso18013.mdoc import MDL_NAMESPACE, MDoc
+from apps.iso18013.namespace.validator import mdl_validator
+
+
+def namespace(i):
+    rng = random.Random(i)
+    return {
+        'family_name': rng.choice(['KAMAU', 'OTIENO', 'WANJIKU', 'MÜLLER']),
+        'given_name': rng.choice(['WANJIRU', 'AMANI', 'ACHIENG']),
+        'birth_date': datetime.date(1960 + rng.randrange(45), 1 + rng.randrange(12), 1 + rng.randrange(28)),
+        'issue_date': datetime.date(2024, 2, 1),
+        'expiry_date': datetime.date(2034, 2, 1),
+        'issuing_country': 'KE',
+        'issuing_authority': 'NTSA',
+        'document_number': f"DL{10000000 + i}",
+        'portrait': os.urandom(rng.randrange(8000, 14000)),
+        'driving_privileges': [
+            {'vehicle_category_code': 'B', 'issue_date': datetime.date(2010, 3, 4), 'expiry_date': datetime.date(2034, 2, 1)},
+            {'vehicle_category_code': 'C1', 'codes': [{'code': '78'}]},
+        ],
+        'un_distinguishing_sign': 'EAK',
+        'sex': rng.choice([1, 2]),
+        'height': 150 + rng.randrange(50),
+        'eye_colour': 'brown',
+        'resident_address': 'P.O. Box 30000, Nairobi',
+        'nationality': 'KE',
+        'age_over_18': True,
+        'age_over_21': True,
+    }
+
+
+def corrupt(elements, rng):
+    elements = dict(elements)
+    elements.pop(rng.choice(['portrait', 'birth_date', 'document_number']))
+    elements['issuing_country'] = 'XX'
+    elements['sex'] = 5
+    elements['driving_privileges'] = [{'vehicle_category_code': 'Z'}]
+    elements['birth_date_text'] = '1990-05-17'
+    return elements
+
+
+def rate(label, fn, count):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44}{count / elapsed:>12.0f}")
+
+
+def bench(n):
+    rng = random.Random(0)
+    valid = [namespace(i) for i in range(n)]
+    faulty = [corrupt(elements, rng) for elements in valid]
+
+    # Wire form: IssuerSignedItems decoded from the mdoc's tag-24 items
+    items = []
+    for elements in valid[:n]:
+        mdoc = MDoc()
+        mdoc.add_namespace(MDL_NAMESPACE, elements)
+        items.append([CBORDecoder.decode(e.item) for e in mdoc.namespaces[MDL_NAMESPACE].values()])
+
+    assert not any(mdl_validator.validate(elements) for elements in valid)
+    assert all(len(mdl_validator.validate(elements)) >= 5 for elements in faulty)
+    assert not any(mdl_validator.validate_items(i) for i in items)
+
+    print(f"{'scenario':<44}{'namespaces/s':>12}")
+    rate("well-formed namespace", lambda: [mdl_validator.validate(e) for e in valid], n)
+    rate("faulty namespace (all errors collected)", lambda: [mdl_validator.validate(e) for e in faulty], n)
+    rate("decoded IssuerSignedItems", lambda: [mdl_validator.validate_items(i) for i in items], n)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
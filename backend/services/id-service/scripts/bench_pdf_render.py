@@ -0,0 +1,60 @@
+"""
+Benchmark for PDFService document rendering (cache bypassed).
+
+Usage (from the id-service directory):
+    python scripts/bench_pdf_render.py [iterations]
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'id_service.settings')
+
+import django
+django.setup()
+
+from apps.digital_id.services.pdf_service import DOCUMENT_DRAWERS, DOCUMENT_GENERATORS, StaticLayerCanvas
+
+CITIZEN = {
+    'national_id': '12345678',
+    'first_name': 'Wanjiru',
+    'last_name': 'Kamau',
+    'date_of_birth': '1990-05-17',
+    'gender': 'F',
+    'county_of_birth': 'Kiambu - Thika',
+    'place_of_birth': 'Thika',
+}
+
+
+def bench(iterations):
+    print(f"{'document':<20}{'ms/render':>12}{'renders/s':>12}{'bytes':>10}")
+    for doc_type, generate in DOCUMENT_GENERATORS.items():
+        generate(CITIZEN)  # Warm up fonts and any per-process caches
+        start = time.perf_counter()
+        for _ in range(iterations):
+            pdf = generate(CITIZEN)
+        elapsed = time.perf_counter() - start
+        print(f"{doc_type:<20}{elapsed / iterations * 1000:>12.3f}{iterations / elapsed:>12.1f}{len(pdf):>10}")
+
+
+def bench_shared_layers(cards):
+    """Many cards in one file, static layers shared as form XObjects."""
+    print(f"\n{cards} cards per file (shared static layers)")
+    print(f"{'document':<20}{'ms/card':>12}{'bytes/card':>12}")
+    for doc_type, draw in DOCUMENT_DRAWERS.items():
+        start = time.perf_counter()
+        buffer = io.BytesIO()
+        c = StaticLayerCanvas(buffer)
+        for _ in range(cards):
+            draw(c, CITIZEN)
+        c.save()
+        elapsed = time.perf_counter() - start
+        print(f"{doc_type:<20}{elapsed / cards * 1000:>12.3f}{len(buffer.getvalue()) / cards:>12.0f}")
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bench(iterations)
+    bench_shared_layers(100)
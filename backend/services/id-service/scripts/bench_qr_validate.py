@@ -0,0 +1,82 @@
+"""
+Benchmark for QRValidator: validations per second on one core.
+
+Usage (from the id-service directory):
+    python scripts/bench_qr_validate.py [credentials]
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from apps.cbor.encoder import CBOREncoder
+from apps.cose.signer import Signer
+from apps.cose.verifier import COSEVerifier, TrustedKeyCache
+from apps.qr.compact import encode_compact
+from apps.qr.validator import QRValidator
+
+
+def make_signer(private_key, directory):
+    path = os.path.join(directory, f"{type(private_key).__name__}.pem")
+    with open(path, 'wb') as f:
+        f.write(private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    return Signer(path)
+
+
+def credential(i):
+    return {
+        'v': 1,
+        'doc': 'NATIONAL_ID',
+        'no': f"ID-{10000000 + i}",
+        'fn': 'KAMAU',
+        'gn': 'WANJIRU',
+        'dob': datetime.date(1990, 5, 17),
+        'exp': datetime.date(2036, 2, 1),
+    }
+
+
+def rate(label, fn, count):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40}{count / elapsed:>12.0f}")
+
+
+def bench(n):
+    directory = tempfile.mkdtemp()
+    print(f"{'scenario':<40}{'validations/s':>12}")
+    for name, key in (('ES256', ec.generate_private_key(ec.SECP256R1())), ('EdDSA', ed25519.Ed25519PrivateKey.generate())):
+        signer = make_signer(key, directory)
+        cache = TrustedKeyCache()
+        cache.add_key(key.public_key())
+        codes = [encode_compact(signer.sign(CBOREncoder.encode(credential(i)))) for i in range(n)]
+        malformed = [code[:-4] + 'abcd' for code in codes[:n // 2]] + [code.replace('KE1:', 'HC1:') for code in codes[n // 2:]]
+        tampered = [code[:-6] + ('0' if code[-6] != '0' else '1') + code[-5:] for code in codes]
+
+        validator = QRValidator(COSEVerifier(cache))
+        rate(f"{name} unique, one at a time", lambda: [validator.validate(c) for c in codes], n)
+        rate(f"{name} repeat scans (cached)", lambda: [validator.validate(c) for c in codes], n)
+
+        validator = QRValidator(COSEVerifier(cache))
+        rate(f"{name} unique, validate_many", lambda: validator.validate_many(codes), n)
+
+        validator = QRValidator(COSEVerifier(cache))
+        rate(f"{name} malformed (rejected pre-crypto)", lambda: [validator.validate(c) for c in malformed], n)
+        rate(f"{name} tampered bytes", lambda: [validator.validate(c) for c in tampered], n)
+
+        validator = QRValidator(COSEVerifier(cache))
+        lane = [random.choice(codes[:n // 10]) for _ in range(n)]
+        rate(f"{name} lane mix (10% distinct codes)", lambda: validator.validate_many(lane), n)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -65,8 +65,10 @@ class Endpoints:
     
     # ID Service
     DIGITAL_IDS = f"{ID_SERVICE_URL}/digital_ids/"
+    DIGITAL_IDS_COUNT = f"{ID_SERVICE_URL}/digital_ids/count/"
     ISSUE_ID = f"{ID_SERVICE_URL}/digital_ids/issue/"
     REQUESTS = f"{ID_SERVICE_URL}/requests/"
+    REQUESTS_SUMMARY = f"{ID_SERVICE_URL}/requests/summary/"
     
     # Audit
     AUDIT_LOGS = f"{AUDIT_SERVICE_URL}/audit/logs/"
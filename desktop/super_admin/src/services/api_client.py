@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+import requests
+
+
+class ConditionalClient:
+    """
+    GET with ETag revalidation. The last 200 response per URL is kept;
+    the next request for that URL sends If-None-Match, and a 304 reply
+    hands back the kept response without re-downloading the body.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.session = requests.Session()
+        self._responses = OrderedDict()  # url -> last 200 response with an ETag
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=5):
+        key = requests.Request('GET', url, params=params).prepare().url
+        with self._lock:
+            cached = self._responses.get(key)
+        headers = {'If-None-Match': cached.headers['ETag']} if cached is not None else {}
+
+        response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self._responses.move_to_end(key)
+            return cached
+
+        with self._lock:
+            if response.status_code == 200 and 'ETag' in response.headers:
+                self._responses[key] = response
+                self._responses.move_to_end(key)
+                while len(self._responses) > self.max_entries:
+                    self._responses.popitem(last=False)
+            else:
+                self._responses.pop(key, None)
+        return response
+
+    def get_page(self, url, params=None, timeout=5, page_size=100):
+        """
+        One page of a cursor-paginated listing as (rows, next_url). For the
+        first page pass the filters as `params` (a dict, possibly empty);
+        page_size is added to them. Fetch the following page with
+        get_page(next_url): the link already carries the cursor and the
+        original query string. next_url is None after the last page, and
+        for plain-list responses (returned whole).
+        Raises requests.HTTPError if the page fails.
+        """
+        if params is not None:
+            params = {**params, 'page_size': page_size}
+        response = self.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, dict):
+            return list(data), None
+        return data.get('results', []), data.get('next')
+
+
+api_client = ConditionalClient()
@@ -2,8 +2,8 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QFrame, QGridLayout, QScrollArea, QWidget)
 from PyQt6.QtCore import Qt
 import qtawesome as qta
-import requests
 from app_config import Endpoints
+from services.api_client import api_client
 
 class RequestDetailDialog(QDialog):
     def __init__(self, request_data, parent=None):
@@ -81,7 +81,8 @@ class RequestDetailDialog(QDialog):
             url = f"{Endpoints.DIGITAL_IDS}?citizen_id={cid}&type={dtype}"
             print(f"Fetching Issued Doc: {url}")
             
-            response = requests.get(url, timeout=3)
+            # Revalidated with If-None-Match; unchanged details are not re-sent
+            response = api_client.get(url, timeout=3)
             if response.status_code == 200:
                 results = response.json()
                 if isinstance(results, dict): results = results.get('results', []) # handle pagination if present
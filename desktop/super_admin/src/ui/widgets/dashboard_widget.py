@@ -216,20 +216,20 @@ class DashboardWidget(QWidget):
         # 2. Fetch Issued IDs Count
         try:
             # ID Service running
-            response = requests.get(Endpoints.DIGITAL_IDS)
+            response = requests.get(Endpoints.DIGITAL_IDS_COUNT)
             if response.status_code == 200:
-                ids = response.json()
-                self.ids_card.value_label.setText(str(len(ids)))
+                count = response.json().get('count', 0)
+                self.ids_card.value_label.setText(f"{count:,}")
         except Exception as e:
             print(f"Error fetching IDs: {e}")
 
         # 3. Fetch Pending Requests
         try:
             # ID Service requests
-            response = requests.get(Endpoints.REQUESTS)
+            response = requests.get(Endpoints.REQUESTS_SUMMARY)
             if response.status_code == 200:
-                reqs = response.json()
-                self.pending_card.value_label.setText(str(len(reqs)))
+                pending = response.json().get('by_status', {}).get('PENDING', 0)
+                self.pending_card.value_label.setText(f"{pending:,}")
         except Exception as e:
             print(f"Error fetching requests: {e}")
 
@@ -3,8 +3,8 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushBut
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QColor, QFont, QPixmap
 from app_config import Endpoints
+from services.api_client import api_client
 import qtawesome as qta
-import requests
 
 class IDWidget(QWidget):
     def __init__(self, doc_type="NATIONAL_ID", title="ID Card Management"):
@@ -56,29 +56,85 @@ class IDWidget(QWidget):
         """)
         layout.addWidget(self.table)
         
+        # Footer: totals and the next page
+        footer_layout = QHBoxLayout()
+        self.total_label = QLabel("")
+        self.total_label.setStyleSheet("color: #aaa;")
+        footer_layout.addWidget(self.total_label)
+        footer_layout.addStretch()
+        
+        self.more_btn = QPushButton("Load More")
+        self.more_btn.setStyleSheet("background-color: #333; color: white; padding: 8px 15px; border-radius: 5px;")
+        self.more_btn.clicked.connect(self.load_more)
+        self.more_btn.setEnabled(False)
+        footer_layout.addWidget(self.more_btn)
+        
+        layout.addLayout(footer_layout)
+        
+        # Listings are cursor-paginated: one page is held per fetch, and the
+        # next one is fetched when the table is scrolled to the bottom
+        self.next_url = None
+        self.loading = False
+        self.total = None
+        self.table.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        
         # Initial Load
         QTimer.singleShot(500, self.load_data)
 
     def load_data(self):
         self.refresh_btn.setText("Loading...")
         self.refresh_btn.setEnabled(False)        
+        self.loading = True
         try:
-            url = f"{Endpoints.DIGITAL_IDS}?type={self.doc_type}"
-            print(f"Fetching Issued Doc: {url}")
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                self.update_table(response.json())
-            else:
-                print(f"Error loading IDs: {response.text}")
+            url = Endpoints.DIGITAL_IDS
+            print(f"Fetching Issued Doc: {url}?type={self.doc_type}")
+            rows, self.next_url = api_client.get_page(url, params={'type': self.doc_type}, timeout=5)
+            self.table.setRowCount(0)
+            self.update_table(rows)
+            self.load_total()
         except Exception as e:
             print(f"Connection error: {e}")
         finally:
+            self.loading = False
             self.refresh_btn.setText("Refresh")
             self.refresh_btn.setEnabled(True)
+            self.update_footer()
+
+    def load_more(self):
+        if not self.next_url or self.loading:
+            return
+        self.loading = True
+        self.more_btn.setText("Loading...")
+        self.more_btn.setEnabled(False)
+        try:
+            rows, self.next_url = api_client.get_page(self.next_url, timeout=5)
+            self.update_table(rows)
+        except Exception as e:
+            print(f"Connection error: {e}")
+        finally:
+            self.loading = False
+            self.more_btn.setText("Load More")
+            self.update_footer()
+
+    def load_total(self):
+        # Counted by the server, not by downloading every row
+        response = api_client.get(Endpoints.DIGITAL_IDS_COUNT, params={'type': self.doc_type}, timeout=5)
+        self.total = response.json().get('count') if response.status_code == 200 else None
+
+    def on_scroll(self, value):
+        if value == self.table.verticalScrollBar().maximum():
+            self.load_more()
+
+    def update_footer(self):
+        shown = self.table.rowCount()
+        self.total_label.setText(f"Showing {shown} of {self.total}" if self.total is not None else f"Showing {shown}")
+        self.more_btn.setEnabled(bool(self.next_url))
 
     def update_table(self, data):
-        self.table.setRowCount(len(data))
-        for i, item in enumerate(data):
+        """Appends one page of rows to the table."""
+        start = self.table.rowCount()
+        self.table.setRowCount(start + len(data))
+        for i, item in enumerate(data, start):
             self.table.setItem(i, 0, QTableWidgetItem(str(item.get('id'))))
             self.table.setItem(i, 1, QTableWidgetItem(item.get('citizen_id')))
             
@@ -1,10 +1,11 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox)
+                             QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QComboBox)
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QColor, QIcon
 import qtawesome as qta
 import requests
 from app_config import Endpoints
+from services.api_client import api_client
 from ui.dialogs.request_detail_dialog import RequestDetailDialog
 
 class RequestsWidget(QWidget):
@@ -22,6 +23,14 @@ class RequestsWidget(QWidget):
         header_layout.addWidget(title)
         header_layout.addStretch()
         
+        # Status filter (applied by the server, so older pending requests stay reachable)
+        self.status_filter = QComboBox()
+        for label, value in (("All", None), ("Pending", "PENDING"), ("Approved", "APPROVED"), ("Rejected", "REJECTED")):
+            self.status_filter.addItem(label, value)
+        self.status_filter.setStyleSheet("padding: 6px; background: #252525; color: white; border: 1px solid #444; border-radius: 5px;")
+        self.status_filter.currentIndexChanged.connect(self.load_requests)
+        header_layout.addWidget(self.status_filter)
+        
         # Refresh Button
         self.refresh_btn = QPushButton("Refresh")
         self.refresh_btn.setIcon(qta.icon('fa5s.sync-alt', color='white'))
@@ -50,44 +59,97 @@ class RequestsWidget(QWidget):
         # Connect Double Click
         self.table.itemDoubleClicked.connect(self.show_request_details)
         
+        # Footer: totals and the next page
+        footer_layout = QHBoxLayout()
+        self.total_label = QLabel("")
+        self.total_label.setStyleSheet("color: #aaa;")
+        footer_layout.addWidget(self.total_label)
+        footer_layout.addStretch()
+        
+        self.more_btn = QPushButton("Load More")
+        self.more_btn.setStyleSheet("""
+            QPushButton { background-color: #333; color: white; padding: 8px 15px; border-radius: 5px; border: 1px solid #444; }
+            QPushButton:hover { background-color: #444; }
+        """)
+        self.more_btn.clicked.connect(self.load_more)
+        self.more_btn.setEnabled(False)
+        footer_layout.addWidget(self.more_btn)
+        
+        layout.addLayout(footer_layout)
+        
+        # Listings are cursor-paginated: one page is held per fetch, and the
+        # next one is fetched when the table is scrolled to the bottom
         self.requests = []
+        self.next_url = None
+        self.loading = False
+        self.summary = None
+        self.table.verticalScrollBar().valueChanged.connect(self.on_scroll)
         
         # Initial Load
         QTimer.singleShot(500, self.load_requests)
 
     def load_requests(self):
         self.refresh_btn.setEnabled(False)
+        self.loading = True
         try:
             url = Endpoints.REQUESTS
+            status = self.status_filter.currentData()
             print(f"Fetching requests from {url}")
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, dict) and 'results' in data:
-                    self.requests = data['results']
-                elif isinstance(data, list):
-                    self.requests = data
-                else:
-                    self.requests = []
-                    
-                self.update_table(self.requests)
-            else:
-                print(f"Failed to fetch requests: {response.status_code}")
+            rows, self.next_url = api_client.get_page(url, params={'status': status} if status else {}, timeout=5)
+            self.requests = []
+            self.table.setRowCount(0)
+            self.update_table(rows)
+            self.load_summary()
         except Exception as e:
             print(f"Error fetching requests: {e}")
         finally:
+            self.loading = False
             self.refresh_btn.setEnabled(True)
+            self.update_footer()
+
+    def load_more(self):
+        if not self.next_url or self.loading:
+            return
+        self.loading = True
+        self.more_btn.setText("Loading...")
+        self.more_btn.setEnabled(False)
+        try:
+            rows, self.next_url = api_client.get_page(self.next_url, timeout=5)
+            self.update_table(rows)
+        except Exception as e:
+            print(f"Error fetching requests: {e}")
+        finally:
+            self.loading = False
+            self.more_btn.setText("Load More")
+            self.update_footer()
+
+    def load_summary(self):
+        # Totals per status come from the server, not from downloading every row
+        response = api_client.get(Endpoints.REQUESTS_SUMMARY, timeout=5)
+        self.summary = response.json() if response.status_code == 200 else None
+
+    def on_scroll(self, value):
+        if value == self.table.verticalScrollBar().maximum():
+            self.load_more()
+
+    def update_footer(self):
+        shown = self.table.rowCount()
+        if self.summary is None:
+            self.total_label.setText(f"Showing {shown}")
+        else:
+            status = self.status_filter.currentData()
+            by_status = self.summary.get('by_status', {})
+            total = by_status.get(status, 0) if status else self.summary.get('total', 0)
+            self.total_label.setText(f"Showing {shown} of {total} · {by_status.get('PENDING', 0)} pending")
+        self.more_btn.setEnabled(bool(self.next_url))
 
     def update_table(self, requests_data):
-        self.table.setRowCount(0) # Clear
-        
-        # Sort pending first
-        requests_data.sort(key=lambda x: 0 if x.get('status') == 'PENDING' else 1)
-        
-        self.table.setRowCount(len(requests_data))
+        """Appends one page of requests (newest first, as the server orders them) to the table."""
+        self.requests.extend(requests_data)
+        start = self.table.rowCount()
+        self.table.setRowCount(start + len(requests_data))
         
-        for i, req in enumerate(requests_data):
+        for i, req in enumerate(requests_data, start):
             date = str(req.get('request_date', ''))[:10]
             cid = str(req.get('citizen_id', ''))
             dtype = str(req.get('doc_type', '')).replace('_', ' ').title()